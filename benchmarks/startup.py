@@ -0,0 +1,84 @@
+"""Time from launching the app to its first frame.
+
+    python benchmarks/startup.py --runs 10 --max-ms 800
+
+Each run starts a fresh interpreter that imports main.py, runs MyApp
+headless until the first screen refresh and exits. The median over the
+runs is reported for each stage; with --max-ms the script fails when the
+median time to first frame is over the budget, so it can guard against
+startup regressions.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List, Optional
+
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+# Environment variable carrying the launch time into the child process.
+LAUNCHED_AT = "JETSON_CHESS_LAUNCHED_AT"
+
+STAGES = ("imported", "mounted", "first_frame")
+
+
+def measure_child():
+    """Runs inside the child: launch the app headless and print the stage times in ms as JSON."""
+    launched = float(os.environ[LAUNCHED_AT])
+    sys.path.insert(0, SRC_DIR)
+    import main
+    times = {"imported": time.time()}
+
+    async def first_frame(pilot):
+        times["mounted"] = time.time()
+        refreshed = asyncio.get_running_loop().create_future()
+        pilot.app.call_after_refresh(refreshed.set_result, None)
+        await refreshed
+        times["first_frame"] = time.time()
+        pilot.app.exit()
+
+    main.MyApp().run(headless=True, auto_pilot=first_frame)
+    print(json.dumps({stage: (times[stage] - launched) * 1000 for stage in STAGES}), file=sys.__stdout__)
+
+
+def measure_run(directory: str) -> dict[str, float]:
+    env = dict(os.environ, **{LAUNCHED_AT: repr(time.time())})
+    result = subprocess.run([sys.executable, os.path.abspath(__file__), "--child"], cwd=directory, env=env,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure the app's time to first frame.")
+    parser.add_argument("--runs", type=int, default=5, help="app launches to take the median of")
+    parser.add_argument("--max-ms", type=float, help="fail if the median time to first frame is over this")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        measure_child()
+        return 0
+
+    # Run in a scratch directory so the app's logs and caches stay out of the checkout.
+    with tempfile.TemporaryDirectory() as directory:
+        os.mkdir(os.path.join(directory, "logs"))
+        runs = [measure_run(directory) for _ in range(args.runs)]
+    for stage in STAGES:
+        values = [run[stage] for run in runs]
+        print(f"{stage:12} median {statistics.median(values):7.1f} ms   min {min(values):7.1f} ms")
+
+    median = statistics.median(run["first_frame"] for run in runs)
+    if args.max_ms is not None and median > args.max_ms:
+        print(f"Time to first frame {median:.1f} ms is over the {args.max_ms:.0f} ms budget", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
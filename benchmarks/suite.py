@@ -0,0 +1,352 @@
+"""Benchmarks of the chess_core and widget hot paths.
+
+    python benchmarks/suite.py                          # run everything, compare with baseline.json
+    python benchmarks/suite.py -k perft -k render_line  # only benchmarks whose name contains a pattern
+    python benchmarks/suite.py --json results.json      # also write the results as JSON
+    python benchmarks/suite.py --save-baseline          # make this run the new baseline
+
+Each benchmark is timed over several samples. Its fastest sample, the
+one least disturbed by the rest of the machine, is compared with the
+stored baseline; the run fails when any is slower than the baseline by
+more than --threshold. Baselines are only meaningful on
+the machine that recorded them, so record a new one before comparing
+changes on another machine.
+
+The engine benchmarks talk to uci_stub.py, which answers at once, so
+they time chess.engine and EngineAnalyzer rather than a search. The
+widget benchmarks run inside the app through Textual's run_test
+pilot, headless. Everything runs in a scratch directory so the app's
+logs, caches and PGN indexes stay out of the checkout.
+"""
+
+import argparse
+import asyncio
+import gc
+import io
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, List, Optional
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+sys.path.insert(0, SRC_DIR)
+
+import chess
+import chess.engine
+import chess.pgn
+
+from chess_core import move_index, pgn_database
+from chess_core.chess_logic import get_moves_for_square
+from chess_core.engine import EngineAnalyzer
+from chess_core.game_archive import convert_pgn_to_archive, load_game_from_archive
+from chess_core.game_io import export_game, load_game_from_pgn, read_games, save_game_to_pgn
+from chess_core.game_state import game_state
+from chess_core.match import Adjudication, MatchRunner
+from chess_core.pgn_index import index_path_for
+from cli import perft_count
+
+
+UCI_STUB = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "uci_stub.py")]
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# Slowdown over the baseline's fastest sample that counts as a regression.
+DEFAULT_THRESHOLD = 0.5
+
+# Timed samples per benchmark, and the least time one sample should take;
+# faster benchmarks are called repeatedly within a sample.
+SAMPLES = 7
+MIN_SAMPLE_TIME = 0.02
+
+PERFT_DEPTHS = (2, 3, 4)
+MOVE_LIST_PLIES = (50, 200, 600)
+DATABASE_GAMES = 2000
+# Games of the database written back out; each takes a few milliseconds.
+EXPORT_GAMES = 200
+# Depth the stand-in engine reports lines up to; every depth is one info line per PV.
+ANALYSIS_DEPTH = 20
+# A match between two stand-in engines: both colours of each opening, this many games at once.
+MATCH_OPENINGS = 4
+MATCH_CONCURRENCY = 4
+MATCH_MAX_PLIES = 120
+
+
+class Benchmark:
+    __slots__ = ("name", "run", "setup", "reset")
+
+    def __init__(self, name: str, run: Callable[[], object], setup: Optional[Callable[[], None]] = None,
+                 reset: Optional[Callable[[], None]] = None):
+        self.name = name
+        self.run = run
+        # Called untimed: setup once before measuring, reset before every
+        # call of run (which limits each sample to a single call).
+        self.setup = setup
+        self.reset = reset
+
+    def measure(self, samples: int) -> dict[str, float]:
+        if self.setup is not None:
+            self.setup()
+        self._time(1)  # Warm-up: first-call imports and caches.
+        number = 1
+        if self.reset is None:
+            while self._time(number) < MIN_SAMPLE_TIME:
+                number *= 2
+        times = [self._time(number) / number for _ in range(samples)]
+        return {"median": statistics.median(times), "min": min(times), "number": number, "samples": samples}
+
+    def _time(self, number: int) -> float:
+        if self.reset is not None:
+            self.reset()
+        # As timeit does, keep garbage collection from landing in some samples and not others.
+        gc.collect()
+        gc.disable()
+        try:
+            started = time.perf_counter()
+            for _ in range(number):
+                self.run()
+            return time.perf_counter() - started
+        finally:
+            gc.enable()
+
+
+def random_game(plies: int, seed: int) -> List[chess.Move]:
+    """A reproducible random game of exactly plies moves."""
+    rng = random.Random(seed)
+    while True:
+        board = chess.Board()
+        while len(board.move_stack) < plies:
+            moves = list(board.generate_legal_moves())
+            if not moves:
+                break
+            board.push(rng.choice(moves))
+        if len(board.move_stack) == plies:
+            return board.move_stack
+        seed += 1
+
+
+def write_database(path: str, games: int):
+    with open(path, "w", encoding="utf-8") as f:
+        for number in range(games):
+            game = chess.pgn.Game()
+            game.headers["Event"] = f"Benchmark {number}"
+            game.headers["White"] = f"White {number % 37}"
+            game.headers["Black"] = f"Black {number % 41}"
+            game.add_line(random_game(40 + number % 120, number))
+            print(game, file=f, end="\n\n")
+
+
+def forget_database(path: str):
+    """Drop the in-memory and on-disk index of a PGN file so the next open rescans it."""
+    database = pgn_database._databases.pop(os.path.abspath(path), None)
+    if database is not None:
+        database.index.close()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(index_path_for(path) + suffix):
+            os.remove(index_path_for(path) + suffix)
+
+
+def core_benchmarks(directory: str) -> List[Benchmark]:
+    benchmarks = []
+    for depth in PERFT_DEPTHS:
+        benchmarks.append(Benchmark(f"perft depth {depth}", lambda depth=depth: perft_count(chess.Board(), depth)))
+
+    def all_squares():
+        for square in chess.SQUARES:
+            get_moves_for_square(square)
+
+    middlegame = random_game(30, 1)
+    benchmarks.append(Benchmark("get_moves_for_square 64 squares cached", all_squares,
+                                setup=lambda: game_state.load_moves(chess.STARTING_FEN, middlegame)))
+    benchmarks.append(Benchmark("get_moves_for_square 64 squares cold",
+                                lambda: (move_index._index_cache.clear(), all_squares())))
+
+    database_path = os.path.join(directory, "database.pgn")
+    write_database(database_path, DATABASE_GAMES)
+    benchmarks.append(Benchmark(f"load_game_from_pgn unindexed {DATABASE_GAMES} games",
+                                lambda: load_game_from_pgn(database_path, DATABASE_GAMES - 1),
+                                reset=lambda: forget_database(database_path)))
+    benchmarks.append(Benchmark(f"load_game_from_pgn indexed {DATABASE_GAMES} games",
+                                lambda: load_game_from_pgn(database_path, DATABASE_GAMES - 1)))
+    archive_path = os.path.join(directory, "database.jca")
+    benchmarks.append(Benchmark(f"load_game_from_archive {DATABASE_GAMES} games",
+                                lambda: load_game_from_archive(archive_path, DATABASE_GAMES - 1),
+                                setup=lambda: convert_pgn_to_archive(database_path, archive_path,
+                                                                     keys=True, notation=True)))
+    lean_archive_path = os.path.join(directory, "lean.jca")
+    benchmarks.append(Benchmark(f"load_game_from_archive moves only {DATABASE_GAMES} games",
+                                lambda: load_game_from_archive(lean_archive_path, DATABASE_GAMES - 1),
+                                setup=lambda: convert_pgn_to_archive(database_path, lean_archive_path)))
+
+    long_game = random_game(max(MOVE_LIST_PLIES), 2)
+    save_path = os.path.join(directory, "saved.pgn")
+    benchmarks.append(Benchmark(f"save_game_to_pgn {len(long_game)} plies", lambda: save_game_to_pgn(save_path),
+                                setup=lambda: game_state.load_moves(chess.STARTING_FEN, long_game)))
+
+    games: List[chess.pgn.Game] = []
+    export_path = os.path.join(directory, "exported.pgn")
+
+    def export_database():
+        with open(export_path, "w", encoding="utf-8") as f:
+            for game in games:
+                export_game(game, f)
+
+    benchmarks.append(Benchmark(f"export_game {EXPORT_GAMES} games", export_database,
+                                setup=lambda: games.extend(itertools.islice(read_games(database_path), EXPORT_GAMES))))
+    return benchmarks
+
+
+def widget_benchmarks(app) -> List[Benchmark]:
+    from chess_widgets.chess_board import ChessBoard
+    from chess_widgets.move_list import MoveList
+
+    board = app.query_one("#board", ChessBoard)
+    middlegame = random_game(30, 1)
+
+    def render_board():
+        for y in range(board.size.height):
+            board.render_line(y)
+
+    benchmarks = [
+        Benchmark("ChessBoard.render_line full board cached", render_board,
+                  setup=lambda: game_state.load_moves(chess.STARTING_FEN, middlegame)),
+        Benchmark("ChessBoard.render_line full board cold",
+                  lambda: (board._rank_strips.clear(), render_board())),
+    ]
+    move_list = app.query_one("#move_list", MoveList)
+    for plies in MOVE_LIST_PLIES:
+        moves = random_game(plies, plies)
+        benchmarks.append(Benchmark(f"MoveList.update_moves {plies} plies", move_list.update_moves,
+                                    setup=lambda moves=moves: game_state.load_moves(chess.STARTING_FEN, moves)))
+    return benchmarks
+
+
+def engine_benchmarks(loop: asyncio.AbstractEventLoop, analyzer: EngineAnalyzer) -> List[Benchmark]:
+    """Analysis and a short match against uci_stub.py, which answers without searching."""
+    board = chess.Board()
+    for move in random_game(30, 1):
+        board.push(move)
+
+    def analyse():
+        return loop.run_until_complete(analyzer.analyse(board, lambda lines: None))
+
+    openings = []
+    for seed in range(MATCH_OPENINGS):
+        opening = chess.Board()
+        for move in random_game(8, seed):
+            opening.push(move)
+        openings.append(opening)
+
+    def play_match():
+        runner = MatchRunner(UCI_STUB, UCI_STUB, openings, chess.engine.Limit(depth=4), concurrency=MATCH_CONCURRENCY,
+                             adjudication=Adjudication(max_plies=MATCH_MAX_PLIES))
+        return loop.run_until_complete(runner.run(io.StringIO()))
+
+    return [
+        Benchmark(f"EngineAnalyzer.analyse stub depth {ANALYSIS_DEPTH} multipv {analyzer.multipv}", analyse,
+                  setup=lambda: loop.run_until_complete(analyzer.start())),
+        Benchmark(f"MatchRunner.run stub {2 * MATCH_OPENINGS} games concurrency {MATCH_CONCURRENCY}", play_match),
+    ]
+
+
+def run_benchmarks(benchmarks: List[Benchmark], patterns: List[str], samples: int,
+                   results: dict[str, dict[str, float]]):
+    for benchmark in benchmarks:
+        if patterns and not any(pattern in benchmark.name for pattern in patterns):
+            continue
+        results[benchmark.name] = result = benchmark.measure(samples)
+        print(f"{benchmark.name:50} median {result['median'] * 1000:10.3f} ms   min {result['min'] * 1000:10.3f} ms",
+              file=sys.__stdout__, flush=True)
+
+
+def run_engine_benchmarks(patterns: List[str], samples: int, results: dict[str, dict[str, float]]):
+    loop = asyncio.new_event_loop()
+    analyzer = EngineAnalyzer(UCI_STUB, limit=chess.engine.Limit(depth=ANALYSIS_DEPTH))
+    try:
+        run_benchmarks(engine_benchmarks(loop, analyzer), patterns, samples, results)
+    finally:
+        loop.run_until_complete(analyzer.quit())
+        loop.close()
+
+
+async def run_widget_benchmarks(patterns: List[str], samples: int, results: dict[str, dict[str, float]]):
+    from main import MyApp
+    stdout, stderr = sys.stdout, sys.stderr
+    try:
+        app = MyApp()
+        async with app.run_test(size=(140, 45)) as pilot:
+            await pilot.pause()
+            run_benchmarks(widget_benchmarks(app), patterns, samples, results)
+    finally:
+        # The app sends stdout and stderr to its log.
+        sys.stdout, sys.stderr = stdout, stderr
+
+
+def compare(results: dict[str, dict[str, float]], baseline: dict[str, dict[str, float]], threshold: float) -> List[str]:
+    """Names of the benchmarks slower than their baseline by more than threshold, after printing the ratios."""
+    regressions = []
+    print(f"\nCompared with the baseline (regression above {1 + threshold:.2f}x):")
+    for name, result in results.items():
+        if name not in baseline:
+            print(f"{name:50} {'new':>10}")
+            continue
+        ratio = result["min"] / baseline[name]["min"]
+        regressed = ratio > 1 + threshold
+        if regressed:
+            regressions.append(name)
+        print(f"{name:50} {ratio:9.2f}x{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the chess_core and widget benchmarks.")
+    parser.add_argument("-k", dest="patterns", action="append", default=[],
+                        help="only run benchmarks whose name contains this (repeatable)")
+    parser.add_argument("--samples", type=int, default=SAMPLES, help="timed samples per benchmark")
+    parser.add_argument("--json", help="write the results to this JSON file")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON file to compare with")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative slowdown that fails the run (0.5 is 50%%)")
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the new baseline")
+    args = parser.parse_args(argv)
+
+    results: dict[str, dict[str, float]] = {}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        os.mkdir("logs")
+        try:
+            run_benchmarks(core_benchmarks(directory), args.patterns, args.samples, results)
+            run_engine_benchmarks(args.patterns, args.samples, results)
+            asyncio.run(run_widget_benchmarks(args.patterns, args.samples, results))
+        finally:
+            os.chdir(cwd)
+
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "chess": chess.__version__,
+        "results": results,
+    }
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; record one with --save-baseline")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+    return 1 if compare(results, baseline, args.threshold) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""A scripted stand-in for a UCI engine, for benchmarks and smoke runs without Stockfish.
+
+    JETSON_CHESS_ENGINE="python benchmarks/uci_stub.py" uv run src/main.py
+    python src/match.py --first "python benchmarks/uci_stub.py" --depth 4 --concurrency 8
+
+It does not search. For every depth up to the one asked for it reports
+one line per principal variation: a legal move chosen from a hash of the
+position and a score from the material balance, so runs are reproducible
+and lopsided games get adjudicated. --delay spaces the depths out to stand
+in for a slower engine; "go infinite" keeps reporting until "stop".
+"""
+
+import argparse
+import sys
+import threading
+import zlib
+from typing import List, Optional
+
+import chess
+
+# Depth reported for searches limited by time or nodes rather than depth.
+DEFAULT_DEPTH = 8
+
+PIECE_VALUES = {chess.PAWN: 100, chess.KNIGHT: 300, chess.BISHOP: 300, chess.ROOK: 500, chess.QUEEN: 900}
+
+
+def material(board: chess.Board) -> int:
+    """Material balance in centipawns from the side to move's point of view."""
+    score = 0
+    for piece_type, value in PIECE_VALUES.items():
+        score += value * (len(board.pieces(piece_type, chess.WHITE)) - len(board.pieces(piece_type, chess.BLACK)))
+    return score if board.turn == chess.WHITE else -score
+
+
+def ranked_moves(board: chess.Board) -> List[chess.Move]:
+    """Legal moves, captures first, rotated by a hash of the position so games vary."""
+    moves = sorted(board.legal_moves, key=lambda move: (not board.is_capture(move), move.uci()))
+    if not moves:
+        return moves
+    captures = sum(1 for move in moves if board.is_capture(move))
+    pool = captures or len(moves)
+    start = zlib.crc32(board.fen().encode()) % pool
+    return moves[start:pool] + moves[:start] + moves[pool:]
+
+
+class Stub:
+    def __init__(self, name: str, delay: float):
+        self.name = name
+        self.delay = delay
+        self.board = chess.Board()
+        self.multipv = 1
+        self.stop = threading.Event()
+        self.search: Optional[threading.Thread] = None
+        # The search thread and the command loop both write to stdout.
+        self.output_lock = threading.Lock()
+
+    def send(self, line: str):
+        with self.output_lock:
+            sys.stdout.write(line + "\n")
+            sys.stdout.flush()
+
+    def position(self, args: List[str]):
+        moves = args.index("moves") if "moves" in args else len(args)
+        if args[0] == "startpos":
+            self.board = chess.Board()
+        else:
+            self.board = chess.Board(" ".join(args[1:moves]))
+        for uci in args[moves + 1:]:
+            self.board.push_uci(uci)
+
+    def go(self, args: List[str]):
+        depth = int(args[args.index("depth") + 1]) if "depth" in args else DEFAULT_DEPTH
+        self.stop.clear()
+        self.search = threading.Thread(target=self.run_search, args=(self.board.copy(), depth, "infinite" in args))
+        self.search.start()
+
+    def run_search(self, board: chess.Board, depth: int, infinite: bool):
+        moves = ranked_moves(board)
+        score = material(board)
+        for current in range(1, depth + 1):
+            for rank, move in enumerate(moves[:self.multipv], 1):
+                self.send(f"info depth {current} multipv {rank} score cp {score - 5 * (rank - 1)} "
+                          f"nodes {current * 1000} pv {move.uci()}")
+            if self.stop.wait(self.delay):
+                break
+        if infinite:
+            self.stop.wait()
+        self.send(f"bestmove {moves[0].uci() if moves else '(none)'}")
+
+    def wait(self):
+        if self.search is not None:
+            self.search.join()
+            self.search = None
+
+    def run(self):
+        for line in sys.stdin:
+            command, *args = line.split() or [""]
+            if command == "uci":
+                self.send(f"id name {self.name}")
+                self.send("option name MultiPV type spin default 1 min 1 max 256")
+                self.send("uciok")
+            elif command == "isready":
+                self.send("readyok")
+            elif command == "setoption" and len(args) >= 4 and args[1].lower() == "multipv":
+                self.multipv = max(1, int(args[3]))
+            elif command == "ucinewgame":
+                self.board = chess.Board()
+            elif command == "position" and args:
+                self.position(args)
+            elif command == "go":
+                self.stop.set()
+                self.wait()
+                self.go(args)
+            elif command == "stop":
+                self.stop.set()
+                self.wait()
+            elif command == "quit":
+                break
+        self.stop.set()
+        self.wait()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="A scripted stand-in for a UCI engine.")
+    parser.add_argument("--name", default="UCI stub", help="name reported to the GUI")
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds between reported depths")
+    args = parser.parse_args(argv)
+    Stub(args.name, args.delay).run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
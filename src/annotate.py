@@ -0,0 +1,224 @@
+"""Annotate every game of a PGN file with engine evaluations, without the UI.
+
+    python src/annotate.py games.pgn -o games.annotated.pgn --workers 8 --depth 18
+
+Games are written in their original order as soon as they are done. If
+the run is interrupted, running the same command again carries on after
+the last game written, unless the input has changed or the output is
+missing or shorter than the state says, when it starts over.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import shlex
+import sys
+from typing import List, Optional, Union
+import chess.engine
+import chess.pgn
+
+from chess_core.annotation import annotate_game
+from chess_core.engine import engine_command, quit_engine
+from chess_core.game_io import export_game
+from chess_core.pgn_database import PgnDatabase, open_pgn_database
+
+
+# Games read ahead of the writer per engine.
+GAMES_IN_FLIGHT_PER_WORKER = 4
+
+
+def state_path_for(output_path: str) -> str:
+    return f"{output_path}.state.json"
+
+
+def _input_identity(input_path: str) -> dict:
+    """What a saved state must match for the input to count as unchanged since it was written."""
+    stat = os.stat(input_path)
+    return {"input": os.path.abspath(input_path), "size": stat.st_size, "mtime": stat.st_mtime_ns}
+
+
+def _load_state(state_path: str, identity: dict, output_path: str) -> tuple[int, int]:
+    """Games already written and the output size after them, from a previous run.
+
+    (0, 0), a fresh start, when the input has changed since or the output
+    no longer holds everything the state says was written.
+    """
+    try:
+        with open(state_path) as f:
+            state = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return 0, 0
+    if any(state.get(key) != value for key, value in identity.items()):
+        logging.info("Input is not the one of the interrupted run or has changed since; starting over")
+        return 0, 0
+    try:
+        output_size = os.path.getsize(output_path)
+    except FileNotFoundError:
+        output_size = -1
+    if output_size < state["offset"]:
+        logging.info("Output of the interrupted run is missing or cut short; starting over")
+        return 0, 0
+    return state["games"], state["offset"]
+
+
+def _save_state(state_path: str, identity: dict, games: int, offset: int):
+    temporary_path = f"{state_path}.tmp"
+    with open(temporary_path, "w") as f:
+        json.dump({**identity, "games": games, "offset": offset}, f)
+    os.replace(temporary_path, state_path)
+
+
+class Annotator:
+    """Annotates the games of a database with a pool of engine processes, writing them in order."""
+
+    def __init__(self, database: PgnDatabase, command: List[str], workers: int, limit: chess.engine.Limit):
+        self.database = database
+        self.command = command
+        self.workers = workers
+        self.limit = limit
+        # Annotated games, or the original text of games that couldn't be annotated.
+        self._finished: dict[int, Union[chess.pgn.Game, str]] = {}
+        self._game_done = asyncio.Event()
+
+    async def run(self, first: int, write_game) -> None:
+        """Annotate games first onwards, calling write_game(index, game) in file order."""
+        pending: asyncio.Queue = asyncio.Queue()
+        for index in range(first, len(self.database)):
+            pending.put_nowait(index)
+        # Bounds how far the engines may run ahead of a slow game.
+        in_flight = asyncio.Semaphore(self.workers * GAMES_IN_FLIGHT_PER_WORKER)
+
+        tasks = [asyncio.create_task(self._worker(pending, in_flight)) for _ in range(self.workers)]
+        for task in tasks:
+            # Wakes the writer so that it notices a worker that failed.
+            task.add_done_callback(lambda task: self._game_done.set())
+        try:
+            for index in range(first, len(self.database)):
+                while index not in self._finished:
+                    # A failed worker never finishes the game it took, so the
+                    # run stops rather than leave the others blocked behind it.
+                    for task in tasks:
+                        if task.done():
+                            task.result()
+                    self._game_done.clear()
+                    await self._game_done.wait()
+                write_game(index, self._finished.pop(index))
+                in_flight.release()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _worker(self, pending: asyncio.Queue, in_flight: asyncio.Semaphore):
+        _, engine = await chess.engine.popen_uci(self.command)
+        try:
+            engine_name = engine.id.get("name", self.command[0])
+            while True:
+                # Taking the slot before the game keeps the lowest unwritten game always moving.
+                await in_flight.acquire()
+                try:
+                    index = pending.get_nowait()
+                except asyncio.QueueEmpty:
+                    in_flight.release()
+                    return
+                engine_died = False
+                try:
+                    game = self.database.read_game(index)
+                    if game is None or game.errors:
+                        raise ValueError(game.errors[0] if game is not None else "no game found")
+                    await annotate_game(engine, game, self.limit)
+                    game.headers["Annotator"] = engine_name
+                except chess.engine.EngineTerminatedError:
+                    logging.error(f"Engine died on game {index + 1}, restarting it and writing the game unannotated")
+                    game = self.database.game_text(index)
+                    engine_died = True
+                except chess.engine.EngineError as error:
+                    logging.error(f"Engine error on game {index + 1} ({error}), writing it unannotated")
+                    game = self.database.game_text(index)
+                except ValueError as error:
+                    logging.error(f"Cannot annotate game {index + 1} ({error}), writing it unannotated")
+                    game = self.database.game_text(index)
+                self._finished[index] = game
+                self._game_done.set()
+                if engine_died:
+                    _, engine = await chess.engine.popen_uci(self.command)
+        finally:
+            await quit_engine(engine)
+
+
+async def annotate_file(input_path: str, output_path: str, command: List[str], workers: int,
+                        limit: chess.engine.Limit, restart: bool = False) -> int:
+    """Annotate input_path into output_path, resuming an interrupted run unless restart is set.
+
+    Returns the number of games annotated by this run.
+    """
+    database = open_pgn_database(input_path)
+    state_path = state_path_for(output_path)
+    identity = _input_identity(input_path)
+    first, offset = (0, 0) if restart else _load_state(state_path, identity, output_path)
+    if first:
+        logging.info(f"Resuming after game {first} of {len(database)}")
+
+    with open(output_path, "r+" if first else "w", encoding="utf-8") as output:
+        # Drops a game that was half written when the previous run stopped.
+        output.truncate(offset)
+        output.seek(offset)
+
+        def write_game(index: int, game: Union[chess.pgn.Game, str]):
+            if isinstance(game, str):
+                output.write(f"{game.strip()}\n\n")
+            else:
+                export_game(game, output)
+            output.flush()
+            _save_state(state_path, identity, index + 1, output.tell())
+            logging.info(f"Annotated game {index + 1} of {len(database)}")
+
+        await Annotator(database, command, workers, limit).run(first, write_game)
+
+    if os.path.exists(state_path):
+        os.remove(state_path)
+    return len(database) - first
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Annotate the games of a PGN file with engine evaluations.")
+    parser.add_argument("input", help="PGN file to annotate")
+    parser.add_argument("-o", "--output", help="annotated PGN file (default: <input>.annotated.pgn)")
+    parser.add_argument("--engine", help="UCI engine command (default: $JETSON_CHESS_ENGINE or Stockfish)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="engine processes to run")
+    parser.add_argument("--depth", type=int, help="search depth per move")
+    parser.add_argument("--time", type=float, help="search time per move in seconds")
+    parser.add_argument("--nodes", type=int, help="nodes searched per move")
+    parser.add_argument("--restart", action="store_true", help="ignore the state of an interrupted run")
+    args = parser.parse_args(argv)
+    if args.depth is None and args.time is None and args.nodes is None:
+        args.depth = 18
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    output_path = args.output or f"{os.path.splitext(args.input)[0]}.annotated.pgn"
+    command = shlex.split(args.engine) if args.engine else engine_command()
+    limit = chess.engine.Limit(depth=args.depth, time=args.time, nodes=args.nodes)
+    try:
+        annotated = asyncio.run(annotate_file(args.input, output_path, command, max(1, args.workers), limit, args.restart))
+    except FileNotFoundError as error:
+        logging.error(f"File not found: {error.filename}")
+        return 1
+    except chess.engine.EngineError as error:
+        logging.error(f"Engine failed: {error}; run again to resume {output_path}")
+        return 1
+    except KeyboardInterrupt:
+        logging.info(f"Interrupted; run again to resume {output_path}")
+        return 130
+    logging.info(f"Wrote {annotated} annotated games to {output_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,42 @@
+"""Build a Polyglot opening book from the games of a PGN file.
+
+    python src/build_book.py games.pgn book.bin --plies 24 --min-games 2
+
+Games are read one at a time and move counts are spilled to sorted
+temporary files as they grow, so any size of PGN file can be turned
+into a book in bounded memory.
+"""
+
+import argparse
+import logging
+import sys
+from typing import List, Optional
+
+from chess_core.opening_book import BOOK_PLIES, RUN_ENTRIES, build_book
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build a Polyglot opening book from a PGN file.")
+    parser.add_argument("input", help="PGN file to read")
+    parser.add_argument("output", help="Polyglot .bin book to write")
+    parser.add_argument("--plies", type=int, default=BOOK_PLIES, help="plies from the start of each game to include")
+    parser.add_argument("--min-games", type=int, default=1, help="games a move must appear in to be kept")
+    parser.add_argument("--run-entries", type=int, default=RUN_ENTRIES,
+                        help="distinct moves counted in memory before spilling to disk")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr, format="%(asctime)s - %(levelname)s - %(message)s")
+    try:
+        build_book(args.input, args.output, args.plies, args.min_games, args.run_entries,
+                   progress=lambda done, total: logging.info(f"Read {done // 1_000_000} of {total // 1_000_000} MB"))
+    except FileNotFoundError as error:
+        logging.error(f"File not found: {error.filename}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
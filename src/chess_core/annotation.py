@@ -0,0 +1,80 @@
+from typing import List, Optional
+import chess
+import chess.engine
+import chess.pgn
+
+
+# Centipawns lost by a move, compared with the engine's best move, that earn a NAG.
+INACCURACY_THRESHOLD = 50
+MISTAKE_THRESHOLD = 100
+BLUNDER_THRESHOLD = 300
+
+# Scores are clamped to this many centipawns before comparing them, so
+# that trading one winning line for another is not called a blunder.
+EVAL_CAP = 1000
+
+# Plies of the engine's best line added as a variation to a bad move.
+VARIATION_PLIES = 6
+
+
+def move_nag(centipawn_loss: int) -> Optional[int]:
+    if centipawn_loss >= BLUNDER_THRESHOLD:
+        return chess.pgn.NAG_BLUNDER
+    if centipawn_loss >= MISTAKE_THRESHOLD:
+        return chess.pgn.NAG_MISTAKE
+    if centipawn_loss >= INACCURACY_THRESHOLD:
+        return chess.pgn.NAG_DUBIOUS_MOVE
+    return None
+
+
+def _terminal_score(board: chess.Board) -> Optional[chess.engine.PovScore]:
+    if board.is_checkmate():
+        return chess.engine.PovScore(chess.engine.MateGiven, not board.turn)
+    if board.is_game_over():
+        return chess.engine.PovScore(chess.engine.Cp(0), board.turn)
+    return None
+
+
+def _centipawns(score: chess.engine.PovScore, color: chess.Color) -> int:
+    centipawns = score.pov(color).score(mate_score=100 * EVAL_CAP)
+    return max(-EVAL_CAP, min(EVAL_CAP, centipawns))
+
+
+async def annotate_game(engine: chess.engine.Protocol, game: chess.pgn.Game, limit: chess.engine.Limit) -> chess.pgn.Game:
+    """Add engine evaluations, NAGs and better lines to the mainline of a game, in place.
+
+    Every position of the mainline is searched once; a move is judged by
+    the evaluation before it against the evaluation after it.
+    """
+    nodes: List[chess.pgn.GameNode] = list(game.mainline())
+    board = game.board()
+    scores: List[chess.engine.PovScore] = []
+    best_lines: List[List[chess.Move]] = []
+    depths: List[Optional[int]] = []
+    for node in [game, *nodes]:
+        if node is not game:
+            board.push(node.move)
+        score = _terminal_score(board)
+        if score is not None:
+            scores.append(score)
+            best_lines.append([])
+            depths.append(None)
+            continue
+        info = await engine.analyse(board, limit)
+        scores.append(info["score"])
+        best_lines.append(info.get("pv", []))
+        depths.append(info.get("depth"))
+
+    for ply, node in enumerate(nodes):
+        node.set_eval(scores[ply + 1], depths[ply + 1])
+        mover = node.parent.turn()
+        loss = _centipawns(scores[ply], mover) - _centipawns(scores[ply + 1], mover)
+        nag = move_nag(loss)
+        if nag is None:
+            continue
+        node.nags.add(nag)
+        best_line = best_lines[ply][:VARIATION_PLIES]
+        if best_line and best_line[0] != node.move:
+            variation = node.parent.add_line(best_line)
+            variation.set_eval(scores[ply])
+    return game
@@ -2,14 +2,14 @@ import chess
 import logging
 
 from chess_core.game_state import game_state, current_board
-from chess_widgets.chess_move import ChessMove
-from chess_widgets.promotion_modal import PromotionModal
+from chess_core.instrumentation import timed
+from chess_core.move_index import legal_move_index
 
 
-def get_moves_for_square(square: chess.Square) -> list[chess.Move]:
-    """Get the moves for a square."""
+def get_moves_for_square(square: chess.Square) -> tuple[chess.Square, ...]:
+    """Get the sorted destination squares for a square."""
     with current_board() as board:
-        return sorted([move.to_square for move in board.legal_moves if move.from_square == square])
+        return legal_move_index(board, game_state.position_key).moves_for_square(square)
 
 
 def _update_turn_label(app) -> None:
@@ -17,56 +17,50 @@ def _update_turn_label(app) -> None:
         turn = "White" if board.turn == chess.WHITE else "Black"
         app.query_one("#turn_label").update(f"{turn}'s Turn")
 
-def _check_game_over_and_update_ui(app, board: chess.Board) -> None:
-    if board.is_checkmate():
-        winner_color = not board.turn
-        game_state.result = "1-0" if winner_color == chess.WHITE else "0-1"
+GAME_OVER_LABELS = {
+    chess.Termination.STALEMATE: "Draw by Stalemate",
+    chess.Termination.INSUFFICIENT_MATERIAL: "Draw by Insufficient Material",
+    chess.Termination.SEVENTYFIVE_MOVES: "Draw by 75-move rule",
+    chess.Termination.FIVEFOLD_REPETITION: "Draw by Fivefold Repetition",
+}
+
+def _check_game_over_and_update_ui(app) -> None:
+    outcome = game_state.outcome()
+    if outcome is None:
+        app.query_one("#game_state_label").update("")
+        return
+
+    game_state.result = outcome.result()
+    if outcome.termination == chess.Termination.CHECKMATE:
         app.query_one("#game_state_label").update(f"Checkmate! {game_state.result}")
-    elif board.is_stalemate():
-        game_state.result = "1/2-1/2"
-        app.query_one("#game_state_label").update("Draw by Stalemate")
-    elif board.is_insufficient_material():
-        game_state.result = "1/2-1/2"
-        app.query_one("#game_state_label").update("Draw by Insufficient Material")
-    elif board.is_seventyfive_moves():
-        game_state.result = "1/2-1/2"
-        app.query_one("#game_state_label").update("Draw by 75-move rule")
-    elif board.is_fivefold_repetition():
-        game_state.result = "1/2-1/2"
-        app.query_one("#game_state_label").update("Draw by Fivefold Repetition")
     else:
-        app.query_one("#game_state_label").update("")
+        app.query_one("#game_state_label").update(GAME_OVER_LABELS[outcome.termination])
 
 
-def _apply_move_and_check_game_status(app, move: chess.Move, board: chess.Board) -> None:
-    game_state.add_move(move, board.fen())
-    app.query_one("#move_list").update_moves()
+@timed
+def _apply_move_and_check_game_status(app, move: chess.Move) -> None:
+    game_state.add_move(move)
     app.query_one("#move_list").highlight_move(game_state.current_move_index)
     _update_turn_label(app)
     app.query_one("#board").refresh()
-    _check_game_over_and_update_ui(app, board)
+    _check_game_over_and_update_ui(app)
 
 
 def make_move_to_square(app, selected_square: chess.Square, to_square: chess.Square) -> None:
     """Make a move on the board and return game status."""
 
-    with current_board() as board:
-        if board.is_game_over():
-            logging.info("Cannot make a move when the game is over.")
-            return
-
-        # Only allow moves if we are at the end of the move history
-        if game_state.current_move_index != len(game_state.move_stack) - 1:
-            logging.info("Cannot make a move when not at the end of the move history.")
-            return
+    if game_state.is_game_over():
+        logging.info("Cannot make a move when the game is over.")
+        return
 
+    with current_board() as board:
         move = chess.Move(selected_square, to_square)
 
         logging.info(board.fen())
         if is_move_promotion(move, board.piece_type_at(move.from_square)):
             make_promotion(app, move)
         else:
-            _apply_move_and_check_game_status(app, move, board)
+            _apply_move_and_check_game_status(app, move)
 
 
 def is_move_promotion(move: chess.Move, piece_type: chess.PieceType) -> bool:
@@ -84,12 +78,13 @@ def is_move_promotion(move: chess.Move, piece_type: chess.PieceType) -> bool:
 
 def make_promotion(app, move: chess.Move) -> None:
     """Get the promotion for a move."""
+    # Imported here: promotions are rare and the modal is not needed at startup.
+    from chess_widgets.promotion_modal import PromotionModal
 
     def update_move_with_promotion(promotion: chess.Piece) -> None:
         """Call after the user selects a promotion piece."""
         logging.info(f"Promotion occurred: {chess.square_name(move.from_square)} to {chess.square_name(move.to_square)} promoted to {chess.PIECE_NAMES[promotion]}")
         move.promotion = promotion
-        with current_board() as board:
-            _apply_move_and_check_game_status(app, move, board)
+        _apply_move_and_check_game_status(app, move)
 
     app.push_screen(PromotionModal(), update_move_with_promotion)
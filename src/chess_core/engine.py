@@ -0,0 +1,106 @@
+import asyncio
+import logging
+import os
+import shlex
+from typing import Callable, List, Optional
+import chess
+import chess.engine
+
+
+
+# The Dockerfile installs Stockfish here; JETSON_CHESS_ENGINE overrides it.
+DEFAULT_ENGINE_COMMAND = "/usr/local/bin/stockfish"
+ENGINE_COMMAND_VARIABLE = "JETSON_CHESS_ENGINE"
+
+# Principal variations searched side by side.
+DEFAULT_MULTIPV = 3
+
+# Depth at which a search of a position is considered finished.
+ANALYSIS_DEPTH = 24
+
+
+def engine_command() -> List[str]:
+    return shlex.split(os.environ.get(ENGINE_COMMAND_VARIABLE, DEFAULT_ENGINE_COMMAND))
+
+
+def format_score(score: chess.engine.PovScore) -> str:
+    """Render a score from White's point of view, e.g. +0.35 or #-3."""
+    white = score.white()
+    if white.is_mate():
+        return f"#{white.mate()}"
+    return f"{white.score() / 100:+.2f}"
+
+
+class AnalysisLine:
+    """One principal variation reported by the engine."""
+
+    __slots__ = ("multipv", "depth", "score", "pv")
+
+    def __init__(self, multipv: int, depth: int, score: chess.engine.PovScore, pv: List[chess.Move]):
+        self.multipv = multipv
+        self.depth = depth
+        self.score = score
+        self.pv = pv
+
+    @classmethod
+    def from_info(cls, info: chess.engine.InfoDict) -> Optional["AnalysisLine"]:
+        if "score" not in info or not info.get("pv"):
+            return None
+        return cls(info.get("multipv", 1), info.get("depth", 0), info["score"], info["pv"])
+
+
+AnalysisCallback = Callable[[List[AnalysisLine]], None]
+
+
+class EngineAnalyzer:
+    """A UCI engine process driven through chess.engine's asyncio protocol.
+
+    The process is started on first use and searches one position at a
+    time. Cancelling the task running analyse() stops the search at once,
+    so a new position can be sent straight away.
+    """
+
+    def __init__(self, command: Optional[List[str]] = None, multipv: int = DEFAULT_MULTIPV,
+                 limit: Optional[chess.engine.Limit] = None):
+        self.command = command or engine_command()
+        self.multipv = multipv
+        self.limit = limit or chess.engine.Limit(depth=ANALYSIS_DEPTH)
+        self._protocol: Optional[chess.engine.UciProtocol] = None
+        self._search_lock = asyncio.Lock()
+
+    async def start(self):
+        if self._protocol is None:
+            _, self._protocol = await chess.engine.popen_uci(self.command)
+            logging.info(f"Engine started: {self._protocol.id.get('name', self.command[0])}")
+
+    async def analyse(self, board: chess.Board, on_update: AnalysisCallback) -> List[AnalysisLine]:
+        """Search board, calling on_update with all lines, best first, whenever one changes."""
+        await self.start()
+        lines: dict[int, AnalysisLine] = {}
+        async with self._search_lock:
+            try:
+                with await self._protocol.analysis(board, self.limit, multipv=self.multipv) as analysis:
+                    async for info in analysis:
+                        line = AnalysisLine.from_info(info)
+                        if line is None:
+                            continue
+                        lines[line.multipv] = line
+                        on_update([lines[multipv] for multipv in sorted(lines)])
+            except chess.engine.EngineTerminatedError:
+                self._protocol = None
+                raise
+        return [lines[multipv] for multipv in sorted(lines)]
+
+    async def quit(self):
+        if self._protocol is None:
+            return
+        protocol, self._protocol = self._protocol, None
+        await quit_engine(protocol)
+
+
+async def quit_engine(engine: chess.engine.Protocol, timeout: float = 2):
+    """Ask an engine to exit, killing it if it does not."""
+    try:
+        await asyncio.wait_for(engine.quit(), timeout=timeout)
+    except (asyncio.TimeoutError, chess.engine.EngineError):
+        engine.transport.kill()
@@ -0,0 +1,128 @@
+import json
+import logging
+import os
+import sqlite3
+from collections import OrderedDict
+from typing import List, Optional
+import chess
+import chess.engine
+
+from chess_core.engine import AnalysisLine
+from chess_core.pgn_index import to_sql_key
+
+
+# Relative to the working directory, like the logs.
+DEFAULT_CACHE_PATH = "cache/evaluations.sqlite"
+
+EVAL_CACHE_SIZE = 4096
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS evaluations (
+    engine TEXT NOT NULL,
+    key INTEGER NOT NULL,
+    depth INTEGER NOT NULL,
+    multipv INTEGER NOT NULL,
+    lines TEXT NOT NULL,
+    PRIMARY KEY (engine, key)
+) WITHOUT ROWID;
+"""
+
+
+class CachedEvaluation:
+    """The deepest search of a position seen so far."""
+
+    __slots__ = ("depth", "multipv", "lines")
+
+    def __init__(self, depth: int, multipv: int, lines: List[AnalysisLine]):
+        self.depth = depth
+        self.multipv = multipv
+        self.lines = lines
+
+    def satisfies(self, depth: int, multipv: int) -> bool:
+        return self.depth >= depth and self.multipv >= multipv
+
+
+def _encode_lines(lines: List[AnalysisLine]) -> str:
+    return json.dumps([[line.multipv, line.depth, line.score.white().score(), line.score.white().mate(),
+                        " ".join(move.uci() for move in line.pv)] for line in lines])
+
+
+def _decode_lines(text: str) -> List[AnalysisLine]:
+    lines = []
+    for multipv, depth, centipawns, mate, pv in json.loads(text):
+        score = chess.engine.Mate(mate) if mate is not None else chess.engine.Cp(centipawns)
+        lines.append(AnalysisLine(multipv, depth, chess.engine.PovScore(score, chess.WHITE),
+                                  [chess.Move.from_uci(uci) for uci in pv.split()]))
+    return lines
+
+
+class EvaluationCache:
+    """Engine results by Zobrist key, kept in an LRU in front of a SQLite file that outlives the session.
+
+    Results are kept per engine command so that different engines never
+    answer for each other.
+    """
+
+    def __init__(self, engine: str, path: str = DEFAULT_CACHE_PATH, size: int = EVAL_CACHE_SIZE):
+        self.engine = engine
+        self.size = size
+        self._entries: "OrderedDict[int, CachedEvaluation]" = OrderedDict()
+        try:
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            self.connection = sqlite3.connect(path, check_same_thread=False)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.executescript(SCHEMA)
+        except (OSError, sqlite3.Error) as error:
+            logging.warning(f"Cannot write evaluation cache {path} ({error}), keeping it in memory")
+            self.connection = sqlite3.connect(":memory:", check_same_thread=False)
+            self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def get(self, key: int, depth: int, multipv: int) -> Optional[List[AnalysisLine]]:
+        """The cached lines for a position if they were searched to at least depth with multipv lines.
+
+        multipv should not exceed the number of legal moves in the position.
+        """
+        entry = self._lookup(key)
+        if entry is None or not entry.satisfies(depth, multipv):
+            return None
+        return entry.lines[:multipv]
+
+    def _lookup(self, key: int) -> Optional[CachedEvaluation]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            return entry
+
+        row = self.connection.execute("SELECT depth, multipv, lines FROM evaluations WHERE engine = ? AND key = ?",
+                                      (self.engine, to_sql_key(key))).fetchone()
+        if row is None:
+            return None
+        entry = CachedEvaluation(row[0], row[1], _decode_lines(row[2]))
+        self._remember(key, entry)
+        return entry
+
+    def put(self, key: int, multipv: int, lines: List[AnalysisLine]):
+        """Store a search result unless a deeper one is already cached."""
+        if not lines or len(lines) < multipv:
+            return
+        # Lines are reported one at a time, so a search in progress mixes depths.
+        entry = CachedEvaluation(min(line.depth for line in lines), multipv, lines)
+        previous = self._lookup(key)
+        if previous is not None and previous.satisfies(entry.depth, multipv):
+            return
+
+        self._remember(key, entry)
+        with self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO evaluations (engine, key, depth, multipv, lines) "
+                                    "VALUES (?, ?, ?, ?, ?)",
+                                    (self.engine, to_sql_key(key), entry.depth, multipv, _encode_lines(lines)))
+
+    def _remember(self, key: int, entry: CachedEvaluation):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.size:
+            self._entries.popitem(last=False)
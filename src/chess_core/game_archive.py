@@ -0,0 +1,237 @@
+import logging
+import mmap
+import os
+import struct
+import threading
+from typing import Callable, List, Optional
+import chess
+
+from chess_core.game_state import GameState, game_state
+from chess_core.instrumentation import timed
+from chess_core.move_record import unpack_move
+from chess_core.pgn_scan import HEADER_COLUMNS, headers_match
+
+
+ARCHIVE_EXTENSION = ".jca"
+
+MAGIC = b"JCGA"
+VERSION = 1
+
+# Optional sections stored with every game of an archive.
+HAS_KEYS = 1      # Zobrist key after each move, 8 bytes a ply
+HAS_NOTATION = 2  # SAN of each move, space separated
+
+# Magic, version, flags, number of games and where the game table starts.
+FILE_HEADER = struct.Struct("<4sHHIQ")
+# One fixed-size row per game: where its data starts, its plies and the
+# byte lengths of its tags and notation. The data is the keys, the moves
+# packed into 2 bytes each, the tags as NUL-separated name/value pairs,
+# then the notation, padded so the keys of the next game stay aligned.
+# Keys and moves are in the machine's byte order, little-endian on every
+# platform the app runs on.
+TABLE_ENTRY = struct.Struct("<QIII")
+ALIGNMENT = 8
+
+
+def is_archive(file_path: str) -> bool:
+    return file_path.lower().endswith(ARCHIVE_EXTENSION)
+
+
+def _encode_tags(headers: dict[str, str]) -> bytes:
+    return "".join(f"{name}\0{value}\0" for name, value in headers.items()).encode("utf-8")
+
+
+def _decode_tags(data: memoryview) -> dict[str, str]:
+    fields = str(data, "utf-8").split("\0")
+    return dict(zip(fields[0:-1:2], fields[1::2]))
+
+
+class GameArchive:
+    """Games in the compact binary format, memory-mapped for random access.
+
+    Any game is found through the fixed-size game table without reading
+    the others, and its moves are replayed from their packed form with no
+    text to parse. Only mainlines are archived; variations and comments
+    stay in the PGN.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        with open(file_path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            self.stat = (stat.st_size, stat.st_mtime)
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, self.flags, self._count, self._table = FILE_HEADER.unpack_from(self._data)
+        except struct.error:
+            magic = version = None
+        if magic != MAGIC or version != VERSION:
+            self._data.close()
+            raise ValueError(f"{file_path} is not a game archive")
+        self._view = memoryview(self._data)
+
+    def close(self):
+        self._view.release()
+        self._data.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _entry(self, index: int) -> tuple[int, int, int, int]:
+        if not 0 <= index < self._count:
+            raise IndexError(f"Game {index} not in {self.file_path}")
+        return TABLE_ENTRY.unpack_from(self._data, self._table + index * TABLE_ENTRY.size)
+
+    def _sections(self, index: int) -> tuple[memoryview, memoryview, memoryview, memoryview]:
+        """The keys, packed moves, tags and notation of a game, without copying them."""
+        offset, plies, tags_length, notation_length = self._entry(index)
+        keys_end = offset + (8 * plies if self.flags & HAS_KEYS else 0)
+        moves_end = keys_end + 2 * plies
+        tags_end = moves_end + tags_length
+        view = self._view
+        return (view[offset:keys_end].cast("Q"), view[keys_end:moves_end].cast("H"),
+                view[moves_end:tags_end], view[tags_end:tags_end + notation_length])
+
+    def game_headers(self, index: int) -> dict[str, str]:
+        return _decode_tags(self._sections(index)[2])
+
+    def find_games(self, limit: int = -1, start: int = 0, **filters: str) -> list[tuple[int, dict[str, str]]]:
+        """Get (game index, headers) of games matching header filters, like PgnDatabase.find_games.
+
+        There is no index to search, so every game's tags are checked.
+        """
+        if not any(filters.values()):
+            end = self._count if limit < 0 else min(self._count, start + limit)
+            return [(index, self._index_headers(index)) for index in range(start, end)]
+        games = []
+        matched = 0
+        for index in range(self._count):
+            headers = self.game_headers(index)
+            if not headers_match(headers, filters):
+                continue
+            matched += 1
+            if matched > start:
+                games.append((index, self._index_headers(index, headers)))
+                if len(games) == limit:
+                    break
+        return games
+
+    def _index_headers(self, index: int, headers: Optional[dict[str, str]] = None) -> dict[str, str]:
+        """The headers a PgnIndex would return for a game."""
+        headers = headers or self.game_headers(index)
+        return {tag: headers.get(tag) for tag in HEADER_COLUMNS}
+
+    def count_games(self, **filters: str) -> int:
+        if not any(filters.values()):
+            return self._count
+        return sum(1 for index in range(self._count) if headers_match(self.game_headers(index), filters))
+
+    def mainline_moves(self, index: int) -> List[chess.Move]:
+        return [unpack_move(packed) for packed in self._sections(index)[1]]
+
+    @timed
+    def build_game(self, index: int) -> GameState:
+        """Replay a game into a new GameState, using the stored SAN and keys when the archive has them."""
+        keys, moves, tags, notation = self._sections(index)
+        headers = _decode_tags(tags)
+        state = GameState()
+        state.load_moves(headers.get("FEN", chess.STARTING_FEN), map(unpack_move, moves),
+                         str(notation, "utf-8").split() if self.flags & HAS_NOTATION else None,
+                         keys if self.flags & HAS_KEYS else None)
+        return state
+
+
+_archives: dict[str, GameArchive] = {}
+_archives_lock = threading.Lock()
+
+
+def open_game_archive(file_path: str) -> GameArchive:
+    """Get the archive for a file, mapping it again only if it changed on disk."""
+    key = os.path.abspath(file_path)
+    with _archives_lock:
+        stat = os.stat(file_path)
+        archive = _archives.get(key)
+        if archive is None or archive.stat != (stat.st_size, stat.st_mtime):
+            if archive is not None:
+                archive.close()
+            archive = _archives[key] = GameArchive(file_path)
+        return archive
+
+
+def build_game_from_archive(file_path: str, game_index: int = 0) -> Optional[GameState]:
+    """Like game_io.build_game_from_pgn, for a game archive."""
+    archive = open_game_archive(file_path)
+    if not 0 <= game_index < len(archive):
+        return None
+    return archive.build_game(game_index)
+
+
+@timed
+def load_game_from_archive(file_path: str, game_index: int = 0):
+    state = build_game_from_archive(file_path, game_index)
+    if state is not None:
+        game_state.adopt(state)
+        logging.info(f"Loaded game {game_index + 1} from {file_path}")
+
+
+def _align(offset: int) -> int:
+    return -offset % ALIGNMENT
+
+
+def convert_pgn_to_archive(pgn_path: str, archive_path: str, keys: bool = False, notation: bool = False,
+                           progress: Optional[Callable[[int, int], None]] = None) -> int:
+    """Write the mainlines of every game of a PGN file to an archive, returning the number of games.
+
+    keys and notation also store the position keys and SAN of every move,
+    which loading otherwise works out from the moves. progress(bytes read,
+    file size) is called as the PGN is read. The archive replaces
+    archive_path only once complete.
+    """
+    from chess_core.game_io import read_games
+    from chess_core.position_index import ReplayVisitor
+
+    class ArchiveVisitor(ReplayVisitor):
+        """Also notes the SAN of every mainline move."""
+
+        def begin_game(self):
+            super().begin_game()
+            self.notation: List[str] = []
+
+        def visit_move(self, board: chess.Board, move: chess.Move):
+            super().visit_move(board, move)
+            if notation:
+                self.notation.append(board.san(move))
+
+        def result(self):
+            return self.game, self.notation
+
+    flags = (HAS_KEYS if keys else 0) | (HAS_NOTATION if notation else 0)
+    table = bytearray()
+    temporary_path = f"{archive_path}.partial"
+    try:
+        with open(temporary_path, "wb") as f:
+            f.write(bytes(FILE_HEADER.size + _align(FILE_HEADER.size)))
+            for game, sans in read_games(pgn_path, Visitor=ArchiveVisitor, progress=progress):
+                if game.errors:
+                    logging.warning(f"Game {len(table) // TABLE_ENTRY.size + 1} of {pgn_path}: {game.errors[0]}")
+                tags = _encode_tags(game.headers)
+                text = " ".join(sans).encode("utf-8")
+                table += TABLE_ENTRY.pack(f.tell(), len(game.moves), len(tags), len(text))
+                if keys:
+                    # The replay also keys the starting position, which GameState works out
+                    # itself. The table promises one key a move, so a game whose starting
+                    # position can't be set up (and has no moves or keys) writes none.
+                    f.write(game.keys[1:len(game.moves) + 1].tobytes())
+                f.write(game.moves.tobytes())
+                f.write(tags)
+                f.write(text)
+                f.write(bytes(_align(f.tell())))
+            table_offset = f.tell()
+            f.write(table)
+            f.seek(0)
+            f.write(FILE_HEADER.pack(MAGIC, VERSION, flags, len(table) // TABLE_ENTRY.size, table_offset))
+        os.replace(temporary_path, archive_path)
+    finally:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+    return len(table) // TABLE_ENTRY.size
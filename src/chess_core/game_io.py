@@ -1,11 +1,27 @@
 import chess
 import chess.pgn
+import io
 import logging
+import os
 from datetime import datetime
+from typing import Callable, Iterator, Optional, TextIO
 
-from chess_core.game_state import game_state
+from chess_core.game_archive import GameArchive, is_archive, open_game_archive
+from chess_core.game_state import GameState, game_state
+from chess_core.instrumentation import timed
+from chess_core.pgn_database import PgnDatabase, open_pgn_database
 
+# Games between progress reports of read_games.
+PROGRESS_INTERVAL = 1000
+
+@timed
 def save_game_to_pgn(file_path: str):
+    write_game(game_from_state(game_state), file_path)
+    logging.info(f"Game saved to {file_path}")
+
+
+def game_from_state(state: GameState) -> chess.pgn.Game:
+    """Copy a game state, variations included, into a chess.pgn game that can be written out independently."""
     game = chess.pgn.Game()
     game.headers["Event"] = "Jetson Chess Game"
     game.headers["Site"] = "Local"
@@ -13,28 +29,101 @@ def save_game_to_pgn(file_path: str):
     game.headers["Round"] = "1"
     game.headers["White"] = "Player 1"
     game.headers["Black"] = "Player 2"
-    game.headers["Result"] = game_state.get_result()
+    game.headers["Result"] = state.get_result()
 
-    node = game
-    for chess_move in game_state.move_stack:
-        node = node.add_variation(chess_move.move)
+    if state.starting_fen != chess.STARTING_FEN:
+        game.setup(state.starting_fen)
 
-    with open(file_path, "w") as f:
-        exporter = chess.pgn.FileExporter(f)
-        game.accept(exporter)
-    logging.info(f"Game saved to {file_path}")
+    # Walk the variation tree without recursion; long games nest deeply.
+    pending = [(game, record) for record in reversed(state.variations)]
+    while pending:
+        node, record = pending.pop()
+        child = node.add_variation(record.move)
+        pending.extend((child, variation) for variation in reversed(record.variations))
+    return game
+
+
+def write_game(game: chess.pgn.Game, file_path: str, cancelled: Callable[[], bool] = lambda: False) -> bool:
+    """Write a game to a PGN file, replacing it only once the new text is complete.
+
+    Returns False, leaving the file untouched, if cancelled() is true once the text is written.
+    """
+    temporary_path = f"{file_path}.partial"
+    try:
+        with open(temporary_path, "w") as f:
+            export_game(game, f)
+        if cancelled():
+            return False
+        os.replace(temporary_path, file_path)
+        return True
+    finally:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+
+
+def export_game(game: chess.pgn.Game, f: TextIO):
+    """Write a game with its comments, NAGs and variations, followed by a blank line."""
+    exporter = chess.pgn.FileExporter(f)
+    game.accept(exporter)
 
 
-def load_game_from_pgn(file_path: str):
+def open_game_database(file_path: str, progress: Optional[Callable[[int, int], None]] = None) -> "PgnDatabase | GameArchive | None":
+    """The games of a PGN file or, by its extension, a game archive; progress is only reported while indexing PGN."""
     try:
-        with open(file_path, "r") as pgn_file:
-            game = chess.pgn.read_game(pgn_file)
-            if game:
-                game_state.clear()
-                board = game.board()
-                for move in game.mainline_moves():
-                    fen_before_move = board.fen()
-                    game_state.add_move(move, fen_before_move)
-                    board.push(move)
+        if is_archive(file_path):
+            return open_game_archive(file_path)
+        return open_pgn_database(file_path, progress)
     except FileNotFoundError:
-        logging.error(f"File not found: {file_path}")
\ No newline at end of file
+        logging.error(f"File not found: {file_path}")
+        return None
+
+
+def read_games(file_path: str, Visitor=chess.pgn.GameBuilder,
+               progress: Optional[Callable[[int, int], None]] = None) -> Iterator:
+    """Parse every game of a PGN file in order, one at a time, with the given chess.pgn visitor.
+
+    The file is read straight through and is not indexed, so batch tools
+    leave no sidecar behind. progress(bytes read, file size) is called
+    every PROGRESS_INTERVAL games.
+    """
+    with open(file_path, "rb") as pgn_file:
+        file_size = os.fstat(pgn_file.fileno()).st_size
+        text = io.TextIOWrapper(pgn_file, encoding="utf-8-sig", errors="replace")
+        games = 0
+        while (game := chess.pgn.read_game(text, Visitor=Visitor)) is not None:
+            yield game
+            games += 1
+            if progress and games % PROGRESS_INTERVAL == 0:
+                progress(pgn_file.tell(), file_size)
+    if progress:
+        progress(file_size, file_size)
+
+
+@timed
+def load_game_from_pgn(file_path: str, game_index: int = 0):
+    state = build_game_from_pgn(file_path, game_index)
+    if state is not None:
+        game_state.adopt(state)
+        logging.info(f"Loaded game {game_index + 1} from {file_path}")
+
+
+def build_game_from_pgn(file_path: str, game_index: int = 0) -> Optional[GameState]:
+    """Read a game of a PGN file into a new GameState, leaving the shared one alone so it can run off the UI thread."""
+    database = open_game_database(file_path)
+    return build_game_from_database(database, game_index) if database is not None else None
+
+
+def build_game_from_database(database: "PgnDatabase | GameArchive", game_index: int = 0) -> Optional[GameState]:
+    """Like build_game_from_pgn, for a database that is already open."""
+    if not 0 <= game_index < len(database):
+        return None
+    if isinstance(database, GameArchive):
+        return database.build_game(game_index)
+
+    game = database.read_game(game_index)
+    if not game:
+        return None
+    state = GameState()
+    state.load_tree(game.board().fen(), game.variations)
+    database.record_summary(game_index, len(state.move_stack), state.position_key)
+    return state
@@ -1,74 +1,433 @@
-from typing import List, Optional
+from array import array
+from collections import Counter
+from itertools import repeat
+from enum import Enum, auto
+from typing import TYPE_CHECKING, Callable, Iterable, List, Optional
 import chess
+import chess.polyglot
 from contextlib import contextmanager
 
-from chess_widgets.chess_move import ChessMove
+from chess_core.move_record import MoveRecord
+from chess_core.outcome import position_outcome
+
+if TYPE_CHECKING:
+    from chess_core.journal import SessionJournal
+
+
+class GameStateEvent(Enum):
+    MOVE_ADDED = auto()       # index is the ply appended to move_stack
+    MOVES_TRUNCATED = auto()  # index is the first ply removed from move_stack
+    RESET = auto()            # move_stack was replaced wholesale
+    POSITION_CHANGED = auto() # index is the new current_move_index
+    VARIATIONS_CHANGED = auto()  # index is a ply of move_stack whose alternatives changed
+
+
+GameStateListener = Callable[[GameStateEvent, int], None]
+
+# Plies between stored board snapshots; jumping anywhere costs at most this many pushes.
+CHECKPOINT_INTERVAL = 16
+
+# Zobrist key of the standard starting position, where most games begin.
+STARTING_KEY = chess.polyglot.zobrist_hash(chess.Board())
 
 
 class GameState:
     def __init__(self):
-        self.move_stack: List[ChessMove] = []
+        # The line being shown: the path through the variation tree to the
+        # current move followed by the mainline continuation after it.
+        self.move_stack: List[MoveRecord] = []
         self.current_move_index: int = -1
         self.result: str = "*"
         self.board = chess.Board()
+        # First moves of the game, mainline first; the roots of the variation tree.
+        self.variations: List[MoveRecord] = []
+        self._start_checkpoint = self.board.copy(stack=False)
+        self._start_ply = self.board.ply()
+        # Zobrist keys of the position before each ply of move_stack plus the
+        # final one, and how often each key occurs up to the current ply.
+        self._position_keys = array("Q", [STARTING_KEY])
+        self._repetitions: Counter[int] = Counter(self._position_keys)
+        self._listeners: List[GameStateListener] = []
+        # Told of every change to the game so it can be autosaved; see chess_core.journal.
+        self.journal: Optional["SessionJournal"] = None
+
+    # What adopt() takes over from another GameState; the listeners and journal
+    # stay, and the board object stays with the other board's contents moved in.
+    _GAME_FIELDS = ("move_stack", "current_move_index", "result", "variations",
+                    "_start_checkpoint", "_start_ply", "_position_keys", "_repetitions")
+
+    def adopt(self, other: "GameState"):
+        """Switch to a game built in another GameState, such as one loaded on a worker thread, notifying listeners once.
+
+        other must not be used afterwards; its move records and board now belong to this state.
+        """
+        for name in self._GAME_FIELDS:
+            setattr(self, name, getattr(other, name))
+        _move_board_into(self.board, other.board)
+        if self.journal:
+            self.journal.replaced()
+        self._notify(GameStateEvent.RESET)
+        self._notify(GameStateEvent.POSITION_CHANGED, self.current_move_index)
+
+    def subscribe(self, listener: GameStateListener):
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: GameStateListener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, event: GameStateEvent, index: int = 0):
+        for listener in list(self._listeners):
+            listener(event, index)
 
     def get_current_fen(self) -> str:
         return self.board.fen()
 
-    def add_move(self, move: chess.Move, fen_before_move: str):
-        if self.current_move_index < len(self.move_stack) - 1:
-            self.move_stack = self.move_stack[:self.current_move_index + 1]
+    @property
+    def starting_fen(self) -> str:
+        return self._start_checkpoint.fen()
+
+    @property
+    def position_key(self) -> int:
+        """Zobrist hash of the current position."""
+        return self._position_keys[self.current_move_index + 1]
 
-        chess_move = ChessMove(move=move, fen_before_move=fen_before_move)
-        self.move_stack.append(chess_move)
+    def repetition_count(self) -> int:
+        """How many times the current position has occurred so far."""
+        return self._repetitions[self.position_key]
+
+    def outcome(self) -> Optional[chess.Outcome]:
+        return position_outcome(self.board, self.position_key, self.repetition_count())
+
+    def is_game_over(self) -> bool:
+        return self.outcome() is not None
+
+    def current_record(self) -> Optional[MoveRecord]:
+        if self.current_move_index < 0:
+            return None
+        return self.move_stack[self.current_move_index]
+
+    def variation_count(self, record: MoveRecord) -> int:
+        """How many moves, record included, were tried from the position before record."""
+        return len(self._children(record.parent))
+
+    def _children(self, parent: Optional[MoveRecord]) -> List[MoveRecord]:
+        return parent.variations if parent is not None else self.variations
+
+    def _line_index(self, record: MoveRecord) -> int:
+        return record.ply - self._start_ply
+
+    def _is_on_line(self, record: MoveRecord) -> bool:
+        index = self._line_index(record)
+        return index < len(self.move_stack) and self.move_stack[index] is record
+
+    @staticmethod
+    def _mainline_from(record: Optional[MoveRecord]) -> List[MoveRecord]:
+        line = []
+        while record is not None:
+            line.append(record)
+            record = record.variations[0] if record.variations else None
+        return line
+
+    def _grow(self, board: chess.Board, move: chess.Move, parent: Optional[MoveRecord], depth: int,
+              san: Optional[str] = None, key: Optional[int] = None) -> MoveRecord:
+        """Play move on board and hang a record for it under parent, depth plies into the game.
+
+        The move's SAN and the Zobrist key after it are computed unless given.
+        """
+        if san is None:
+            record = MoveRecord.from_board(board, move, parent)
+        else:
+            record = MoveRecord(move, san, board.ply(), board.turn, parent)
+        board.push(move)
+        record.key = chess.polyglot.zobrist_hash(board) if key is None else key
+        if depth % CHECKPOINT_INTERVAL == 0:
+            record.checkpoint = board.copy(stack=False)
+        self._children(parent).append(record)
+        return record
+
+    def _replace_line(self, index: int, line: List[MoveRecord]):
+        """Show line in move_stack from index onwards."""
+        if index < len(self.move_stack):
+            del self.move_stack[index:]
+            del self._position_keys[index + 1:]
+            self._notify(GameStateEvent.MOVES_TRUNCATED, index)
+        for record in line:
+            self.move_stack.append(record)
+            self._position_keys.append(record.key)
+            self._notify(GameStateEvent.MOVE_ADDED, len(self.move_stack) - 1)
+
+    def add_move(self, move: chess.Move):
+        """Play move from the current position.
+
+        A move already in the tree is followed; any other starts a new
+        variation beside the existing continuations, which are kept.
+        """
+        index = self.current_move_index + 1
+        parent = self.move_stack[index - 1] if index else None
+        record = next((child for child in self._children(parent) if child.move == move), None)
+        if record is None:
+            record = self._grow(self.board, move, parent, index + 1)
+        else:
+            self.board.push(move)
+
+        if index >= len(self.move_stack) or self.move_stack[index] is not record:
+            self._replace_line(index, self._mainline_from(record))
+        self.current_move_index = index
+        self._repetitions[self.position_key] += 1
+        if self.journal:
+            self.journal.moved(move)
+        self._notify(GameStateEvent.POSITION_CHANGED, self.current_move_index)
+
+    def load_moves(self, fen: str, moves: Iterable[chess.Move], sans: Optional[Iterable[str]] = None,
+                   keys: Optional[Iterable[int]] = None):
+        """Replace the game with the given moves, notifying listeners once.
+
+        The moves' SAN and the Zobrist keys after them, when already known
+        (as in a game archive), save computing them.
+        """
+        self._reset_to_fen(fen)
+        record = None
+        for depth, (move, san, key) in enumerate(zip(moves, sans or repeat(None), keys or repeat(None)), 1):
+            record = self._grow(self.board, move, record, depth, san, key)
+            self.move_stack.append(record)
+            self._position_keys.append(record.key)
         self.current_move_index = len(self.move_stack) - 1
-        self.board.push(move)
+        self._repetitions = Counter(self._position_keys)
+        if self.journal:
+            self.journal.replaced()
+        self._notify(GameStateEvent.RESET)
+        self._notify(GameStateEvent.POSITION_CHANGED, self.current_move_index)
+
+    def load_tree(self, fen: str, variations: Iterable):
+        """Replace the game with a tree of moves and show its mainline, notifying listeners once.
 
-    def pop_move(self) -> Optional[ChessMove]:
+        variations are the first moves of the game, mainline first; each
+        needs a move and variations of its own, as chess.pgn nodes have.
+        """
+        self._reset_to_fen(fen)
+        board = self.board.copy(stack=False)
+        # Depth-first walk; a None node steps the scratch board back out of a branch.
+        pending = [(None, node) for node in reversed(list(variations))]
+        while pending:
+            parent, node = pending.pop()
+            if node is None:
+                board.pop()
+                continue
+            record = self._grow(board, node.move, parent, len(board.move_stack) + 1)
+            pending.append((None, None))
+            pending.extend((record, child) for child in reversed(node.variations))
+
+        for record in self._mainline_from(self.variations[0] if self.variations else None):
+            self.move_stack.append(record)
+            self._position_keys.append(record.key)
+            self.board.push(record.move)
+        self.current_move_index = len(self.move_stack) - 1
+        self._repetitions = Counter(self._position_keys)
+        if self.journal:
+            self.journal.replaced()
+        self._notify(GameStateEvent.RESET)
+        self._notify(GameStateEvent.POSITION_CHANGED, self.current_move_index)
+
+    def _reset_to_fen(self, fen: str):
+        self.board.set_fen(fen)
+        self.move_stack.clear()
+        self.variations = []
+        self.current_move_index = -1
+        self.result = "*"
+        self._start_checkpoint = self.board.copy(stack=False)
+        self._start_ply = self.board.ply()
+        start_key = STARTING_KEY if fen == chess.STARTING_FEN else chess.polyglot.zobrist_hash(self.board)
+        self._position_keys = array("Q", [start_key])
+        self._repetitions = Counter(self._position_keys)
+
+    def switch_variation(self, direction: int = 1) -> bool:
+        """Replace the current move with the next (or, for -1, previous) alternative to it."""
+        record = self.current_record()
+        if record is None:
+            return False
+        siblings = self._children(record.parent)
+        if len(siblings) < 2:
+            return False
+
+        sibling = siblings[(siblings.index(record) + direction) % len(siblings)]
+        index = self.current_move_index
+        self._step_back()
+        self.board.push(sibling.move)
+        self._replace_line(index, self._mainline_from(sibling))
+        self.current_move_index = index
+        self._repetitions[self.position_key] += 1
+        if self.journal:
+            self.journal.switched(direction)
+        self._notify(GameStateEvent.POSITION_CHANGED, self.current_move_index)
+        return True
+
+    def promote_to_mainline(self, record: Optional[MoveRecord] = None) -> bool:
+        """Make the line through record, by default the current move, the mainline of the game."""
+        record = record or self.current_record()
+        promoted = False
+        node = record
+        while node is not None:
+            siblings = self._children(node.parent)
+            if siblings[0] is not node:
+                siblings.remove(node)
+                siblings.insert(0, node)
+                promoted = True
+            node = node.parent
+
+        if promoted and self.journal:
+            self.journal.replaced()
+        if promoted and self._is_on_line(record):
+            self._notify(GameStateEvent.VARIATIONS_CHANGED, self._line_index(record))
+        return promoted
+
+    def delete_variation(self, record: Optional[MoveRecord] = None) -> bool:
+        """Remove record, by default the current move, and every move after it from the tree.
+
+        When the shown line ran through it the line continues with the
+        first remaining alternative instead.
+        """
+        record = record or self.current_record()
+        if record is None:
+            return False
+        siblings = self._children(record.parent)
+        index = self._line_index(record)
+        on_line = self._is_on_line(record)
+        siblings.remove(record)
+
+        if not on_line:
+            if self.journal:
+                self.journal.replaced()
+            if index < len(self.move_stack) and self.move_stack[index].parent is record.parent:
+                self._notify(GameStateEvent.VARIATIONS_CHANGED, index)
+            return True
+
+        position_changed = self.current_move_index >= index
+        if position_changed:
+            self._move_to_ply(index)
+        self._replace_line(index, self._mainline_from(siblings[0] if siblings else None))
+        if self.journal:
+            self.journal.replaced()
+        if position_changed:
+            self._notify(GameStateEvent.POSITION_CHANGED, self.current_move_index)
+        return True
+
+    def pop_move(self) -> Optional[MoveRecord]:
+        """Remove the last move of the shown line from the tree."""
         if not self.move_stack:
             return None
-        if self.current_move_index == len(self.move_stack) - 1:
-            self.current_move_index -= 1
-        
-        move = self.move_stack.pop()
-        self.board.pop()
-        return move
-
-    def get_last_move(self) -> Optional[ChessMove]:
+        record = self.move_stack[-1]
+        self.delete_variation(record)
+        return record
+
+    def get_last_move(self) -> Optional[MoveRecord]:
         if not self.move_stack:
             return None
         return self.move_stack[-1]
 
     def clear(self):
-        self.move_stack.clear()
-        self.current_move_index = -1
-        self.result = "*"
-        self.board.reset()
+        self._reset_to_fen(chess.STARTING_FEN)
+        if self.journal:
+            self.journal.started(chess.STARTING_FEN)
+        self._notify(GameStateEvent.RESET)
+        self._notify(GameStateEvent.POSITION_CHANGED, self.current_move_index)
 
     def forward_move(self) -> bool:
         if self.current_move_index < len(self.move_stack) - 1:
             self.current_move_index += 1
             self.board.push(self.move_stack[self.current_move_index].move)
+            self._repetitions[self.position_key] += 1
+            self._journal_position()
+            self._notify(GameStateEvent.POSITION_CHANGED, self.current_move_index)
             return True
         return False
 
     def backward_move(self) -> bool:
         if self.current_move_index > -1:
-            self.current_move_index -= 1
-            self.board.pop()
+            self._step_back()
+            self._journal_position()
+            self._notify(GameStateEvent.POSITION_CHANGED, self.current_move_index)
             return True
         return False
 
+    def _step_back(self):
+        self._repetitions[self.position_key] -= 1
+        if self.board.move_stack:
+            self.board.pop()
+        else:
+            # The board was restored from a checkpoint without its history.
+            self._board_to_ply(self.current_move_index)
+        self.current_move_index -= 1
+
+    def goto_ply(self, ply: int) -> bool:
+        """Show the position after the first ply moves of the line.
+
+        Restores the nearest board checkpoint at or before ply and replays
+        from there, so any jump costs at most CHECKPOINT_INTERVAL pushes.
+        """
+        ply = max(0, min(ply, len(self.move_stack)))
+        if ply == self.current_move_index + 1:
+            return False
+
+        self._move_to_ply(ply)
+        self._journal_position()
+        self._notify(GameStateEvent.POSITION_CHANGED, self.current_move_index)
+        return True
+
+    def _journal_position(self):
+        if self.journal:
+            self.journal.navigated(self.current_move_index + 1)
+
+    def _move_to_ply(self, ply: int):
+        self._board_to_ply(ply)
+        self.current_move_index = ply - 1
+        self._repetitions = Counter(self._position_keys[:ply + 1])
+
+    def _board_to_ply(self, ply: int):
+        current_ply = self.current_move_index + 1
+        if current_ply <= ply <= current_ply + CHECKPOINT_INTERVAL:
+            for record in self.move_stack[current_ply:ply]:
+                self.board.push(record.move)
+            return
+        if ply < current_ply and current_ply - ply <= min(len(self.board.move_stack), CHECKPOINT_INTERVAL):
+            for _ in range(current_ply - ply):
+                self.board.pop()
+            return
+
+        self._restore_checkpoint(ply)
+
+    def _restore_checkpoint(self, ply: int):
+        """Set the board to the checkpoint at or before ply and replay the rest.
+
+        The board is changed in place so widgets holding game_state.board stay
+        current; it loses the move history before the checkpoint.
+        """
+        checkpoint_ply = ply - ply % CHECKPOINT_INTERVAL
+        checkpoint = self.move_stack[checkpoint_ply - 1].checkpoint if checkpoint_ply else self._start_checkpoint
+        _move_board_into(self.board, checkpoint.copy(stack=False))
+        for record in self.move_stack[checkpoint_ply:ply]:
+            self.board.push(record.move)
+
     def get_result(self) -> str:
-        if self.board.is_game_over():
-            return self.board.result()
+        outcome = self.outcome()
+        if outcome is not None:
+            return outcome.result()
         return "*"
 
     def set_board_from_fen(self, fen: str):
-        self.board.set_fen(fen)
-        self.move_stack.clear()
-        self.current_move_index = -1
-        self.result = "*"
+        self._reset_to_fen(fen)
+        if self.journal:
+            self.journal.started(fen)
+        self._notify(GameStateEvent.RESET)
+        self._notify(GameStateEvent.POSITION_CHANGED, self.current_move_index)
+
+
+def _move_board_into(board: chess.Board, source: chess.Board):
+    """Give board the position and move stack of source, which must not be used afterwards.
+
+    Much cheaper than set_fen, and board stays the same object.
+    """
+    vars(board).update(vars(source))
 
 
 game_state = GameState()
@@ -0,0 +1,108 @@
+import functools
+import inspect
+import json
+import time
+from array import array
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+
+# Latest durations kept per timed function; percentiles are over this window.
+SAMPLE_WINDOW = 1024
+
+
+class TimingSeries:
+    """Call count and a ring buffer of the latest durations of one timed function."""
+
+    __slots__ = ("name", "count", "total", "samples")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.samples = array("d", bytes(8 * SAMPLE_WINDOW))
+        self.clear()
+
+    def clear(self):
+        self.count = 0
+        self.total = 0.0
+
+    def record(self, seconds: float):
+        self.samples[self.count % SAMPLE_WINDOW] = seconds
+        self.count += 1
+        self.total += seconds
+
+    def stats(self) -> dict[str, float]:
+        """Calls, total seconds and the p50/p95/max of the latest durations, in seconds."""
+        window = sorted(self.samples[:min(self.count, SAMPLE_WINDOW)])
+        if not window:
+            return {"calls": 0, "total": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+        return {
+            "calls": self.count,
+            "total": self.total,
+            "p50": window[(len(window) - 1) // 2],
+            "p95": window[(len(window) - 1) * 95 // 100],
+            "max": window[-1],
+        }
+
+
+_series: dict[str, TimingSeries] = {}
+
+
+def series(name: str) -> TimingSeries:
+    found = _series.get(name)
+    if found is None:
+        found = _series[name] = TimingSeries(name)
+    return found
+
+
+@contextmanager
+def timing(name: str) -> Iterator[None]:
+    """Time a block of code under name."""
+    recorder = series(name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        recorder.record(time.perf_counter() - started)
+
+
+def timed(function: Optional[Callable] = None, *, name: Optional[str] = None):
+    """Decorator timing every call of a function or coroutine function, by default under its qualified name."""
+    if function is None:
+        return functools.partial(timed, name=name)
+    recorder = series(name or function.__qualname__)
+    clock = time.perf_counter
+
+    if inspect.iscoroutinefunction(function):
+        @functools.wraps(function)
+        async def timed_coroutine(*args, **kwargs):
+            started = clock()
+            try:
+                return await function(*args, **kwargs)
+            finally:
+                recorder.record(clock() - started)
+        return timed_coroutine
+
+    @functools.wraps(function)
+    def timed_function(*args, **kwargs):
+        started = clock()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            recorder.record(clock() - started)
+    return timed_function
+
+
+def timing_stats() -> dict[str, dict[str, float]]:
+    """Stats of every function called at least once, slowest total first."""
+    stats = {name: recorder.stats() for name, recorder in _series.items() if recorder.count}
+    return dict(sorted(stats.items(), key=lambda item: item[1]["total"], reverse=True))
+
+
+def reset_timings():
+    for recorder in _series.values():
+        recorder.clear()
+
+
+def export_timings(file_path: str):
+    with open(file_path, "w") as f:
+        json.dump(timing_stats(), f, indent=2)
@@ -0,0 +1,265 @@
+import atexit
+import io
+import logging
+import os
+import queue
+import struct
+import threading
+import zlib
+from enum import IntEnum
+from typing import Callable, List, Optional, Tuple, Union
+import chess
+
+from chess_core.game_state import GameState
+from chess_core.move_record import pack_move, unpack_move
+
+
+# Relative to the working directory, like the logs.
+DEFAULT_JOURNAL_PATH = "cache/session.journal"
+
+# Records appended before the journal is rewritten as a single snapshot,
+# which bounds both its size and the replay at startup.
+COMPACT_RECORDS = 1000
+
+MAGIC = b"JCJ\x01"
+
+# Each record is an op and payload length, the payload, then a CRC32 of
+# both; a record torn by a crash fails the check and ends the replay.
+RECORD_HEADER = struct.Struct("<BI")
+RECORD_CRC = struct.Struct("<I")
+PACKED_MOVE = struct.Struct("<H")
+PLY = struct.Struct("<I")
+DIRECTION = struct.Struct("<b")
+SNAPSHOT_HEADER = struct.Struct("<II")
+
+
+class JournalOp(IntEnum):
+    START = 1     # payload is the FEN of a new game
+    SNAPSHOT = 2  # the current ply, the shown line as packed moves, then the game as PGN
+    MOVE = 3      # a packed move played with add_move
+    GOTO = 4      # the ply navigated to
+    SWITCH = 5    # the direction passed to switch_variation
+
+
+def encode_record(op: JournalOp, payload: bytes) -> bytes:
+    header = RECORD_HEADER.pack(op, len(payload))
+    return header + payload + RECORD_CRC.pack(zlib.crc32(payload, zlib.crc32(header)))
+
+
+def _snapshot_record(game, line: List[int], ply: int) -> bytes:
+    from chess_core.game_io import export_game
+    pgn = io.StringIO()
+    export_game(game, pgn)
+    payload = (SNAPSHOT_HEADER.pack(ply, len(line)) + struct.pack(f"<{len(line)}H", *line)
+               + pgn.getvalue().encode("utf-8"))
+    return encode_record(JournalOp.SNAPSHOT, payload)
+
+
+def _apply_record(state: GameState, op: int, payload: bytes):
+    if op == JournalOp.START:
+        state.set_board_from_fen(payload.decode("utf-8"))
+    elif op == JournalOp.SNAPSHOT:
+        import chess.pgn
+        ply, length = SNAPSHOT_HEADER.unpack_from(payload)
+        line = struct.unpack_from(f"<{length}H", payload, SNAPSHOT_HEADER.size)
+        text = payload[SNAPSHOT_HEADER.size + 2 * length:].decode("utf-8")
+        game = chess.pgn.read_game(io.StringIO(text))
+        state.load_tree(game.board().fen(), game.variations)
+        # Following the line from the start shows it instead of the mainline.
+        state.goto_ply(0)
+        for packed in line:
+            state.add_move(unpack_move(packed))
+        state.goto_ply(ply)
+    elif op == JournalOp.MOVE:
+        state.add_move(unpack_move(PACKED_MOVE.unpack(payload)[0]))
+    elif op == JournalOp.GOTO:
+        state.goto_ply(PLY.unpack(payload)[0])
+    elif op == JournalOp.SWITCH:
+        state.switch_variation(DIRECTION.unpack(payload)[0])
+    else:
+        raise ValueError(f"Unknown journal record {op}")
+
+
+def replay_journal(path: str) -> Tuple[Optional[GameState], int, int]:
+    """Rebuild the game recorded in a journal file.
+
+    Returns the game (None if the file holds none), the length of the
+    intact part of the file and the number of records appended since it
+    was last rewritten. Replay stops at the first damaged record.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if not data.startswith(MAGIC):
+        return None, 0, 0
+
+    state = None
+    offset = len(MAGIC)
+    records = 0
+    while offset + RECORD_HEADER.size <= len(data):
+        op, length = RECORD_HEADER.unpack_from(data, offset)
+        end = offset + RECORD_HEADER.size + length
+        if end + RECORD_CRC.size > len(data):
+            break
+        payload = data[offset + RECORD_HEADER.size:end]
+        if RECORD_CRC.unpack_from(data, end)[0] != zlib.crc32(payload, zlib.crc32(data[offset:offset + RECORD_HEADER.size])):
+            break
+        if state is None:
+            if op not in (JournalOp.START, JournalOp.SNAPSHOT):
+                break
+            state = GameState()
+        try:
+            _apply_record(state, op, payload)
+        except (ValueError, IndexError, AttributeError, struct.error, UnicodeDecodeError) as error:
+            logging.warning(f"Stopped replaying {path} at a bad record: {error}")
+            break
+        offset = end + RECORD_CRC.size
+        records += 1
+    return state, offset if state is not None else 0, records
+
+
+def _fsync_directory(path: str):
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+# What the writer thread is asked to do: append bytes or make them the
+# whole file. Snapshots are passed as a function so the PGN is written
+# off the UI thread.
+JournalWrite = Tuple[bool, Union[bytes, Callable[[], bytes]]]
+
+
+class SessionJournal:
+    """Autosave of the game in play as an append-only file of compact records.
+
+    GameState reports each change to the attached journal, which queues a
+    record of a few bytes; a writer thread appends whatever is queued and
+    fsyncs once per batch, so saving costs the same however long the game
+    is and a crash loses at most the change being written. Changes that
+    reshape the move tree, and every COMPACT_RECORDS records, rewrite the
+    file as one snapshot holding the game as PGN.
+    """
+
+    def __init__(self, state: GameState, path: str = DEFAULT_JOURNAL_PATH):
+        self.state = state
+        self.path = path
+        self.records = 0
+        self._length = 0
+        self._file = None
+        self._queue: "queue.SimpleQueue[Optional[JournalWrite]]" = queue.SimpleQueue()
+        self._writer: Optional[threading.Thread] = None
+
+    def restore(self) -> bool:
+        """Replace the game with the one from the journal file, if it holds one."""
+        try:
+            restored, self._length, self.records = replay_journal(self.path)
+        except FileNotFoundError:
+            return False
+        except OSError as error:
+            logging.warning(f"Cannot read session journal {self.path}: {error}")
+            return False
+        if restored is None:
+            return False
+        self.state.adopt(restored)
+        logging.info(f"Restored {len(self.state.move_stack)} plies from {self.path}")
+        return True
+
+    def start(self):
+        """Begin recording changes to the game; the file is cut back to the part restore() could read."""
+        try:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._file = open(self.path, "ab")
+            self._file.truncate(self._length)
+        except OSError as error:
+            logging.warning(f"Cannot write session journal {self.path} ({error}), the game will not be autosaved")
+            return
+        if self.state.journal is not None:
+            self.state.journal.close()
+        self._writer = threading.Thread(target=self._write_batches, name="session_journal", daemon=True)
+        self._writer.start()
+        if not self._length:
+            if self.state.move_stack:
+                self.replaced()
+            else:
+                self.started(self.state.starting_fen)
+        self.state.journal = self
+        atexit.register(self.close)
+
+    def close(self):
+        """Write out queued records and stop recording."""
+        if self.state.journal is self:
+            self.state.journal = None
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join()
+            self._writer = None
+            self._file.close()
+
+    def moved(self, move: chess.Move):
+        self._append(JournalOp.MOVE, PACKED_MOVE.pack(pack_move(move)))
+
+    def navigated(self, ply: int):
+        self._append(JournalOp.GOTO, PLY.pack(ply))
+
+    def switched(self, direction: int):
+        self._append(JournalOp.SWITCH, DIRECTION.pack(direction))
+
+    def started(self, fen: str):
+        """A new game from fen replaced the old one."""
+        self.records = 0
+        self._queue.put((True, MAGIC + encode_record(JournalOp.START, fen.encode("utf-8"))))
+
+    def replaced(self):
+        """The move tree changed in a way records don't describe; rewrite the file from the game as it is now."""
+        from chess_core.game_io import game_from_state
+        self.records = 0
+        # Copied here, on the UI thread, so later changes don't leak into the snapshot.
+        game = game_from_state(self.state)
+        line = [pack_move(record.move) for record in self.state.move_stack]
+        ply = self.state.current_move_index + 1
+        self._queue.put((True, lambda: MAGIC + _snapshot_record(game, line, ply)))
+
+    def _append(self, op: JournalOp, payload: bytes):
+        if self.records >= COMPACT_RECORDS:
+            self.replaced()
+            return
+        self.records += 1
+        self._queue.put((False, encode_record(op, payload)))
+
+    def _write_batches(self):
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                for write in batch:
+                    if write is not None:
+                        self._write(*write)
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            except OSError as error:
+                logging.error(f"Cannot write session journal {self.path}: {error}")
+            if None in batch:
+                return
+
+    def _write(self, replace: bool, data: Union[bytes, Callable[[], bytes]]):
+        if callable(data):
+            data = data()
+        if not replace:
+            self._file.write(data)
+            return
+        temporary_path = f"{self.path}.partial"
+        with open(temporary_path, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary_path, self.path)
+        _fsync_directory(self.path)
+        self._file.close()
+        self._file = open(self.path, "ab")
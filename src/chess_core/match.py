@@ -0,0 +1,250 @@
+import asyncio
+import logging
+import os
+from typing import Callable, List, Optional, TextIO
+import chess
+import chess.engine
+import chess.pgn
+
+from chess_core.engine import quit_engine
+from chess_core.game_io import export_game
+
+
+# Mate scores count as this many centipawns when adjudicating.
+MATE_SCORE = 100000
+
+
+def load_openings(sources: List[str]) -> List[chess.Board]:
+    """Starting positions from FEN strings, files of FENs (one per line) or PGN files.
+
+    A PGN game contributes the position after its mainline, keeping the
+    moves that lead there. No sources means the standard starting position.
+    """
+    openings = []
+    for source in sources:
+        if source.lower().endswith(".pgn"):
+            with open(source, encoding="utf-8-sig") as f:
+                while (game := chess.pgn.read_game(f)) is not None:
+                    openings.append(game.end().board())
+        elif os.path.isfile(source):
+            with open(source) as f:
+                openings.extend(chess.Board(line.strip()) for line in f if line.strip())
+        else:
+            openings.append(chess.Board(source.strip().strip("'\"")))
+    return openings or [chess.Board()]
+
+
+class Adjudication:
+    """When to stop a game whose result is no longer in doubt.
+
+    Scores are centipawns from White's point of view as reported by the
+    engines after each move.
+    """
+
+    __slots__ = ("resign_score", "resign_plies", "draw_score", "draw_plies", "draw_from_ply", "max_plies")
+
+    def __init__(self, resign_score: int = 700, resign_plies: int = 6, draw_score: int = 10,
+                 draw_plies: int = 12, draw_from_ply: int = 80, max_plies: int = 500):
+        self.resign_score = resign_score
+        self.resign_plies = resign_plies
+        self.draw_score = draw_score
+        self.draw_plies = draw_plies
+        self.draw_from_ply = draw_from_ply
+        self.max_plies = max_plies
+
+    def adjudicate(self, board: chess.Board, scores: List[Optional[int]]) -> Optional[tuple[str, str]]:
+        """(result, reason) if the game should end now."""
+        if len(board.move_stack) >= self.max_plies:
+            return "1/2-1/2", "move limit"
+
+        recent = scores[-self.resign_plies:]
+        if len(recent) == self.resign_plies and None not in recent:
+            if all(score >= self.resign_score for score in recent):
+                return "1-0", "adjudication"
+            if all(score <= -self.resign_score for score in recent):
+                return "0-1", "adjudication"
+
+        recent = scores[-self.draw_plies:]
+        if len(board.move_stack) >= self.draw_from_ply and len(recent) == self.draw_plies and None not in recent \
+                and all(abs(score) <= self.draw_score for score in recent):
+            return "1/2-1/2", "adjudication"
+        return None
+
+
+class MatchTally:
+    """Results from the first engine's point of view."""
+
+    __slots__ = ("wins", "draws", "losses")
+
+    def __init__(self):
+        self.wins = 0
+        self.draws = 0
+        self.losses = 0
+
+    def add(self, result: str, first_is_white: bool):
+        """Count a finished game; "*", no result, is not counted."""
+        if result == "1/2-1/2":
+            self.draws += 1
+        elif result in ("1-0", "0-1"):
+            if (result == "1-0") == first_is_white:
+                self.wins += 1
+            else:
+                self.losses += 1
+
+    @property
+    def games(self) -> int:
+        return self.wins + self.draws + self.losses
+
+    def __str__(self):
+        points = self.wins + self.draws / 2
+        return f"+{self.wins} ={self.draws} -{self.losses} ({points:g}/{self.games})"
+
+
+class MatchGame:
+    """A game of the match, live while it is being played."""
+
+    __slots__ = ("number", "white", "black", "first_is_white", "board", "scores", "result", "reason")
+
+    def __init__(self, number: int, white: str, black: str, first_is_white: bool, opening: chess.Board):
+        self.number = number
+        self.white = white
+        self.black = black
+        self.first_is_white = first_is_white
+        self.board = opening.copy()
+        # White's score in centipawns after each move, None where the engine gave none.
+        self.scores: List[Optional[int]] = []
+        self.result = "*"
+        self.reason = ""
+
+    @property
+    def is_finished(self) -> bool:
+        return self.result != "*"
+
+    def to_pgn(self, event: str) -> chess.pgn.Game:
+        game = chess.pgn.Game.from_board(self.board)
+        game.headers["Event"] = event
+        game.headers["Site"] = "Local"
+        game.headers["Round"] = str(self.number)
+        game.headers["White"] = self.white
+        game.headers["Black"] = self.black
+        game.headers["Result"] = self.result
+        game.headers["Termination"] = self.reason
+        return game
+
+
+MatchListener = Callable[[MatchGame], None]
+
+
+class MatchRunner:
+    """Plays two UCI engines against each other, several games at once.
+
+    Every opening is played rounds times with each engine as White. Each
+    of the concurrency workers owns one pair of engine processes and plays
+    its games one after another; finished games are written to the output
+    as they come in.
+    """
+
+    def __init__(self, first: List[str], second: List[str], openings: List[chess.Board], limit: chess.engine.Limit,
+                 concurrency: int = 1, rounds: int = 1, adjudication: Optional[Adjudication] = None,
+                 event: str = "Engine match"):
+        self.commands = (first, second)
+        self.openings = openings
+        self.limit = limit
+        self.concurrency = concurrency
+        self.rounds = rounds
+        self.adjudication = adjudication or Adjudication()
+        self.event = event
+        self.names = [" ".join(first), " ".join(second)]
+        self.tally = MatchTally()
+        self.running: dict[int, MatchGame] = {}
+        self.move_listeners: List[MatchListener] = []
+        self.finish_listeners: List[MatchListener] = []
+
+    def pairings(self) -> List[tuple[int, chess.Board, bool]]:
+        """(game number, opening, whether the first engine is White) for every game of the match."""
+        pairings = []
+        for _ in range(self.rounds):
+            for opening in self.openings:
+                for first_is_white in (True, False):
+                    pairings.append((len(pairings) + 1, opening, first_is_white))
+        return pairings
+
+    async def run(self, output: TextIO) -> MatchTally:
+        pending: asyncio.Queue = asyncio.Queue()
+        for pairing in self.pairings():
+            pending.put_nowait(pairing)
+        workers = [asyncio.create_task(self._worker(pending, output)) for _ in range(min(self.concurrency, pending.qsize()))]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+        return self.tally
+
+    async def _worker(self, pending: asyncio.Queue, output: TextIO):
+        engines = [None, None]
+        try:
+            for side in (0, 1):
+                engines[side] = await self._start_engine(side)
+            while not pending.empty():
+                number, opening, first_is_white = pending.get_nowait()
+                game = await self._play(engines, number, opening, first_is_white)
+                for side in (0, 1):
+                    if engines[side] is None:
+                        engines[side] = await self._start_engine(side)
+
+                export_game(game.to_pgn(self.event), output)
+                output.flush()
+                self.tally.add(game.result, first_is_white)
+                for listener in list(self.finish_listeners):
+                    listener(game)
+        finally:
+            for engine in engines:
+                if engine is not None:
+                    await quit_engine(engine)
+
+    async def _start_engine(self, side: int) -> chess.engine.Protocol:
+        _, engine = await chess.engine.popen_uci(self.commands[side])
+        self.names[side] = engine.id.get("name", self.names[side])
+        return engine
+
+    async def _play(self, engines: list, number: int, opening: chess.Board, first_is_white: bool) -> MatchGame:
+        white, black = (0, 1) if first_is_white else (1, 0)
+        game = MatchGame(number, self.names[white], self.names[black], first_is_white, opening)
+        self.running[number] = game
+        try:
+            while not game.is_finished:
+                outcome = game.board.outcome(claim_draw=True)
+                if outcome is not None:
+                    game.result, game.reason = outcome.result(), outcome.termination.name.lower().replace("_", " ")
+                    break
+
+                side = white if game.board.turn == chess.WHITE else black
+                try:
+                    played = await engines[side].play(game.board, self.limit, game=number, info=chess.engine.INFO_SCORE)
+                except chess.engine.EngineError as error:
+                    # Covers illegal moves and engines that died; either way the side to move loses.
+                    logging.error(f"Game {number}: {self.names[side]} failed ({error})")
+                    if isinstance(error, chess.engine.EngineTerminatedError):
+                        engines[side] = None
+                    game.result = "0-1" if game.board.turn == chess.WHITE else "1-0"
+                    game.reason = "engine failure"
+                    break
+                if played.move is None:
+                    game.result = "0-1" if game.board.turn == chess.WHITE else "1-0"
+                    game.reason = "resignation"
+                    break
+
+                game.board.push(played.move)
+                score = played.info.get("score")
+                game.scores.append(score.white().score(mate_score=MATE_SCORE) if score is not None else None)
+                for listener in list(self.move_listeners):
+                    listener(game)
+
+                adjudicated = self.adjudication.adjudicate(game.board, game.scores)
+                if adjudicated is not None:
+                    game.result, game.reason = adjudicated
+        finally:
+            del self.running[number]
+        return game
@@ -0,0 +1,66 @@
+from collections import OrderedDict
+from typing import Optional
+import chess
+import chess.polyglot
+
+
+class LegalMoveIndex:
+    """The legal moves of one position, grouped by the square they start from."""
+
+    __slots__ = ("destinations", "promotions", "move_count")
+
+    def __init__(self, board: chess.Board):
+        destinations: dict[chess.Square, list[chess.Square]] = {}
+        promotions: dict[tuple[chess.Square, chess.Square], list[chess.PieceType]] = {}
+        move_count = 0
+
+        for move in board.legal_moves:
+            move_count += 1
+            if move.promotion:
+                pieces = promotions.setdefault((move.from_square, move.to_square), [])
+                pieces.append(move.promotion)
+                if len(pieces) > 1:
+                    continue
+            destinations.setdefault(move.from_square, []).append(move.to_square)
+
+        self.destinations: dict[chess.Square, tuple[chess.Square, ...]] = {
+            square: tuple(sorted(to_squares)) for square, to_squares in destinations.items()
+        }
+        self.promotions: dict[tuple[chess.Square, chess.Square], tuple[chess.PieceType, ...]] = {
+            squares: tuple(sorted(pieces, reverse=True)) for squares, pieces in promotions.items()
+        }
+        self.move_count = move_count
+
+    def moves_for_square(self, square: Optional[chess.Square]) -> tuple[chess.Square, ...]:
+        """Get the sorted destination squares for the piece on a square."""
+        return self.destinations.get(square, ())
+
+    def promotion_pieces(self, from_square: chess.Square, to_square: chess.Square) -> tuple[chess.PieceType, ...]:
+        """Get the pieces a pawn may promote to on a move, strongest first."""
+        return self.promotions.get((from_square, to_square), ())
+
+    def has_legal_moves(self) -> bool:
+        return self.move_count > 0
+
+
+INDEX_CACHE_SIZE = 256
+
+_index_cache: "OrderedDict[int, LegalMoveIndex]" = OrderedDict()
+
+
+def legal_move_index(board: chess.Board, position_key: Optional[int] = None) -> LegalMoveIndex:
+    """Get the legal-move index for a position, reusing recently built ones."""
+
+    if position_key is None:
+        position_key = chess.polyglot.zobrist_hash(board)
+
+    index = _index_cache.get(position_key)
+    if index is not None:
+        _index_cache.move_to_end(position_key)
+        return index
+
+    index = LegalMoveIndex(board)
+    _index_cache[position_key] = index
+    if len(_index_cache) > INDEX_CACHE_SIZE:
+        _index_cache.popitem(last=False)
+    return index
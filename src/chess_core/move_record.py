@@ -0,0 +1,56 @@
+from typing import List, Optional
+import chess
+
+
+def pack_move(move: chess.Move) -> int:
+    """Pack a move into 15 bits: from square, to square and promotion piece."""
+    return move.from_square | move.to_square << 6 | (move.promotion or 0) << 12
+
+
+def unpack_move(packed: int) -> chess.Move:
+    return chess.Move(packed & 0x3F, packed >> 6 & 0x3F, packed >> 12 or None)
+
+
+class MoveRecord:
+    """A single ply of the game tree with its notation precomputed.
+
+    Records form the variation tree: each one knows the move it follows and
+    the moves played from the position it leads to, mainline first. Lines
+    through the tree share their common records instead of copying them.
+    """
+
+    __slots__ = ("move", "san", "ply", "turn", "key", "parent", "variations", "checkpoint")
+
+    def __init__(self, move: chess.Move, san: str, ply: int, turn: chess.Color,
+                 parent: Optional["MoveRecord"] = None):
+        self.move = move
+        self.san = san
+        self.ply = ply
+        self.turn = turn
+        # Zobrist key of the position after the move.
+        self.key = 0
+        self.parent = parent
+        self.variations: List["MoveRecord"] = []
+        # Stack-less board after the move, kept on every CHECKPOINT_INTERVAL-th ply.
+        self.checkpoint: Optional[chess.Board] = None
+
+    @classmethod
+    def from_board(cls, board: chess.Board, move: chess.Move, parent: Optional["MoveRecord"] = None) -> "MoveRecord":
+        """Build a record for a move about to be played on the given board."""
+        return cls(move, board.san(move), board.ply(), board.turn, parent)
+
+    @property
+    def fullmove_number(self) -> int:
+        return self.ply // 2 + 1
+
+    def __str__(self):
+        return self.san
+
+    def __repr__(self):
+        return f"MoveRecord({self.san!r}, ply={self.ply})"
+
+    def uci_move_string(self) -> str:
+        return self.move.uci()
+
+    def san_move_string(self) -> str:
+        return self.san
@@ -0,0 +1,196 @@
+import functools
+import heapq
+import logging
+import os
+import struct
+import tempfile
+from typing import BinaryIO, Callable, Iterable, Iterator, List, Optional
+import chess
+import chess.pgn
+import chess.polyglot
+
+from chess_core.game_io import read_games
+
+
+# Plies from the start of each game that go into a built book.
+BOOK_PLIES = 24
+
+# Distinct (position, move) pairs counted in memory before they are
+# sorted and spilled to a temporary run file.
+RUN_ENTRIES = 200_000
+
+# A run file record: key, Polyglot move, games, points.
+RUN_STRUCT = struct.Struct(">QHII")
+
+# Points for the side that played a move, by game result; unfinished games count as draws.
+RESULT_POINTS = {
+    "1-0": (2, 0),
+    "0-1": (0, 2),
+    "1/2-1/2": (1, 1),
+}
+
+
+class BookMove:
+    __slots__ = ("move", "weight", "learn")
+
+    def __init__(self, move: chess.Move, weight: int, learn: int):
+        self.move = move
+        self.weight = weight
+        self.learn = learn
+
+
+class OpeningBook:
+    """A Polyglot opening book, memory-mapped and searched in place by Zobrist key.
+
+    Opening a book reads nothing; a lookup is a binary search over the
+    16-byte entries of the file, touching only the pages it needs.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.reader = chess.polyglot.MemoryMappedReader(file_path)
+
+    def close(self):
+        self.reader.close()
+
+    def __len__(self) -> int:
+        return len(self.reader)
+
+    def moves(self, board: chess.Board, position_key: Optional[int] = None) -> List[BookMove]:
+        """Legal book moves for a position, heaviest first.
+
+        Pass position_key when the Zobrist key is already known to skip hashing the board.
+        """
+        key = position_key if position_key is not None else chess.polyglot.zobrist_hash(board)
+        moves = []
+        for index in range(self.reader.bisect_key_left(key), len(self.reader)):
+            entry = self.reader[index]
+            if entry.key != key:
+                break
+            if entry.weight == 0:
+                continue
+            move = _from_polyglot_move(board, entry.move)
+            if board.is_legal(move):
+                moves.append(BookMove(move, entry.weight, entry.learn))
+        moves.sort(key=lambda book_move: book_move.weight, reverse=True)
+        return moves
+
+
+def _from_polyglot_move(board: chess.Board, move: chess.Move) -> chess.Move:
+    # Polyglot writes castling as the king taking its own rook.
+    if board.piece_type_at(move.from_square) == chess.KING and board.color_at(move.to_square) == board.turn:
+        to_file = 6 if chess.square_file(move.to_square) > chess.square_file(move.from_square) else 2
+        return chess.Move(move.from_square, chess.square(to_file, chess.square_rank(move.from_square)))
+    return move
+
+
+def polyglot_move(board: chess.Board, move: chess.Move) -> int:
+    """Encode a move played on board the way Polyglot books store it."""
+    to_square = move.to_square
+    if board.is_castling(move):
+        rook_file = 7 if board.is_kingside_castling(move) else 0
+        to_square = chess.square(rook_file, chess.square_rank(move.from_square))
+    promotion = move.promotion - 1 if move.promotion else 0
+    return to_square | move.from_square << 6 | promotion << 12
+
+
+class BookVisitor(chess.pgn.BaseVisitor):
+    """Collects (key, Polyglot move, mover) for the opening plies of a game's mainline."""
+
+    def __init__(self, plies: int = BOOK_PLIES):
+        self.plies = plies
+
+    def begin_game(self):
+        self.result_tag = "*"
+        self.moves: List[tuple[int, int, chess.Color]] = []
+
+    def visit_header(self, tagname: str, tagvalue: str):
+        if tagname == "Result":
+            self.result_tag = tagvalue
+
+    def begin_variation(self):
+        return chess.pgn.SKIP
+
+    def visit_move(self, board: chess.Board, move: chess.Move):
+        if len(self.moves) < self.plies:
+            self.moves.append((chess.polyglot.zobrist_hash(board), polyglot_move(board, move), board.turn))
+
+    def handle_error(self, error: Exception):
+        # Keeps the moves before an illegal one; a game whose FEN can't be set up has none.
+        logging.warning(f"Skipping the rest of a game: {error}")
+
+    def result(self) -> tuple[str, List[tuple[int, int, chess.Color]]]:
+        return self.result_tag, self.moves
+
+
+def _write_run(counts: dict[tuple[int, int], list[int]], directory: str) -> str:
+    with tempfile.NamedTemporaryFile("wb", dir=directory, suffix=".run", delete=False) as run:
+        for (key, move), (games, points) in sorted(counts.items()):
+            run.write(RUN_STRUCT.pack(key, move, games, points))
+    return run.name
+
+
+def _read_run(run: BinaryIO) -> Iterator[tuple[int, int, int, int]]:
+    while record := run.read(RUN_STRUCT.size):
+        yield RUN_STRUCT.unpack(record)
+
+
+def build_book(pgn_path: str, book_path: str, plies: int = BOOK_PLIES, min_games: int = 1,
+               run_entries: int = RUN_ENTRIES, progress: Optional[Callable[[int, int], None]] = None) -> int:
+    """Write a Polyglot book of the first plies of every game in a PGN file; returns its entry count.
+
+    A move's weight is 2 points per game won and 1 per game drawn by the
+    side that played it. Counts are kept in memory only up to run_entries
+    distinct moves; fuller counts are spilled to sorted run files that are
+    merged at the end, so memory stays bounded however large the input.
+    """
+    directory = os.path.dirname(os.path.abspath(book_path))
+    with tempfile.TemporaryDirectory(dir=directory) as run_directory:
+        runs = []
+        counts: dict[tuple[int, int], list[int]] = {}
+        for result_tag, moves in read_games(pgn_path, Visitor=functools.partial(BookVisitor, plies), progress=progress):
+            white_points, black_points = RESULT_POINTS.get(result_tag, (1, 1))
+            for key, move, turn in moves:
+                count = counts.get((key, move))
+                if count is None:
+                    count = counts[(key, move)] = [0, 0]
+                count[0] += 1
+                count[1] += white_points if turn == chess.WHITE else black_points
+            if len(counts) >= run_entries:
+                runs.append(_write_run(counts, run_directory))
+                counts.clear()
+        runs.append(_write_run(counts, run_directory))
+        counts.clear()
+
+        files = [open(run, "rb", buffering=1 << 16) for run in runs]
+        try:
+            merged = heapq.merge(*(_read_run(f) for f in files))
+            with open(book_path, "wb") as book:
+                return _write_book(book, merged, min_games)
+        finally:
+            for f in files:
+                f.close()
+
+
+def _write_book(book: BinaryIO, records: Iterable[tuple[int, int, int, int]], min_games: int) -> int:
+    entries = 0
+
+    def write(key: int, move: int, games: int, points: int):
+        nonlocal entries
+        if games >= min_games and points > 0:
+            book.write(chess.polyglot.ENTRY_STRUCT.pack(key, move, min(points, 0xFFFF), 0))
+            entries += 1
+
+    current = None
+    for key, move, games, points in records:
+        if current is not None and current[0] == key and current[1] == move:
+            current[2] += games
+            current[3] += points
+            continue
+        if current is not None:
+            write(*current)
+        current = [key, move, games, points]
+    if current is not None:
+        write(*current)
+    logging.info(f"Wrote {entries} book entries to {book.name}")
+    return entries
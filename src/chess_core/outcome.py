@@ -0,0 +1,47 @@
+from collections import OrderedDict
+from typing import Optional
+import chess
+
+from chess_core.move_index import legal_move_index
+
+
+OUTCOME_CACHE_SIZE = 256
+
+_outcome_cache: "OrderedDict[tuple[int, bool, bool], Optional[chess.Outcome]]" = OrderedDict()
+
+
+def position_outcome(board: chess.Board, position_key: int, repetitions: int) -> Optional[chess.Outcome]:
+    """Get the outcome of a position, or None if the game is still going.
+
+    Like board.outcome(), but the repetition count is supplied by the caller
+    instead of replaying the move stack, and results are memoized. A
+    stalemate with insufficient material is reported as stalemate, as the
+    game-over label always has.
+    """
+
+    cache_key = (position_key, board.halfmove_clock >= 150, repetitions >= 5)
+    if cache_key in _outcome_cache:
+        _outcome_cache.move_to_end(cache_key)
+        return _outcome_cache[cache_key]
+
+    outcome = _evaluate_outcome(board, position_key, repetitions)
+    _outcome_cache[cache_key] = outcome
+    if len(_outcome_cache) > OUTCOME_CACHE_SIZE:
+        _outcome_cache.popitem(last=False)
+    return outcome
+
+
+def _evaluate_outcome(board: chess.Board, position_key: int, repetitions: int) -> Optional[chess.Outcome]:
+    has_legal_moves = legal_move_index(board, position_key).has_legal_moves()
+
+    if not has_legal_moves and board.is_check():
+        return chess.Outcome(chess.Termination.CHECKMATE, not board.turn)
+    if not has_legal_moves:
+        return chess.Outcome(chess.Termination.STALEMATE, None)
+    if board.is_insufficient_material():
+        return chess.Outcome(chess.Termination.INSUFFICIENT_MATERIAL, None)
+    if board.halfmove_clock >= 150:
+        return chess.Outcome(chess.Termination.SEVENTYFIVE_MOVES, None)
+    if repetitions >= 5:
+        return chess.Outcome(chess.Termination.FIVEFOLD_REPETITION, None)
+    return None
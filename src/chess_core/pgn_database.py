@@ -0,0 +1,115 @@
+import io
+import os
+import threading
+from array import array
+from typing import Callable, Iterator, Optional
+import chess.pgn
+
+from chess_core.instrumentation import timed
+from chess_core.pgn_index import PgnIndex
+from chess_core.pgn_scan import scan_pgn
+
+
+# Games scanned between progress reports while indexing a file.
+PROGRESS_GAMES = 1000
+
+
+def _report_progress(games: Iterator[tuple[int, dict[str, str]]], file_size: int,
+                     progress: Callable[[int, int], None]) -> Iterator[tuple[int, dict[str, str]]]:
+    for count, game in enumerate(games, 1):
+        if count % PROGRESS_GAMES == 0:
+            progress(game[0], file_size)
+        yield game
+
+
+class PgnDatabase:
+    """Random access to the games of a PGN file through a byte-offset index.
+
+    The index lives in a SQLite file next to the PGN (see chess_core.pgn_index),
+    so reopening a known file only reads the offsets back.
+    """
+
+    def __init__(self, file_path: str, index_path: Optional[str] = None):
+        self.file_path = file_path
+        self.index = PgnIndex(file_path, index_path)
+        self.offsets = array("q")
+
+    def scan(self, progress: Optional[Callable[[int, int], None]] = None) -> "PgnDatabase":
+        """Bring the index up to date with the file.
+
+        progress(bytes scanned, file size) is called every PROGRESS_GAMES
+        games; an exception raised from it abandons the scan and leaves the
+        index as it was.
+        """
+        with open(self.file_path, "rb") as pgn_file:
+            file_size = os.fstat(pgn_file.fileno()).st_size
+            if progress is None:
+                self.index.sync(lambda offset: scan_pgn(pgn_file, offset))
+            else:
+                self.index.sync(lambda offset: _report_progress(scan_pgn(pgn_file, offset), file_size, progress))
+        self.offsets = self.index.offsets()
+        return self
+
+    def is_stale(self) -> bool:
+        stat = os.stat(self.file_path)
+        return (stat.st_size, stat.st_mtime) != (self.index.get_meta("file_size"), self.index.get_meta("file_mtime"))
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def game_headers(self, index: int) -> dict[str, str]:
+        """Get the index headers of a game without reading it."""
+        return self.index.headers(index)
+
+    def find_games(self, limit: int = -1, start: int = 0, **filters: str) -> list[tuple[int, dict[str, str]]]:
+        """Get (game index, headers) of games matching header filters, see PgnIndex.find_games."""
+        return self.index.find_games(limit, start, **filters)
+
+    def count_games(self, **filters: str) -> int:
+        return self.index.count_games(**filters)
+
+    @timed
+    def read_game(self, index: int) -> Optional[chess.pgn.Game]:
+        """Parse a single game, seeking straight to it."""
+        with open(self.file_path, "rb") as pgn_file:
+            pgn_file.seek(self.offsets[index])
+            return chess.pgn.read_game(io.TextIOWrapper(pgn_file, encoding="utf-8-sig", errors="replace"))
+
+    def game_text(self, index: int) -> str:
+        """The text of a game as it appears in the file, up to the next game."""
+        with open(self.file_path, "rb") as pgn_file:
+            pgn_file.seek(self.offsets[index])
+            data = pgn_file.read(self.offsets[index + 1] - self.offsets[index] if index + 1 < len(self.offsets) else -1)
+        return data.decode("utf-8-sig", errors="replace")
+
+    def record_summary(self, index: int, ply_count: int, final_key: int) -> None:
+        """Remember the length and final position of a game once it has been replayed."""
+        with self.index.lock:
+            if self.index.summary(index)[0] is None:
+                self.index.record_summaries([(index, ply_count, final_key)])
+
+
+_databases: dict[str, PgnDatabase] = {}
+# Held while a database is looked up or scanned, so two workers opening the
+# same file don't both index it.
+_databases_lock = threading.Lock()
+
+
+@timed
+def open_pgn_database(file_path: str, progress: Optional[Callable[[int, int], None]] = None) -> PgnDatabase:
+    """Get the database for a PGN file, rescanning only what changed on disk; see PgnDatabase.scan for progress."""
+
+    key = os.path.abspath(file_path)
+    with _databases_lock:
+        database = _databases.get(key)
+        if database is None:
+            database = PgnDatabase(file_path)
+            try:
+                database.scan(progress)
+            except BaseException:
+                database.index.close()
+                raise
+            _databases[key] = database
+        elif database.is_stale():
+            database.scan(progress)
+        return database
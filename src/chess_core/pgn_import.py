@@ -0,0 +1,58 @@
+import multiprocessing
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Callable, Iterator, Optional
+
+from chess_core.pgn_database import PgnDatabase
+from chess_core.position_index import ReplayedGame, replay_games
+
+
+# Games handed to a worker process at a time.
+CHUNK_SIZE = 256
+
+# Below this many games starting the process pool costs more than it saves.
+PARALLEL_THRESHOLD = 4 * CHUNK_SIZE
+
+
+def _replay_chunk(file_path: str, offsets: array) -> list[ReplayedGame]:
+    return list(replay_games(file_path, offsets))
+
+
+def import_games(database: PgnDatabase, first: int = 0, workers: Optional[int] = None,
+                 progress: Optional[Callable[[int, int], None]] = None) -> Iterator[tuple[int, ReplayedGame]]:
+    """Replay the games of a database from game first onwards, yielding (game id, game) in file order.
+
+    The file is split at the game boundaries found by the index and the
+    chunks are parsed and replayed in a pool of worker processes, one per
+    core unless workers says otherwise. progress(done, total) is called as
+    chunks come back. Closing the generator early cancels pending chunks.
+    """
+
+    offsets = database.offsets[first:]
+    total = len(database)
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1 or len(offsets) < PARALLEL_THRESHOLD:
+        for game_id, game in enumerate(replay_games(database.file_path, offsets), first):
+            yield game_id, game
+            if progress and (game_id + 1) % CHUNK_SIZE == 0:
+                progress(game_id + 1, total)
+        if progress:
+            progress(total, total)
+        return
+
+    chunks = [offsets[start:start + CHUNK_SIZE] for start in range(0, len(offsets), CHUNK_SIZE)]
+    # Spawned rather than forked workers: the UI runs this from a thread.
+    executor = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+    try:
+        game_id = first
+        for games in executor.map(_replay_chunk, repeat(database.file_path), chunks):
+            for game in games:
+                yield game_id, game
+                game_id += 1
+            if progress:
+                progress(game_id, total)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,248 @@
+import functools
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from array import array
+from typing import Iterable, Optional
+
+from chess_core.pgn_scan import HEADER_COLUMNS
+
+
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value
+);
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    offset INTEGER NOT NULL,
+    event TEXT, site TEXT, date TEXT, round TEXT,
+    white TEXT, black TEXT, result TEXT, eco TEXT,
+    ply_count INTEGER,
+    final_key INTEGER
+);
+CREATE INDEX IF NOT EXISTS games_white ON games (white);
+CREATE INDEX IF NOT EXISTS games_black ON games (black);
+CREATE INDEX IF NOT EXISTS games_date ON games (date);
+CREATE INDEX IF NOT EXISTS games_result ON games (result);
+CREATE INDEX IF NOT EXISTS games_eco ON games (eco);
+CREATE TABLE IF NOT EXISTS positions (
+    key INTEGER NOT NULL,
+    game_id INTEGER NOT NULL,
+    ply INTEGER NOT NULL,
+    next_move INTEGER,
+    PRIMARY KEY (key, game_id, ply)
+) WITHOUT ROWID;
+"""
+
+# Bytes before the end of the previous scan that must be unchanged for a
+# grown file to be treated as appended to.
+FINGERPRINT_SIZE = 4096
+
+INSERT_BATCH_SIZE = 10000
+
+
+def index_path_for(file_path: str) -> str:
+    return f"{file_path}.index.sqlite"
+
+
+def to_sql_key(key: int) -> int:
+    """Map an unsigned 64-bit Zobrist key onto SQLite's signed integers."""
+    return key - (1 << 64) if key >= 1 << 63 else key
+
+
+def from_sql_key(key: int) -> int:
+    return key + (1 << 64) if key < 0 else key
+
+
+def _locked(method):
+    """Run a PgnIndex method holding the index's lock."""
+    @functools.wraps(method)
+    def locked(self, *args, **kwargs):
+        with self.lock:
+            return method(self, *args, **kwargs)
+    return locked
+
+
+def _fingerprint(file_path: str, end: int) -> str:
+    with open(file_path, "rb") as f:
+        f.seek(max(0, end - FINGERPRINT_SIZE))
+        return hashlib.sha1(f.read(min(end, FINGERPRINT_SIZE))).hexdigest()
+
+
+class PgnIndex:
+    """A persistent SQLite index of the games in a PGN file, stored next to it.
+
+    The UI and file workers share one connection, so every use of it holds
+    lock; code running its own queries on connection must take it too.
+    """
+
+    def __init__(self, file_path: str, index_path: Optional[str] = None, read_only: bool = False):
+        """Open or create the index; read_only opens an existing one as it is, raising sqlite3.Error if there is none."""
+        self.file_path = file_path
+        self.index_path = index_path or index_path_for(file_path)
+        self.lock = threading.RLock()
+        if read_only:
+            self.connection = sqlite3.connect(f"file:{self.index_path}?mode=ro", uri=True, check_same_thread=False)
+            return
+        try:
+            self.connection = sqlite3.connect(self.index_path, check_same_thread=False)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self._create_schema()
+        except sqlite3.Error as error:
+            logging.warning(f"Cannot write PGN index {self.index_path} ({error}), keeping it in memory")
+            self.index_path = ":memory:"
+            self.connection = sqlite3.connect(self.index_path, check_same_thread=False)
+            self._create_schema()
+
+    def _create_schema(self):
+        version = self.get_meta("version") if self._has_table("meta") else None
+        if version is not None and version != SCHEMA_VERSION:
+            self.connection.executescript("DROP TABLE IF EXISTS games; DROP TABLE IF EXISTS positions; DELETE FROM meta;")
+        self.connection.executescript(SCHEMA)
+
+    def _has_table(self, name: str) -> bool:
+        return self.connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)).fetchone() is not None
+
+    @_locked
+    def close(self):
+        self.connection.close()
+
+    @_locked
+    def get_meta(self, key: str):
+        row = self.connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    @_locked
+    def _set_meta(self, **values):
+        self.connection.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", values.items())
+
+    @_locked
+    def sync(self, scan) -> None:
+        """Bring the index up to date with the file.
+
+        scan(offset) must yield (byte offset, headers) for every game starting
+        at or after offset. An unchanged file is not read at all; a file that
+        has only grown is scanned from its last indexed game onwards.
+        """
+
+        stat = os.stat(self.file_path)
+        if self.is_current(stat):
+            return
+
+        resume_offset = self._resume_offset(stat.st_size)
+        with self.connection:
+            if resume_offset is None:
+                logging.info(f"Indexing {self.file_path}")
+                self.connection.execute("DELETE FROM games")
+                self.connection.execute("DELETE FROM positions")
+                resume_offset, next_id = 0, 0
+            else:
+                logging.info(f"Extending index of {self.file_path} from byte {resume_offset}")
+                self.connection.execute("DELETE FROM games WHERE offset >= ?", (resume_offset,))
+                next_id = self.connection.execute("SELECT COUNT(*) FROM games").fetchone()[0]
+                self.connection.execute("DELETE FROM positions WHERE game_id >= ?", (next_id,))
+            self._set_meta(positions_indexed=min(self.get_meta("positions_indexed") or 0, next_id))
+
+            self._insert_games(scan(resume_offset), next_id)
+            self._set_meta(version=SCHEMA_VERSION, file_size=stat.st_size, file_mtime=stat.st_mtime,
+                           fingerprint=_fingerprint(self.file_path, stat.st_size))
+
+    @_locked
+    def is_current(self, stat: Optional[os.stat_result] = None) -> bool:
+        """Whether the index was built by this version from the file as it is now."""
+        stat = stat or os.stat(self.file_path)
+        return self._has_table("meta") and self.get_meta("version") == SCHEMA_VERSION \
+            and self.get_meta("file_size") == stat.st_size and self.get_meta("file_mtime") == stat.st_mtime
+
+    def _resume_offset(self, file_size: int) -> Optional[int]:
+        """Get where to resume scanning a grown file, or None if it needs a full rescan."""
+
+        indexed_size = self.get_meta("file_size")
+        if self.get_meta("version") != SCHEMA_VERSION or indexed_size is None or file_size < indexed_size:
+            return None
+        if _fingerprint(self.file_path, indexed_size) != self.get_meta("fingerprint"):
+            return None
+
+        # The last game may have been extended, so it is scanned again.
+        row = self.connection.execute("SELECT MAX(offset) FROM games").fetchone()
+        return row[0] if row[0] is not None else 0
+
+    def _insert_games(self, games: Iterable[tuple[int, dict[str, str]]], next_id: int) -> None:
+        columns = list(HEADER_COLUMNS.values())
+        statement = (f"INSERT INTO games (id, offset, {', '.join(columns)}) "
+                     f"VALUES ({', '.join('?' * (len(columns) + 2))})")
+        batch = []
+        for game_id, (offset, headers) in enumerate(games, next_id):
+            batch.append((game_id, offset, *(headers.get(tag, "?") for tag in HEADER_COLUMNS)))
+            if len(batch) >= INSERT_BATCH_SIZE:
+                self.connection.executemany(statement, batch)
+                batch.clear()
+        self.connection.executemany(statement, batch)
+
+    @_locked
+    def offsets(self) -> array:
+        return array("q", (row[0] for row in self.connection.execute("SELECT offset FROM games ORDER BY id")))
+
+    @_locked
+    def headers(self, game_id: int) -> dict[str, str]:
+        row = self.connection.execute(
+            f"SELECT {', '.join(HEADER_COLUMNS.values())} FROM games WHERE id = ?", (game_id,)).fetchone()
+        return dict(zip(HEADER_COLUMNS, row)) if row else {}
+
+    @_locked
+    def find_games(self, limit: int = -1, start: int = 0, **filters: str) -> list[tuple[int, dict[str, str]]]:
+        """Get (game id, headers) of matching games in file order.
+
+        Filters are white, black, player (either colour), date, result and
+        eco. Values are GLOB patterns, so "B2*" matches every B2x opening and a
+        value without wildcards matches exactly.
+        """
+
+        where, parameters = self._where(filters)
+        rows = self.connection.execute(
+            f"SELECT id, {', '.join(HEADER_COLUMNS.values())} FROM games {where} "
+            f"ORDER BY id LIMIT ? OFFSET ?", (*parameters, limit, start))
+        return [(row[0], dict(zip(HEADER_COLUMNS, row[1:]))) for row in rows]
+
+    @_locked
+    def count_games(self, **filters: str) -> int:
+        where, parameters = self._where(filters)
+        return self.connection.execute(f"SELECT COUNT(*) FROM games {where}", parameters).fetchone()[0]
+
+    @staticmethod
+    def _where(filters: dict[str, str]) -> tuple[str, list[str]]:
+        clauses, parameters = [], []
+        for name, pattern in filters.items():
+            if not pattern:
+                continue
+            if name == "player":
+                clauses.append("(white GLOB ? OR black GLOB ?)")
+                parameters += [pattern, pattern]
+            elif name in HEADER_COLUMNS.values():
+                clauses.append(f"{name} GLOB ?")
+                parameters.append(pattern)
+            else:
+                raise ValueError(f"Unknown game filter: {name}")
+        return ("WHERE " + " AND ".join(clauses) if clauses else ""), parameters
+
+    @_locked
+    def summary(self, game_id: int) -> tuple[Optional[int], Optional[int]]:
+        """Get the ply count and final position key of a game, if known."""
+        row = self.connection.execute("SELECT ply_count, final_key FROM games WHERE id = ?", (game_id,)).fetchone()
+        if row is None or row[0] is None:
+            return None, None
+        return row[0], from_sql_key(row[1])
+
+    @_locked
+    def record_summaries(self, summaries: Iterable[tuple[int, int, int]]) -> None:
+        """Store (game id, ply count, final position key) for replayed games."""
+        with self.connection:
+            self.connection.executemany(
+                "UPDATE games SET ply_count = ?, final_key = ? WHERE id = ?",
+                ((ply_count, to_sql_key(final_key), game_id) for game_id, ply_count, final_key in summaries))
@@ -0,0 +1,256 @@
+import re
+from fnmatch import fnmatchcase
+from typing import TYPE_CHECKING, Iterator, List, Optional, TextIO
+
+if TYPE_CHECKING:
+    import chess
+
+
+# Columns of the games table holding index headers, by PGN tag name.
+HEADER_COLUMNS = {
+    "Event": "event",
+    "Site": "site",
+    "Date": "date",
+    "Round": "round",
+    "White": "white",
+    "Black": "black",
+    "Result": "result",
+    "ECO": "eco",
+}
+
+# Headers stored in the index for every game; anything else is read with the game.
+INDEX_TAGS = tuple(HEADER_COLUMNS)
+
+TAG_PAIR_REGEX = re.compile(rb'^\[\s*([A-Za-z0-9_+#=:-]+)\s*"((?:[^"\\]|\\.)*)"\s*\]')
+
+
+def scan_pgn(pgn_file, offset: int = 0) -> Iterator[tuple[int, dict[str, str]]]:
+    """Yield the byte offset and index headers of every game in a binary PGN stream.
+
+    Only header lines are decoded; movetext is skipped line by line without
+    being parsed, so scanning costs little more than reading the file.
+    """
+
+    if pgn_file.seekable():
+        pgn_file.seek(offset)
+    game_offset: Optional[int] = None
+    headers: dict[str, str] = {}
+    in_headers = False
+    in_comment = False
+
+    for line in pgn_file:
+        line_offset = offset
+        offset += len(line)
+        if line_offset == 0 and line.startswith(b"\xef\xbb\xbf"):
+            line = line[3:]
+            line_offset = 3
+
+        if in_comment:
+            if b"}" in line:
+                in_comment = line.rfind(b"{") > line.rfind(b"}")
+            continue
+
+        if line.startswith(b"["):
+            if not in_headers:
+                if game_offset is not None:
+                    yield game_offset, headers
+                game_offset, headers, in_headers = line_offset, {}, True
+            match = TAG_PAIR_REGEX.match(line)
+            if match and match.group(1).decode() in INDEX_TAGS:
+                headers[match.group(1).decode()] = match.group(2).decode("utf-8", "replace").replace('\\"', '"')
+            continue
+
+        stripped = line.strip()
+        if not stripped or stripped.startswith(b"%"):
+            continue
+
+        in_headers = False
+        if game_offset is None:
+            # Movetext without a header section still starts a game.
+            game_offset, headers = line_offset, {}
+        if b"{" in line:
+            in_comment = line.rfind(b"{") > line.rfind(b"}")
+
+    if game_offset is not None:
+        yield game_offset, headers
+
+
+def headers_match(headers: dict[str, str], filters: dict[str, str]) -> bool:
+    """Whether PGN headers pass the filters of PgnIndex.find_games, for games that are not in an index."""
+    tags = {column: tag for tag, column in HEADER_COLUMNS.items()}
+    for name, pattern in filters.items():
+        if not pattern:
+            continue
+        if name != "player" and name not in tags:
+            raise ValueError(f"Unknown game filter: {name}")
+        columns = ("white", "black") if name == "player" else (name,)
+        if not any(fnmatchcase(headers.get(tags[column], ""), pattern) for column in columns):
+            return False
+    return True
+
+
+# The tokenizer of chess.pgn. Its rules are followed below so that checking
+# a file finds the same errors as reading it with chess.pgn.read_game, whose
+# module also imports chess.engine and asyncio, half of a command's startup.
+TAG_REGEX = re.compile(r"^\[([A-Za-z0-9][A-Za-z0-9_+#=:-]*)\s+\"([^\r]*)\"\]\s*$")
+
+MOVETEXT_REGEX = re.compile(r"""
+    (
+        [NBKRQ]?[a-h]?[1-8]?[\-x]?[a-h][1-8](?:=?[nbrqkNBRQK])?
+        |[PNBRQK]?@[a-h][1-8]
+        |--
+        |Z0
+        |0000
+        |@@@@
+        |O-O(?:-O)?
+        |0-0(?:-0)?
+    )
+    |(\{.*)
+    |(;.*)
+    |(\$[0-9]+)
+    |(\()
+    |(\))
+    |(\*|1-0|0-1|1/2-1/2)
+    |([\?!]{1,2})
+    """, re.DOTALL | re.VERBOSE)
+
+SKIP_MOVETEXT_REGEX = re.compile(r";|\{|\}")
+
+RESULTS = ("1-0", "0-1", "1/2-1/2", "*")
+
+# Variant headers played on a standard board, as chess.pgn.Headers reads them.
+CHESS960_VARIANTS = ("chess960", "chess 960", "fischerandom", "fischerrandom", "fischer random")
+WILD_VARIANTS = ("wild/0", "wild/1", "wild/2", "wild/3", "wild/4", "wild/5", "wild/6", "wild/7", "wild/8", "wild/8a")
+
+
+def check_games(handle: TextIO) -> Iterator[List[ValueError]]:
+    """Yield, for every game of a text stream, the errors chess.pgn.read_game would record in Game.errors.
+
+    Moves are only checked for legality; no game is built.
+    """
+    while (errors := _check_game(handle)) is not None:
+        yield errors
+
+
+def _starting_board(headers: dict[str, str], errors: List[ValueError]) -> Optional["chess.Board"]:
+    # Imported here so that scanning headers, as count does, needs no python-chess.
+    import chess
+    variant = headers.get("Variant", "")
+    chess960 = variant.lower() in CHESS960_VARIANTS
+    board_class = chess.Board
+    if variant and not chess960 and variant.lower() not in WILD_VARIANTS:
+        from chess.variant import find_variant
+        try:
+            board_class = find_variant(variant)
+        except ValueError as error:
+            errors.append(error)
+    try:
+        board = board_class(headers.get("FEN", board_class.starting_fen), chess960=chess960)
+    except ValueError as error:
+        errors.append(error)
+        return None
+    board.chess960 = board.chess960 or board.has_chess960_castling_rights()
+    return board
+
+
+def _check_game(handle: TextIO) -> Optional[List[ValueError]]:
+    errors: List[ValueError] = []
+    headers: dict[str, str] = {}
+    found_game = False
+
+    line = handle.readline().lstrip("\ufeff")
+    while line.isspace() or line.startswith("%") or line.startswith(";"):
+        line = handle.readline()
+    empty_lines = 0
+    while line:
+        if line.startswith("%") or line.startswith(";"):
+            line = handle.readline()
+            continue
+        if empty_lines < 1 and line.isspace():
+            empty_lines += 1
+            line = handle.readline()
+            continue
+        found_game = True
+        if not line.startswith("["):
+            break
+        empty_lines = 0
+        match = TAG_REGEX.match(line)
+        if match:
+            headers[match.group(1)] = match.group(2)
+        line = handle.readline()
+    if not found_game:
+        return None
+
+    board = _starting_board(headers, errors)
+    if board is None:
+        _skip_movetext(handle, line)
+        return errors
+
+    boards = [board]
+    # Open variations being skipped after an error, counting the one it was in.
+    skip_depth = 0
+    fresh_line = True
+    while line:
+        if fresh_line:
+            if line.startswith("%") or line.startswith(";"):
+                line = handle.readline()
+                continue
+            if line.isspace():
+                break
+        fresh_line = True
+        for match in MOVETEXT_REGEX.finditer(line):
+            token = match.group(0)
+            if token.startswith("{"):
+                line = token
+                while line and "}" not in line:
+                    line = handle.readline()
+                line = line[line.find("}") + 1:]
+                fresh_line = False
+                break
+            elif token == "(":
+                if skip_depth:
+                    skip_depth += 1
+                elif boards[-1].move_stack:
+                    board = boards[-1].copy()
+                    board.pop()
+                    boards.append(board)
+            elif token == ")":
+                if skip_depth:
+                    skip_depth -= 1
+                elif len(boards) > 1:
+                    boards.pop()
+            elif skip_depth:
+                continue
+            elif token.startswith(";"):
+                break
+            elif token[0] in "$?!" or (token in RESULTS and len(boards) == 1):
+                continue
+            else:
+                try:
+                    boards[-1].push(boards[-1].parse_san(token))
+                except ValueError as error:
+                    errors.append(error)
+                    skip_depth = 1
+        if fresh_line:
+            line = handle.readline()
+    return errors
+
+
+def _skip_movetext(handle: TextIO, line: str):
+    in_comment = False
+    while line:
+        if not in_comment:
+            if line.isspace():
+                break
+            if line.startswith("%"):
+                line = handle.readline()
+                continue
+        for match in SKIP_MOVETEXT_REGEX.finditer(line):
+            token = match.group(0)
+            if token == "{":
+                in_comment = True
+            elif not in_comment and token == ";":
+                break
+            elif token == "}":
+                in_comment = False
+        line = handle.readline()
@@ -0,0 +1,203 @@
+import contextlib
+import io
+import logging
+import sqlite3
+from array import array
+from typing import Callable, Iterable, Iterator, Optional
+import chess
+import chess.pgn
+import chess.polyglot
+
+from chess_core.move_record import pack_move, unpack_move
+from chess_core.pgn_database import PgnDatabase
+from chess_core.pgn_index import to_sql_key
+
+
+# Games replayed between commits while building, so queries see progress.
+BUILD_BATCH_SIZE = 500
+
+
+class ReplayedGame:
+    """The mainline of a game reduced to its headers, packed moves and the position keys along it."""
+
+    __slots__ = ("headers", "moves", "keys", "errors")
+
+    def __init__(self):
+        self.headers: dict[str, str] = {}
+        self.moves = array("H")
+        self.keys = array("Q")
+        self.errors: list[str] = []
+
+    def mainline_moves(self) -> list[chess.Move]:
+        return [unpack_move(packed) for packed in self.moves]
+
+    @property
+    def ply_count(self) -> int:
+        return len(self.moves)
+
+    @property
+    def final_key(self) -> Optional[int]:
+        """Key of the last position, or None when not even the starting position could be set up."""
+        return self.keys[-1] if self.keys else None
+
+
+class ReplayVisitor(chess.pgn.BaseVisitor[ReplayedGame]):
+    """Replays the mainline of a game, skipping variations, comments and NAGs."""
+
+    def begin_game(self):
+        self.game = ReplayedGame()
+
+    def visit_header(self, tagname: str, tagvalue: str):
+        self.game.headers[tagname] = tagvalue
+
+    def begin_variation(self):
+        return chess.pgn.SKIP
+
+    def visit_board(self, board: chess.Board):
+        # Called with the starting position and after every mainline move,
+        # but also once more at the end of a game cut short by an illegal
+        # move; a key is only kept for a position a move was played to.
+        if len(self.game.keys) <= len(self.game.moves):
+            self.game.keys.append(chess.polyglot.zobrist_hash(board))
+
+    def visit_move(self, board: chess.Board, move: chess.Move):
+        self.game.moves.append(pack_move(move))
+
+    def handle_error(self, error: Exception):
+        self.game.errors.append(str(error))
+
+    def result(self) -> ReplayedGame:
+        return self.game
+
+
+def replay_games(file_path: str, offsets: Iterable[int]) -> Iterator[ReplayedGame]:
+    """Replay the games starting at the given byte offsets of a PGN file."""
+    with open(file_path, "rb") as pgn_file:
+        for offset in offsets:
+            pgn_file.seek(offset)
+            text = io.TextIOWrapper(pgn_file, encoding="utf-8-sig", errors="replace")
+            game = chess.pgn.read_game(text, Visitor=ReplayVisitor)
+            text.detach()
+            yield game if game is not None else ReplayedGame()
+
+
+def position_rows(game_id: int, game: ReplayedGame) -> Iterator[tuple[int, int, int, Optional[int]]]:
+    """Rows of the positions table for a replayed game."""
+    for ply, key in enumerate(game.keys):
+        next_move = game.moves[ply] if ply < len(game.moves) else None
+        yield to_sql_key(key), game_id, ply, next_move
+
+
+class PositionIndex:
+    """Which games of a PGN database reached a position, and what was played next.
+
+    Positions are stored by Zobrist key in the database's SQLite sidecar, so a
+    lookup is a primary-key range scan however many games are indexed.
+    """
+
+    def __init__(self, database: PgnDatabase):
+        self.database = database
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        return self.database.index.connection
+
+    def indexed_games(self) -> int:
+        return self.database.index.get_meta("positions_indexed") or 0
+
+    def is_built(self) -> bool:
+        return len(self.database) > 0 and self.indexed_games() >= len(self.database)
+
+    def build(self, progress: Optional[Callable[[int, int], None]] = None,
+              replay: Callable[[PgnDatabase, int], Iterable[tuple[int, ReplayedGame]]] = None) -> None:
+        """Replay every game not yet indexed and record its positions.
+
+        progress(done, total) is called after each batch. Building resumes
+        where a previous, interrupted build stopped. replay(database, first)
+        yields (game id, replayed game) from game first onwards and defaults
+        to replaying in this process; chess_core.pgn_import.import_games
+        spreads the work over all cores.
+        """
+
+        replay = replay or (lambda database, first: enumerate(
+            replay_games(database.file_path, database.offsets[first:]), first))
+
+        # A separate connection keeps the UI's queries usable while building;
+        # an in-memory index can only be reached through the shared one.
+        index = self.database.index
+        connection = self.connection if index.index_path == ":memory:" else sqlite3.connect(index.index_path)
+        lock = index.lock if connection is self.connection else contextlib.nullcontext()
+        first, total = self.indexed_games(), len(self.database)
+        logging.info(f"Indexing positions of {total - first} games in {self.database.file_path}")
+
+        rows, summaries, done = [], [], first
+        for game_id, game in replay(self.database, first):
+            if game.errors:
+                logging.warning(f"Game {game_id + 1} of {self.database.file_path}: {game.errors[0]}")
+            rows.extend(position_rows(game_id, game))
+            final_key = game.final_key
+            summaries.append((game.ply_count, to_sql_key(final_key) if final_key is not None else None, game_id))
+            done = game_id + 1
+            if len(summaries) >= BUILD_BATCH_SIZE:
+                with lock:
+                    self._write_batch(connection, rows, summaries, done)
+                rows, summaries = [], []
+                if progress:
+                    progress(done, total)
+        with lock:
+            self._write_batch(connection, rows, summaries, done)
+        if progress:
+            progress(done, total)
+
+        if connection is not self.connection:
+            connection.close()
+
+    @staticmethod
+    def _write_batch(connection: sqlite3.Connection, rows: list, summaries: list, done: int) -> None:
+        with connection:
+            connection.executemany("INSERT OR REPLACE INTO positions (key, game_id, ply, next_move) VALUES (?, ?, ?, ?)", rows)
+            connection.executemany("UPDATE games SET ply_count = ?, final_key = ? WHERE id = ?", summaries)
+            connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('positions_indexed', ?)", (done,))
+
+    def find_games(self, key: int, limit: int = 100) -> list[tuple[int, int, Optional[chess.Move], dict[str, str]]]:
+        """Get (game id, ply, next move, headers) for games that reached a position, once each at the first ply they did."""
+        with self.database.index.lock:
+            # SQLite takes the bare columns from the row with the MIN(ply).
+            rows = self.connection.execute(
+                "SELECT positions.game_id, MIN(positions.ply), positions.next_move, games.white, games.black, "
+                "games.date, games.result FROM positions JOIN games ON games.id = positions.game_id "
+                "WHERE positions.key = ? GROUP BY positions.game_id ORDER BY positions.game_id LIMIT ?",
+                (to_sql_key(key), limit)).fetchall()
+        return [(game_id, ply, unpack_move(next_move) if next_move is not None else None,
+                 {"White": white, "Black": black, "Date": date, "Result": result})
+                for game_id, ply, next_move, white, black, date, result in rows]
+
+    def count_games(self, key: int) -> int:
+        """Count the games that reached a position, including those that ended there."""
+        with self.database.index.lock:
+            return self.connection.execute(
+                "SELECT COUNT(DISTINCT game_id) FROM positions WHERE key = ?", (to_sql_key(key),)).fetchone()[0]
+
+    def next_move_stats(self, key: int) -> list["NextMoveStats"]:
+        """Get how often each move was played from a position and how those games ended, most played first."""
+        with self.database.index.lock:
+            rows = self.connection.execute(
+                "SELECT positions.next_move, COUNT(*), "
+                "SUM(games.result = '1-0'), SUM(games.result = '1/2-1/2'), SUM(games.result = '0-1') "
+                "FROM positions JOIN games ON games.id = positions.game_id "
+                "WHERE positions.key = ? AND positions.next_move IS NOT NULL "
+                "GROUP BY positions.next_move ORDER BY COUNT(*) DESC", (to_sql_key(key),)).fetchall()
+        return [NextMoveStats(unpack_move(next_move), games, white_wins, draws, black_wins)
+                for next_move, games, white_wins, draws, black_wins in rows]
+
+
+class NextMoveStats:
+    __slots__ = ("move", "games", "white_wins", "draws", "black_wins")
+
+    def __init__(self, move: chess.Move, games: int, white_wins: int, draws: int, black_wins: int):
+        self.move = move
+        self.games = games
+        self.white_wins = white_wins
+        self.draws = draws
+        self.black_wins = black_wins
+
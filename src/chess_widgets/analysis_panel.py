@@ -0,0 +1,129 @@
+import logging
+from typing import TYPE_CHECKING, List, Optional
+import chess
+from textual import work
+from textual.app import ComposeResult
+from textual.containers import Horizontal, Vertical
+from textual.widgets import Button, DataTable, Label
+
+from chess_core.game_state import GameState, GameStateEvent, game_state
+
+if TYPE_CHECKING:
+    from chess_core.engine import AnalysisLine, EngineAnalyzer
+    from chess_core.eval_cache import EvaluationCache
+
+
+# Moves of each principal variation shown in the table.
+PV_DISPLAY_PLIES = 8
+
+
+class AnalysisPanel(Vertical):
+    """Streams the engine's principal variations for the position on the board."""
+
+    def __init__(self, *args, engine_command: Optional[List[str]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.current_game_state: GameState = game_state
+        self.engine_command = engine_command
+        # Created when analysis is first switched on, so startup neither
+        # imports chess.engine nor opens the evaluation cache.
+        self.analyzer: "EngineAnalyzer | None" = None
+        self.cache: "EvaluationCache | None" = None
+        self.enabled = False
+
+    def compose(self) -> ComposeResult:
+        with Horizontal(id="analysis_header"):
+            yield Button("Analyse", id="analysis_button")
+            yield Label("Engine off", id="analysis_status")
+        yield DataTable(id="analysis_table", cursor_type="none")
+
+    def on_mount(self):
+        self.query_one(DataTable).add_columns("Score", "Depth", "Line")
+        self.current_game_state.subscribe(self.on_game_state_changed)
+
+    async def on_unmount(self):
+        self.current_game_state.unsubscribe(self.on_game_state_changed)
+        self.workers.cancel_group(self, "engine_analysis")
+        if self.analyzer is not None:
+            await self.analyzer.quit()
+            self.cache.close()
+
+    def on_game_state_changed(self, event: GameStateEvent, index: int):
+        if event == GameStateEvent.POSITION_CHANGED and self.enabled:
+            self.start_analysis()
+
+    def on_button_pressed(self, event: Button.Pressed) -> None:
+        if event.button.id == "analysis_button":
+            event.stop()
+            self.set_enabled(not self.enabled)
+
+    def set_enabled(self, enabled: bool):
+        self.enabled = enabled
+        self.query_one("#analysis_button", Button).label = "Stop" if enabled else "Analyse"
+        if enabled and self.analyzer is None:
+            from chess_core.engine import EngineAnalyzer
+            from chess_core.eval_cache import EvaluationCache
+            self.analyzer = EngineAnalyzer(self.engine_command)
+            self.cache = EvaluationCache(" ".join(self.analyzer.command))
+        if enabled:
+            self.start_analysis()
+        else:
+            self.workers.cancel_group(self, "engine_analysis")
+            self.query_one("#analysis_status", Label).update("Engine off")
+
+    def start_analysis(self):
+        """Search the current position, abandoning any search still running."""
+        self.query_one(DataTable).clear()
+        if self.current_game_state.is_game_over():
+            self.workers.cancel_group(self, "engine_analysis")
+            self.query_one("#analysis_status", Label).update("Game over")
+            return
+        self.analyse_position(self.current_game_state.board.copy(), self.current_game_state.position_key)
+
+    @work(exclusive=True, group="engine_analysis")
+    async def analyse_position(self, board: chess.Board, key: int) -> None:
+        import chess.engine
+        status = self.query_one("#analysis_status", Label)
+        depth = self.analyzer.limit.depth
+        multipv = min(self.analyzer.multipv, board.legal_moves.count())
+        # Any depth will do: what an abandoned search found is shown while
+        # the position is searched again.
+        cached = self.cache.get(key, 0, multipv)
+        cached_depth = min((line.depth for line in cached), default=0) if cached is not None else 0
+        if cached is not None:
+            self.show_lines(board, cached)
+            if cached_depth >= depth:
+                status.update(f"Depth {cached_depth} (cached)")
+                return
+            status.update(f"Depth {cached_depth} (cached), searching...")
+        else:
+            status.update("Searching...")
+        searched: List["AnalysisLine"] = []
+
+        def on_update(lines: List["AnalysisLine"]):
+            searched[:] = lines
+            # Shallower lines than the cached ones would only replace them with worse.
+            if min(line.depth for line in lines) > cached_depth:
+                self.show_lines(board, lines)
+
+        try:
+            lines = await self.analyzer.analyse(board, on_update)
+        except (FileNotFoundError, PermissionError, chess.engine.EngineError) as error:
+            logging.error(f"Engine analysis failed: {error}")
+            status.update(f"Engine unavailable: {error}")
+            self.enabled = False
+            self.query_one("#analysis_button", Button).label = "Analyse"
+            return
+        finally:
+            # Also keeps what an abandoned search found, shown on the next visit.
+            self.cache.put(key, multipv, searched)
+        depth = max((line.depth for line in lines), default=0)
+        status.update(f"Depth {depth} reached")
+
+    def show_lines(self, board: chess.Board, lines: List["AnalysisLine"]):
+        from chess_core.engine import format_score
+        table = self.query_one(DataTable)
+        table.clear()
+        for line in lines:
+            table.add_row(format_score(line.score), line.depth,
+                          board.variation_san(line.pv[:PV_DISPLAY_PLIES]))
+        self.query_one("#analysis_status", Label).update(f"Depth {lines[0].depth}")
@@ -0,0 +1,81 @@
+import logging
+import os
+from typing import TYPE_CHECKING
+from textual.app import ComposeResult
+from textual.containers import Vertical
+from textual.widgets import Button, DataTable, Label
+
+from chess_core.game_state import GameState, GameStateEvent, game_state
+
+if TYPE_CHECKING:
+    from chess_core.opening_book import OpeningBook
+
+
+# A Polyglot book to open at startup.
+BOOK_PATH_VARIABLE = "JETSON_CHESS_BOOK"
+
+
+class BookPanel(Vertical):
+    """Lists the opening book's moves and weights for the position on the board."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.current_game_state: GameState = game_state
+        self.book: "OpeningBook | None" = None
+
+    def compose(self) -> ComposeResult:
+        yield Label("No opening book", id="book_status")
+        yield DataTable(id="book_table", cursor_type="none")
+        yield Button("Open book", id="open_book_button")
+
+    def on_mount(self):
+        self.query_one(DataTable).add_columns("Move", "Weight", "%")
+        self.current_game_state.subscribe(self.on_game_state_changed)
+        book_path = os.environ.get(BOOK_PATH_VARIABLE)
+        if book_path:
+            self.open_book(book_path)
+
+    def on_unmount(self):
+        self.current_game_state.unsubscribe(self.on_game_state_changed)
+        if self.book is not None:
+            self.book.close()
+
+    def on_game_state_changed(self, event: GameStateEvent, index: int):
+        if event == GameStateEvent.POSITION_CHANGED:
+            self.update_moves()
+
+    def on_button_pressed(self, event: Button.Pressed) -> None:
+        if event.button.id == "open_book_button":
+            event.stop()
+            from chess_widgets.file_modal import FileModal
+            self.app.push_screen(FileModal(extensions=(".bin",)), lambda path: self.open_book(path) if path else None)
+
+    def open_book(self, file_path: str):
+        # opening_book brings in chess.pgn for the book builder; only load it once a book is opened.
+        from chess_core.opening_book import OpeningBook
+        try:
+            book = OpeningBook(file_path)
+        except (OSError, ValueError) as error:
+            # Depending on the python-chess version, a file that can't be mapped raises ValueError.
+            logging.error(f"Cannot open opening book {file_path}: {error}")
+            self.query_one("#book_status", Label).update(f"Cannot open {os.path.basename(file_path)}")
+            return
+        if self.book is not None:
+            self.book.close()
+        self.book = book
+        logging.info(f"Opened opening book {file_path} with {len(book)} entries")
+        self.update_moves()
+
+    def update_moves(self):
+        table = self.query_one(DataTable)
+        table.clear()
+        if self.book is None:
+            return
+
+        board = self.current_game_state.board
+        moves = self.book.moves(board, self.current_game_state.position_key)
+        total = sum(book_move.weight for book_move in moves)
+        for book_move in moves:
+            table.add_row(board.san(book_move.move), book_move.weight, f"{100 * book_move.weight // total}%")
+        name = os.path.basename(self.book.file_path)
+        self.query_one("#book_status", Label).update(f"{name}: {len(moves)} moves" if moves else f"{name}: out of book")
@@ -4,7 +4,7 @@ from textual import events
 from rich.segment import Segment
 from rich.style import Style
 
-from textual.geometry import Offset
+from textual.geometry import Offset, Region
 from textual.reactive import var
 from textual.strip import Strip
 from textual.widget import Widget
@@ -12,6 +12,7 @@ from textual.binding import Binding
 
 from chess_core.game_state import current_board, game_state
 from chess_core.chess_logic import get_moves_for_square, make_move_to_square
+from chess_core.instrumentation import timing
 from chess_widgets.board_segments import ColumnOffset, Rank, File, Square
 from chess_core.game_state import game_state
 
@@ -100,6 +101,12 @@ class ChessBoard(Widget):
         self.moves_for_hovered_square = []
         self.moves_for_selected_square = []
 
+        # Resolved component styles and rendered ranks, keyed on
+        # (position key, style names of the rank's squares).
+        self._resolved_styles: dict[str, Style] = {}
+        self._rank_strips: dict[int, tuple[tuple, Strip]] = {}
+        self._highlighted_squares: dict[chess.Square, str] = {}
+
         self.last_direction = 'none'
         self.board_row_offset = 2
         self.board_column_offset = 3
@@ -109,11 +116,26 @@ class ChessBoard(Widget):
 
     def watch_hovered_square( self, previous_square: Offset, cursor_square: Offset ) -> None:
         """Called when the cursor square changes."""
-        self.refresh()
+        self.refresh_highlights()
 
     def watch_selected_square( self, previous_square: Offset, selected_square: Offset ) -> None:
         """Called when the selected square changes."""
-        self.refresh()
+        self.refresh_highlights()
+
+    def notify_style_update(self) -> None:
+        super().notify_style_update()
+        self._resolved_styles.clear()
+        self._rank_strips.clear()
+
+    def refresh_highlights(self) -> None:
+        """Repaint only the squares whose highlight changed."""
+        highlighted_squares = self.get_highlighted_squares()
+        previous = self._highlighted_squares
+        changed = [square for square in highlighted_squares.keys() | previous.keys()
+                   if highlighted_squares.get(square) != previous.get(square)]
+        self._highlighted_squares = highlighted_squares
+        if changed:
+            self.refresh(*[self.get_region_for_square(square) for square in changed])
 
     def on_mouse_move(self, event: events.MouseMove) -> None:
         """Called when the user moves the mouse over the widget."""
@@ -169,43 +191,79 @@ class ChessBoard(Widget):
         """Unselect the currently selected square"""
         self.selected_square = None
 
+    def render_lines(self, crop: Region) -> list[Strip]:
+        # Timed per frame rather than per line, which would put the timer on the hot path.
+        with timing("ChessBoard.render"):
+            return super().render_lines(crop)
+
     def render_line(self, y: int) -> Strip:
         """Render a line of the widget. y is relative to the top of the widget."""
 
         rank = 7 - (y - self.board_row_offset) # convert to chess rank
 
         if 0 <= rank < 8:
-            return Strip([ColumnOffset(self.board_column_offset), Rank(rank)] + self.board_row_to_segments(rank))
+            return self.render_rank(rank)
         elif rank == -1:
             return Strip([ColumnOffset(self.board_column_offset), Rank(-1)] + [File(file) for file in range(8)])
         else:
             return Strip.blank(1)
 
-    def square_to_segment(self, square: chess.Square) -> Segment:
-        with current_board() as board:
-            piece = board.piece_at(square)
-            style = self.get_style_for_square(square)
-            return Square(piece, style)
-
-    def board_row_to_segments(self, rank: int) -> list[Segment]:
-        """Convert a row of the board to a list of segments."""
+    def render_rank(self, rank: int) -> Strip:
+        """Render a rank of the board, reusing the last strip if nothing on it changed."""
 
-        return [self.square_to_segment(chess.square(file, rank)) for file in range(8)]
+        style_names = tuple(self.get_style_name_for_square(chess.square(file, rank)) for file in range(8))
+        key = (game_state.position_key, style_names)
+        cached = self._rank_strips.get(rank)
+        if cached is not None and cached[0] == key:
+            return cached[1]
 
-    def get_style_for_square(self, square: chess.Square) -> Style:
-        """Get the style for a square."""
+        strip = Strip([ColumnOffset(self.board_column_offset), Rank(rank)] + self.board_row_to_segments(rank, style_names))
+        self._rank_strips[rank] = (key, strip)
+        return strip
 
-        is_white_square = True if chess.square_rank(square) % 2 == chess.square_file(square) % 2 else False
-        move_squares = self.moves_for_selected_square if self.selected_square else self.moves_for_hovered_square
+    def board_row_to_segments(self, rank: int, style_names: tuple[str, ...]) -> list[Segment]:
+        """Convert a row of the board to a list of segments."""
 
-        if square == self.selected_square:
-            return self.get_component_rich_style("chessboard--white-selected-square" if is_white_square else "chessboard--black-selected-square")
-        elif square == self.hovered_square:
-            return self.get_component_rich_style("chessboard--white-hovered-square" if is_white_square else "chessboard--black-hovered-square")
-        elif square in move_squares:
-            return self.get_component_rich_style("chessboard--white-possible-move-square" if is_white_square else "chessboard--black-possible-move-square")
-        else:
-            return self.get_component_rich_style("chessboard--white-square" if is_white_square else "chessboard--black-square")
+        with current_board() as board:
+            return [Square(board.piece_at(chess.square(file, rank)), self.get_component_style(style_names[file]))
+                    for file in range(8)]
+
+    def get_component_style(self, name: str) -> Style:
+        """Get a component style, resolving it from CSS only once."""
+
+        style = self._resolved_styles.get(name)
+        if style is None:
+            style = self._resolved_styles[name] = self.get_component_rich_style(name)
+        return style
+
+    def get_highlighted_squares(self) -> dict[chess.Square, str]:
+        """Get the squares that are not drawn in their plain colour, with their highlight."""
+
+        highlighted_squares = {}
+        move_squares = self.moves_for_selected_square if self.selected_square is not None else self.moves_for_hovered_square
+        for square in move_squares:
+            highlighted_squares[square] = "possible-move"
+        if self.hovered_square is not None:
+            highlighted_squares[self.hovered_square] = "hovered"
+        if self.selected_square is not None:
+            highlighted_squares[self.selected_square] = "selected"
+        return highlighted_squares
+
+    def get_style_name_for_square(self, square: chess.Square) -> str:
+        """Get the component class name for a square."""
+
+        color = "white" if chess.square_rank(square) % 2 == chess.square_file(square) % 2 else "black"
+        highlight = self._highlighted_squares.get(square)
+        if highlight is None:
+            return f"chessboard--{color}-square"
+        return f"chessboard--{color}-{highlight}-square"
+
+    def get_region_for_square(self, square: chess.Square) -> Region:
+        """Get the region of the widget a square is drawn in."""
+
+        x = self.board_column_offset + Rank.number_chars() + chess.square_file(square) * Square.number_chars()
+        y = self.board_row_offset + 7 - chess.square_rank(square)
+        return Region(x, y, Square.number_chars(), 1)
 
     def update_hovered_square(self, square: chess.Square) -> None:
         """Update the current square."""
@@ -215,18 +273,19 @@ class ChessBoard(Widget):
         else:
             self.hovered_square = square if square in self.moves_for_selected_square else None
 
-        with current_board() as board:
-            if board.is_game_over():
-                self.moves_for_hovered_square = []
-            else:
-                self.moves_for_hovered_square = get_moves_for_square(self.hovered_square)
+        if game_state.is_game_over():
+            self.moves_for_hovered_square = []
+        else:
+            self.moves_for_hovered_square = get_moves_for_square(self.hovered_square)
+
+        self.refresh_highlights()
 
     def update_selected_square(self, square: chess.Square) -> None:
-        with current_board() as board:
-            if board.is_game_over():
-                self.selected_square = None
-                self.moves_for_selected_square = []
-                return
+        if game_state.is_game_over():
+            self.selected_square = None
+            self.moves_for_selected_square = []
+            self.refresh_highlights()
+            return
 
         if square == self.selected_square:
             self.selected_square = None
@@ -241,6 +300,8 @@ class ChessBoard(Widget):
                 self.selected_square = square
                 self.moves_for_selected_square = moves
 
+        self.refresh_highlights()
+
     def get_board_offset_from_widget_offset(self, offset: Offset) -> Offset:
         """Get the square from an offset."""
         return Offset((offset.x - Rank.number_chars() - self.board_column_offset) // Square.number_chars(), 7 - offset.y + self.board_row_offset)
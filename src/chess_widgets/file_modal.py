@@ -1,20 +1,146 @@
+import itertools
+import os
+from pathlib import Path
+from typing import Iterable
+
+from textual import work
 from textual.app import ComposeResult
 from textual.containers import Vertical
 from textual.screen import ModalScreen
-from textual.widgets import Button, Input, Label, DirectoryTree
+from textual.widgets import Button, Input, Label, DirectoryTree, Tree
+from textual.worker import get_current_worker
+
+
+# Compressed PGN is listed so it can be found, but has to be decompressed to load.
+COMPRESSED_PGN_EXTENSIONS = (".pgn.gz", ".pgn.bz2", ".pgn.xz", ".pgn.zst")
+
+# Files offered for games: PGN, compressed PGN and game archives.
+GAME_FILE_EXTENSIONS = (".pgn", *COMPRESSED_PGN_EXTENSIONS, ".jca")
+
+# Directories never worth browsing for games, besides hidden ones and virtualenvs.
+SKIPPED_DIRECTORIES = frozenset({"__pycache__", "node_modules", "site-packages", "logs", "cache"})
+
+# Games listed in the preview of a file.
+PREVIEW_GAMES = 3
+
+# Filtered listings by (directory, extensions), with the directory's mtime
+# when they were made, so reopening the modal or re-expanding a directory
+# doesn't stat every entry again.
+_listings: dict[tuple[Path, tuple[str, ...]], tuple[int, list[Path]]] = {}
+
+
+def _is_virtualenv(path: Path) -> bool:
+    return (path / "pyvenv.cfg").exists()
+
+
+class GameFileTree(DirectoryTree):
+    """A DirectoryTree showing only files with the given extensions and the directories that may hold them."""
+
+    def __init__(self, path: str | Path, extensions: Iterable[str] = GAME_FILE_EXTENSIONS, **kwargs):
+        self.extensions = tuple(extensions)
+        super().__init__(path, **kwargs)
+
+    def filter_paths(self, paths: Iterable[Path]) -> Iterable[Path]:
+        # Runs in the tree's loader thread, so the stats and virtualenv checks don't hold up the UI.
+        paths = list(paths)
+        if not paths:
+            return paths
+        directory = paths[0].parent
+        try:
+            mtime = directory.stat().st_mtime_ns
+        except OSError:
+            return list(self._game_paths(paths))
+        key = (directory, self.extensions)
+        cached = _listings.get(key)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        kept = list(self._game_paths(paths))
+        _listings[key] = (mtime, kept)
+        return kept
+
+    def _game_paths(self, paths: list[Path]) -> Iterable[Path]:
+        for path in paths:
+            try:
+                is_dir = path.is_dir()
+            except OSError:
+                continue
+            if not is_dir:
+                if path.name.lower().endswith(self.extensions):
+                    yield path
+            elif not path.name.startswith(".") and path.name not in SKIPPED_DIRECTORIES and not _is_virtualenv(path):
+                yield path
+
+
+def preview_game_file(file_path: str) -> str:
+    """A few lines about a game file: its size, and who played the first games.
+
+    Only the headers of the first games of a PGN file are read, so
+    previewing neither indexes the file nor leaves a sidecar behind; the game
+    count comes from a sidecar index that already matches the file, and is
+    unknown otherwise.
+    """
+    # Imported here, in the preview's worker thread, rather than with the modal.
+    from chess_core.game_archive import GameArchive, is_archive
+    from chess_core.pgn_scan import scan_pgn
+
+    size = os.path.getsize(file_path)
+    if file_path.lower().endswith(COMPRESSED_PGN_EXTENSIONS):
+        return f"Compressed PGN, {size // 1024} KB\nDecompress it to load its games."
+    if is_archive(file_path):
+        # Not through open_game_archive: previewing shouldn't keep every archive passed over mapped.
+        archive = GameArchive(file_path)
+        try:
+            count = len(archive)
+            games = [headers for _, headers in archive.find_games(PREVIEW_GAMES)]
+        finally:
+            archive.close()
+    else:
+        with open(file_path, "rb") as pgn_file:
+            # One game more than shown tells whether the file holds only those.
+            games = [headers for _, headers in itertools.islice(scan_pgn(pgn_file), PREVIEW_GAMES + 1)]
+        count = len(games) if len(games) <= PREVIEW_GAMES else _indexed_game_count(file_path)
+    lines = [f"{count if count is not None else 'unknown'} games, {size // 1024} KB"]
+    for number, headers in enumerate(games[:PREVIEW_GAMES], 1):
+        lines.append(f"{number}. {headers.get('White') or '?'} - {headers.get('Black') or '?'}"
+                     f"  {headers.get('Date') or ''}  {headers.get('Result') or ''}")
+    return "\n".join(lines)
+
+
+def _indexed_game_count(file_path: str) -> int | None:
+    """The number of games in the file's sidecar index, if it has one that is up to date."""
+    import sqlite3
+    from chess_core.pgn_index import PgnIndex, index_path_for
+
+    if not os.path.exists(index_path_for(file_path)):
+        return None
+    try:
+        index = PgnIndex(file_path, read_only=True)
+    except sqlite3.Error:
+        return None
+    try:
+        return index.count_games() if index.is_current() else None
+    except sqlite3.Error:
+        return None
+    finally:
+        index.close()
 
 
 class FileModal(ModalScreen[str | None]):
-    """A modal screen to ask for a filename, with a directory tree."""
+    """A modal screen to ask for a filename, with a tree of the files that can be opened."""
 
     BINDINGS = [
         ("escape", "app.pop_screen(None)", "Cancel"),
     ]
 
+    def __init__(self, extensions: Iterable[str] = GAME_FILE_EXTENSIONS, **kwargs):
+        super().__init__(**kwargs)
+        self.extensions = tuple(extensions)
+
     def compose(self) -> ComposeResult:
         yield Vertical(
             Label("Select a file or enter a new filename to save the game."),
-            DirectoryTree(".", id="file_tree"),
+            GameFileTree(".", self.extensions, id="file_tree"),
+            Label("", id="file_preview"),
             Input(placeholder="e.g., my_game.pgn", id="file_input"),
             Button("OK", variant="primary", id="ok"),
             Button("Cancel", variant="default", id="cancel"),
@@ -25,6 +151,28 @@ class FileModal(ModalScreen[str | None]):
         """Focus the input when the modal is mounted."""
         self.query_one(Input).focus()
 
+    def on_tree_node_highlighted(self, event: Tree.NodeHighlighted) -> None:
+        """Preview game files as the cursor passes over them."""
+        event.stop()
+        entry = event.node.data
+        preview = self.query_one("#file_preview", Label)
+        if entry is None or event.node.allow_expand or not entry.path.name.lower().endswith(self.extensions):
+            preview.update("")
+            self.workers.cancel_group(self, "file_preview")
+            return
+        preview.update("Reading...")
+        self.load_preview(str(entry.path))
+
+    @work(thread=True, exclusive=True, group="file_preview")
+    def load_preview(self, file_path: str) -> None:
+        worker = get_current_worker()
+        try:
+            text = preview_game_file(file_path)
+        except (OSError, ValueError) as error:
+            text = f"Cannot read {os.path.basename(file_path)}: {error}"
+        if not worker.is_cancelled:
+            self.app.call_from_thread(self.query_one("#file_preview", Label).update, text)
+
     def on_directory_tree_file_selected(self, event: DirectoryTree.FileSelected) -> None:
         """Called when the user clicks a file in the directory tree."""
         event.stop()
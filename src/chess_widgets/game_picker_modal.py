@@ -0,0 +1,98 @@
+from textual.app import ComposeResult
+from textual.containers import Horizontal, Vertical
+from textual.screen import ModalScreen
+from textual.widgets import Button, DataTable, Input, Label
+
+from chess_core.pgn_database import PgnDatabase
+
+
+class GamePickerModal(ModalScreen[int | None]):
+    """A modal screen to pick one game out of a multi-game PGN file."""
+
+    BINDINGS = [
+        ("escape", "app.pop_screen(None)", "Cancel"),
+    ]
+
+    # Rows shown at once; the game number input jumps anywhere in the file.
+    PAGE_SIZE = 500
+
+    # Header filters, by input id. Values may use * and ? wildcards.
+    FILTERS = {
+        "player_filter": ("player", "Player"),
+        "date_filter": ("date", "Date (e.g. 2024*)"),
+        "result_filter": ("result", "Result"),
+        "eco_filter": ("eco", "ECO (e.g. B2*)"),
+    }
+
+    def __init__(self, database: PgnDatabase, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.database = database
+        self.first_game = 0
+        self.filters: dict[str, str] = {}
+
+    def compose(self) -> ComposeResult:
+        yield Vertical(
+            Label(f"{len(self.database)} games in {self.database.file_path}", id="game_picker_title"),
+            Horizontal(
+                *[Input(placeholder=placeholder, id=input_id) for input_id, (_, placeholder) in self.FILTERS.items()],
+                id="game_filters",
+            ),
+            DataTable(id="game_table", cursor_type="row"),
+            Input(placeholder="Game number", id="game_number_input", type="integer"),
+            Horizontal(
+                Button("Open", variant="primary", id="open"),
+                Button("Cancel", variant="default", id="cancel"),
+            ),
+            id="game_picker_dialog",
+        )
+
+    def on_mount(self) -> None:
+        table = self.query_one(DataTable)
+        table.add_columns("#", "White", "Black", "Result", "Date", "ECO", "Event")
+        self.show_games(0)
+        table.focus()
+
+    def show_games(self, first_game: int) -> None:
+        """Fill the table with a page of matching games, starting at the first_game-th match."""
+        table = self.query_one(DataTable)
+        table.clear()
+        self.first_game = max(0, first_game)
+        for index, headers in self.database.find_games(self.PAGE_SIZE, self.first_game, **self.filters):
+            table.add_row(index + 1, headers["White"], headers["Black"], headers["Result"],
+                          headers["Date"], headers["ECO"], headers["Event"], key=str(index))
+
+        if self.filters:
+            self.query_one("#game_picker_title").update(
+                f"{self.database.count_games(**self.filters)} of {len(self.database)} games match")
+        else:
+            self.query_one("#game_picker_title").update(f"{len(self.database)} games in {self.database.file_path}")
+
+    def on_data_table_row_selected(self, event: DataTable.RowSelected) -> None:
+        event.stop()
+        self.dismiss(int(event.row_key.value))
+
+    def on_input_submitted(self, event: Input.Submitted) -> None:
+        """Apply the header filters or jump to the entered game number."""
+        event.stop()
+        if event.input.id == "game_number_input":
+            if event.value:
+                self.filters = {}
+                for input_id in self.FILTERS:
+                    self.query_one(f"#{input_id}", Input).value = ""
+                self.show_games(int(event.value) - 1)
+        else:
+            self.filters = {name: self.query_one(f"#{input_id}", Input).value.strip()
+                            for input_id, (name, _) in self.FILTERS.items()}
+            self.filters = {name: value for name, value in self.filters.items() if value}
+            self.show_games(0)
+        self.query_one(DataTable).focus()
+
+    def on_button_pressed(self, event: Button.Pressed) -> None:
+        event.stop()
+        if event.button.id == "open":
+            table = self.query_one(DataTable)
+            if table.row_count:
+                row_key, _ = table.coordinate_to_cell_key(table.cursor_coordinate)
+                self.dismiss(int(row_key.value))
+        elif event.button.id == "cancel":
+            self.dismiss(None)
@@ -0,0 +1,89 @@
+import logging
+from textual import work
+from textual.app import App, ComposeResult
+from textual.binding import Binding
+from textual.containers import Horizontal, Vertical
+from textual.widgets import Footer, Label
+
+from chess_core.game_state import game_state
+from chess_core.match import MatchGame, MatchRunner
+from chess_widgets.chess_board import ChessBoard
+from chess_widgets.move_list import MoveList
+
+
+logger = logging.getLogger(__name__)
+
+
+class MatchViewer(App):
+    """Runs an engine match and follows one of its running games on the chess board."""
+
+    CSS_PATH = "../styles/app.css"
+
+    BINDINGS = [
+        Binding("n", "cycle_game(1)", "Next game"),
+        Binding("p", "cycle_game(-1)", "Previous game"),
+        Binding("q", "quit", "Quit"),
+    ]
+
+    def __init__(self, runner: MatchRunner, output_path: str, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.runner = runner
+        self.output_path = output_path
+        self.watched: int | None = None
+
+    def compose(self) -> ComposeResult:
+        with Horizontal():
+            with Vertical(classes="column"):
+                yield Label("", id="match_tally")
+                yield Label("Starting engines...", id="match_game_label")
+                # Only the engines move here.
+                yield ChessBoard(id="board", disabled=True)
+            yield MoveList(id="move_list")
+        yield Footer()
+
+    def on_mount(self) -> None:
+        self.runner.move_listeners.append(self.on_match_move)
+        self.runner.finish_listeners.append(self.on_match_game_finished)
+        self.play_match()
+
+    @work(exclusive=True, group="match")
+    async def play_match(self) -> None:
+        with open(self.output_path, "a", encoding="utf-8") as output:
+            await self.runner.run(output)
+        self.query_one("#match_game_label", Label).update(f"Match finished, games saved to {self.output_path}")
+
+    def on_match_move(self, game: MatchGame):
+        if self.watched not in self.runner.running:
+            self.follow_game(game)
+        elif game.number == self.watched:
+            game_state.add_move(game.board.peek())
+            self._refresh_board()
+
+    def on_match_game_finished(self, game: MatchGame):
+        logger.info(f"Game {game.number}: {game.white} - {game.black} {game.result} ({game.reason}); "
+                    f"{self.runner.names[0]} vs {self.runner.names[1]}: {self.runner.tally}")
+        self.query_one("#match_tally", Label).update(
+            f"{self.runner.names[0]} vs {self.runner.names[1]}: {self.runner.tally}")
+        if game.number == self.watched:
+            self.query_one("#match_game_label", Label).update(
+                f"Game {game.number}: {game.white} - {game.black} {game.result} ({game.reason})")
+
+    def follow_game(self, game: MatchGame):
+        self.watched = game.number
+        game_state.load_moves(game.board.root().fen(), game.board.move_stack)
+        self.query_one("#match_game_label", Label).update(f"Game {game.number}: {game.white} - {game.black}")
+        self._refresh_board()
+
+    def _refresh_board(self):
+        self.query_one("#board").refresh()
+        self.query_one("#move_list", MoveList).highlight_move(game_state.current_move_index)
+
+    def action_cycle_game(self, direction: int) -> None:
+        numbers = sorted(self.runner.running)
+        if not numbers:
+            return
+        if self.watched in numbers:
+            number = numbers[(numbers.index(self.watched) + direction) % len(numbers)]
+        else:
+            number = numbers[0]
+        self.follow_game(self.runner.running[number])
@@ -1,45 +1,118 @@
-from typing import List
 import chess
+from textual.message import Message
 from textual.widgets import DataTable
 
-from chess_core.game_state import GameState, game_state
-from chess_widgets.chess_move import ChessMove
+from chess_core.game_state import GameState, GameStateEvent, game_state
+from chess_core.instrumentation import timed
+from chess_core.move_record import MoveRecord
 
 
 class MoveList(DataTable):
 
+    class PlySelected(Message):
+        """Posted when a move is clicked; ply is the number of moves up to and including it."""
+
+        def __init__(self, ply: int):
+            super().__init__()
+            self.ply = ply
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.current_game_state: GameState = game_state
+        # Ply of the first move in the table and the fullmove number of its
+        # last row; together they locate any ply without scanning move_stack.
+        self._first_ply: int | None = None
+        self._last_move_number: int | None = None
 
     def on_mount(self):
         super().on_mount()
         self.add_column("move", key="1", width=5)
-        self.add_column("white", key="2", width=10)
-        self.add_column("black", key="3", width=10)
+        self.add_column("white", key="2", width=12)
+        self.add_column("black", key="3", width=12)
+        self.current_game_state.subscribe(self.on_game_state_changed)
         self.update_moves()
 
+    def on_unmount(self):
+        self.current_game_state.unsubscribe(self.on_game_state_changed)
+
+    def on_game_state_changed(self, event: GameStateEvent, index: int):
+        if event == GameStateEvent.MOVE_ADDED:
+            self.append_ply(self.current_game_state.move_stack[index])
+        elif event == GameStateEvent.MOVES_TRUNCATED:
+            self.truncate_from_ply(index)
+        elif event == GameStateEvent.VARIATIONS_CHANGED:
+            self.relabel_ply(self.current_game_state.move_stack[index])
+        elif event == GameStateEvent.RESET:
+            self.update_moves()
+
+    @timed
     def update_moves(self):
+        """Rebuild every row from the game state."""
         self.clear()
-        if not self.current_game_state.move_stack:
+        self._first_ply = None
+        self._last_move_number = None
+        for record in self.current_game_state.move_stack:
+            self.append_ply(record)
+
+    def append_ply(self, record: MoveRecord):
+        """Add a ply to the end of the table."""
+        move_number = record.fullmove_number
+        if self._first_ply is None:
+            self._first_ply = record.ply
+
+        label = self._move_label(record)
+        if move_number == self._last_move_number:
+            self.update_cell(str(move_number), "3", label)
+        elif record.turn == chess.WHITE:
+            self.add_row(move_number, label, "-", key=str(move_number))
+        else:
+            self.add_row(move_number, "-", label, key=str(move_number))
+        self._last_move_number = move_number
+
+    def relabel_ply(self, record: MoveRecord):
+        """Redraw the cell of a ply already in the table."""
+        column = "2" if record.turn == chess.WHITE else "3"
+        self.update_cell(str(record.fullmove_number), column, self._move_label(record))
+
+    def _move_label(self, record: MoveRecord) -> str:
+        alternatives = self.current_game_state.variation_count(record) - 1
+        return f"{record.san} (+{alternatives})" if alternatives else record.san
+
+    def truncate_from_ply(self, index: int):
+        """Remove the ply at index in move_stack and everything after it."""
+        if self._first_ply is None or self._last_move_number is None:
+            return
+
+        ply = self._first_ply + index
+        move_number = ply // 2 + 1
+        if move_number > self._last_move_number:
             return
 
-        moves_by_number = {}
-        for move in self.current_game_state.move_stack:
-            move_num = move.position.fullmove_number
-            if move_num not in moves_by_number:
-                moves_by_number[move_num] = {"white": None, "black": None}
+        for number in range(self._last_move_number, move_number, -1):
+            self.remove_row(str(number))
 
-            if move.position.turn == chess.WHITE:
-                moves_by_number[move_num]["white"] = move
-            else:
-                moves_by_number[move_num]["black"] = move
+        if index == 0:
+            self.remove_row(str(move_number))
+            self._first_ply = None
+            self._last_move_number = None
+        elif ply % 2 == 0:
+            self.remove_row(str(move_number))
+            self._last_move_number = move_number - 1
+        else:
+            self.update_cell(str(move_number), "3", "-")
+            self._last_move_number = move_number
 
-        for move_number, moves in sorted(moves_by_number.items()):
-            white_move = moves["white"] or "-"
-            black_move = moves["black"] or "-"
-            self.add_row(move_number, white_move, black_move, key=str(move_number))
+    def on_data_table_cell_selected(self, event: DataTable.CellSelected):
+        event.stop()
+        if self._first_ply is None or event.coordinate.column == 0:
+            return
+
+        move_number = int(event.cell_key.row_key.value)
+        index = (move_number - 1) * 2 + (event.coordinate.column - 1) - self._first_ply
+        if 0 <= index < len(self.current_game_state.move_stack):
+            self.post_message(self.PlySelected(index + 1))
 
+    @timed
     def highlight_move(self, index: int):
         if index < 0:
             self.show_cursor = False
@@ -48,17 +121,17 @@ class MoveList(DataTable):
         self.show_cursor = True
         if 0 <= index < len(self.current_game_state.move_stack):
             current_move = self.current_game_state.move_stack[index]
-            move_number = current_move.position.fullmove_number
+            move_number = current_move.fullmove_number
 
             if not self.current_game_state.move_stack:
                 return
 
-            first_move_number = self.current_game_state.move_stack[0].position.fullmove_number
+            first_move_number = self.current_game_state.move_stack[0].fullmove_number
             target_row = move_number - first_move_number
 
             # Determine the column based on whose move it is
             # Column 0 is the move number, 1 is white, 2 is black.
-            target_column = 1 if current_move.position.turn == chess.WHITE else 2
+            target_column = 1 if current_move.turn == chess.WHITE else 2
 
             if 0 <= target_row < self.row_count:
-                self.move_cursor(row=target_row, column=target_column)
\ No newline at end of file
+                self.move_cursor(row=target_row, column=target_column)
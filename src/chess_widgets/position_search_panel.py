@@ -0,0 +1,147 @@
+import logging
+from typing import TYPE_CHECKING
+import chess
+from textual import work
+from textual.app import ComposeResult
+from textual.containers import Vertical
+from textual.message import Message
+from textual.widgets import Button, DataTable, Label
+
+from chess_core.game_state import GameState, GameStateEvent, game_state
+
+if TYPE_CHECKING:
+    from chess_core.pgn_database import PgnDatabase
+    from chess_core.position_index import PositionIndex
+
+
+# Games listed for a position; the status line gives the full count.
+LISTED_GAMES = 100
+
+
+class PositionSearchPanel(Vertical):
+    """Shows which games of the loaded PGN file reached the current position and what was played next."""
+
+    class GameSelected(Message):
+        """Posted when a listed game is chosen; ply is where it reached the position."""
+
+        def __init__(self, database: "PgnDatabase", game_id: int, ply: int):
+            super().__init__()
+            self.database = database
+            self.game_id = game_id
+            self.ply = ply
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.current_game_state: GameState = game_state
+        self.position_index: "PositionIndex | None" = None
+
+    def compose(self) -> ComposeResult:
+        yield Label("No game database loaded", id="position_search_status")
+        yield DataTable(id="position_search_table", cursor_type="row")
+        yield DataTable(id="position_games_table", cursor_type="row")
+        yield Button("Index positions", id="index_positions_button", disabled=True)
+
+    def on_mount(self):
+        self.query_one("#position_search_table", DataTable).add_columns("Move", "Games", "White", "Draw", "Black")
+        self.query_one("#position_games_table", DataTable).add_columns("White", "Black", "Date", "Result", "Ply")
+        self.current_game_state.subscribe(self.on_game_state_changed)
+
+    def on_unmount(self):
+        self.current_game_state.unsubscribe(self.on_game_state_changed)
+
+    def on_game_state_changed(self, event: GameStateEvent, index: int):
+        if event == GameStateEvent.POSITION_CHANGED:
+            self.update_results()
+
+    def set_database(self, database: "PgnDatabase"):
+        """Search the games of a PGN database from now on."""
+        # The index modules (chess.pgn, sqlite3) load with the first database.
+        from chess_core.position_index import PositionIndex
+        if self.position_index is None or self.position_index.database is not database:
+            self.position_index = PositionIndex(database)
+        self.update_results()
+
+    def update_results(self):
+        if self.position_index is None:
+            self.show_results("No game database loaded", [], [], True)
+            return
+        self.query_position(self.position_index, self.current_game_state.board.copy(stack=False),
+                            self.current_game_state.position_key)
+
+    @work(thread=True, exclusive=True, group="position_query")
+    def query_position(self, position_index: "PositionIndex", board: chess.Board, key: int) -> None:
+        """Look the position up off the UI thread, which would otherwise wait out any rescan holding the index."""
+        import sqlite3
+        from textual.worker import get_current_worker
+
+        worker = get_current_worker()
+        moves, games = [], []
+        try:
+            built = position_index.is_built()
+            if built:
+                moves = [(board.san(entry.move), entry.games,
+                          self._percentage(entry.white_wins, entry.games),
+                          self._percentage(entry.draws, entry.games),
+                          self._percentage(entry.black_wins, entry.games))
+                         for entry in position_index.next_move_stats(key) if board.is_legal(entry.move)]
+                games = position_index.find_games(key, LISTED_GAMES)
+                status = f"Position reached in {position_index.count_games(key)} games"
+            else:
+                status = f"{position_index.indexed_games()} of {len(position_index.database)} games indexed"
+        except sqlite3.Error as error:
+            logging.error(f"Cannot search positions of {position_index.database.file_path}: {error}")
+            return
+        if not worker.is_cancelled:
+            self.app.call_from_thread(self.show_results, status, moves, games, built)
+
+    def show_results(self, status: str, moves: list, games: list, built: bool) -> None:
+        table = self.query_one("#position_search_table", DataTable)
+        table.clear()
+        for row in moves:
+            table.add_row(*row)
+        games_table = self.query_one("#position_games_table", DataTable)
+        games_table.clear()
+        for game_id, ply, _, headers in games:
+            games_table.add_row(headers["White"], headers["Black"], headers["Date"], headers["Result"], ply,
+                                key=f"{game_id}:{ply}")
+        self.query_one("#index_positions_button", Button).disabled = built
+        self.query_one("#position_search_status", Label).update(status)
+
+    def on_data_table_row_selected(self, event: DataTable.RowSelected) -> None:
+        if event.data_table.id != "position_games_table":
+            return
+        event.stop()
+        game_id, ply = map(int, event.row_key.value.split(":"))
+        self.post_message(self.GameSelected(self.position_index.database, game_id, ply))
+
+    @staticmethod
+    def _percentage(count: int, total: int) -> str:
+        return f"{100 * count // total}%" if total else "-"
+
+    def on_button_pressed(self, event: Button.Pressed) -> None:
+        if event.button.id == "index_positions_button":
+            event.stop()
+            event.button.disabled = True
+            self.build_index()
+
+    @work(thread=True, exclusive=True, group="position_index")
+    def build_index(self) -> None:
+        """Replay every game of the database in the background and index its positions."""
+        import sqlite3
+        from chess_core.pgn_import import import_games
+        try:
+            self.position_index.build(progress=lambda done, total: self.app.call_from_thread(self.show_progress, done, total),
+                                      replay=import_games)
+        except (OSError, ValueError, sqlite3.Error) as error:
+            logging.error(f"Cannot index positions of {self.position_index.database.file_path}: {error}")
+            self.app.call_from_thread(self.show_error, f"Indexing failed: {error}")
+            return
+        self.app.call_from_thread(self.update_results)
+
+    def show_error(self, message: str) -> None:
+        self.query_one("#position_search_status", Label).update(message)
+        # Building resumes where it stopped, so it can simply be tried again.
+        self.query_one("#index_positions_button", Button).disabled = False
+
+    def show_progress(self, done: int, total: int) -> None:
+        self.query_one("#position_search_status", Label).update(f"Indexing positions: {done} of {total} games")
@@ -0,0 +1,55 @@
+import logging
+import os
+from datetime import datetime
+from textual.app import ComposeResult
+from textual.containers import Horizontal, Vertical
+from textual.widgets import Button, DataTable, Label
+
+from chess_core.instrumentation import export_timings, reset_timings, timing_stats
+
+
+# Seconds between refreshes of the table while it is on screen.
+REFRESH_INTERVAL = 1.0
+
+
+class TimingPanel(Vertical):
+    """Live call counts and latencies of the instrumented hot paths."""
+
+    def compose(self) -> ComposeResult:
+        with Horizontal(id="timing_header"):
+            yield Button("Export JSON", id="export_timings_button")
+            yield Button("Reset", id="reset_timings_button")
+            yield Label("", id="timing_status")
+        yield DataTable(id="timing_table", cursor_type="none")
+
+    def on_mount(self):
+        self.query_one(DataTable).add_columns("Function", "Calls", "p50 ms", "p95 ms", "Max ms", "Total ms")
+        self.update_stats()
+        self.set_interval(REFRESH_INTERVAL, self.update_stats)
+
+    def update_stats(self):
+        # Nothing to draw while the Debug tab is hidden.
+        if not self.is_on_screen:
+            return
+        table = self.query_one(DataTable)
+        table.clear()
+        for name, stats in timing_stats().items():
+            table.add_row(name, stats["calls"], *(f"{stats[key] * 1000:.2f}" for key in ("p50", "p95", "max", "total")))
+
+    def on_button_pressed(self, event: Button.Pressed) -> None:
+        if event.button.id == "export_timings_button":
+            event.stop()
+            file_path = f"logs/timings-{datetime.now().strftime('%Y-%m-%d-%H%M%S')}.json"
+            try:
+                os.makedirs(os.path.dirname(file_path), exist_ok=True)
+                export_timings(file_path)
+            except OSError as error:
+                logging.error(f"Cannot export timings to {file_path}: {error}")
+                self.query_one("#timing_status", Label).update(f"Export failed: {error}")
+                return
+            logging.info(f"Timings exported to {file_path}")
+            self.query_one("#timing_status", Label).update(f"Exported to {file_path}")
+        elif event.button.id == "reset_timings_button":
+            event.stop()
+            reset_timings()
+            self.update_stats()
@@ -0,0 +1,239 @@
+"""Headless PGN and FEN tools: python src/cli.py <command> ...
+
+    python src/cli.py validate fen "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+    python src/cli.py validate pgn games.pgn
+    cat games.pgn | python src/cli.py convert --to uci
+    python src/cli.py count games.pgn --player "Carlsen*"
+    python src/cli.py archive games.pgn games.jca
+    python src/cli.py perft --depth 4
+
+Inputs named "-" (the default) are read from stdin and results go to
+stdout, so commands chain in pipelines. Only python-chess and the
+non-UI parts of chess_core are imported, and each command imports what
+it needs when it runs, to keep startup short. Importing python-chess
+itself takes about 0.1 s, most of a command's startup; validate reads
+PGN without chess.pgn, which would add chess.engine and asyncio, and
+count scans only the headers, without python-chess or SQLite.
+"""
+
+import argparse
+import sys
+from typing import Iterator, List, Optional, TextIO
+
+
+STDIN = "-"
+
+# Header filters of the count command, as understood by PgnIndex.find_games.
+COUNT_FILTERS = ("player", "white", "black", "date", "result", "eco")
+
+
+def _open_text(path: str) -> TextIO:
+    import io
+    if path == STDIN:
+        return io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8-sig", errors="replace")
+    return open(path, encoding="utf-8-sig", errors="replace")
+
+
+def _read_games(path: str) -> Iterator:
+    import chess.pgn
+    with _open_text(path) as f:
+        while (game := chess.pgn.read_game(f)) is not None:
+            yield game
+
+
+def _read_lines(values: List[str]) -> Iterator[str]:
+    """The given values, or the lines of stdin where a value is "-"."""
+    for value in values:
+        if value != STDIN:
+            yield value
+            continue
+        for line in sys.stdin:
+            if line.strip():
+                yield line.strip()
+
+
+def validate_fen(args: argparse.Namespace) -> int:
+    import chess
+    invalid = 0
+    for fen in _read_lines(args.inputs or [STDIN]):
+        try:
+            status = chess.Board(fen).status()
+        except ValueError as error:
+            print(f"{fen}\tinvalid: {error}")
+            invalid += 1
+            continue
+        if status != chess.STATUS_VALID:
+            problems = [flag.name.lower() for flag in chess.Status if flag and flag in status]
+            print(f"{fen}\tinvalid: {', '.join(problems)}")
+            invalid += 1
+        elif not args.quiet:
+            print(f"{fen}\tok")
+    return 1 if invalid else 0
+
+
+def validate_pgn(args: argparse.Namespace) -> int:
+    # Checked without chess.pgn, which would import chess.engine and asyncio too.
+    from chess_core.pgn_scan import check_games
+    games = invalid = 0
+    for path in args.inputs or [STDIN]:
+        with _open_text(path) as f:
+            for number, errors in enumerate(check_games(f), 1):
+                games += 1
+                if errors:
+                    invalid += 1
+                    for error in errors:
+                        print(f"{path}: game {number}: {error}")
+    print(f"{games} games, {invalid} with errors", file=sys.stderr)
+    return 1 if invalid else 0
+
+
+def convert(args: argparse.Namespace) -> int:
+    import chess
+    import chess.pgn
+
+    if args.source == "fen":
+        boards = (chess.Board(fen) for fen in _read_lines([args.input]))
+        games = (chess.pgn.Game.from_board(board) for board in boards)
+    else:
+        games = _read_games(args.input)
+
+    if args.to == "pgn":
+        from chess_core.game_io import export_game
+        for game in games:
+            export_game(game, sys.stdout)
+        return 0
+
+    for game in games:
+        if args.to == "fen":
+            print(game.end().board().fen())
+        elif args.to == "epd":
+            print(game.end().board().epd())
+        elif args.to == "uci":
+            print(" ".join(move.uci() for move in game.mainline_moves()))
+        elif args.to == "san":
+            print(game.board().variation_san(list(game.mainline_moves())))
+    return 0
+
+
+def count(args: argparse.Namespace) -> int:
+    # A scan of the headers alone, which needs neither python-chess nor the SQLite index.
+    from chess_core.pgn_scan import headers_match, scan_pgn
+    filters = {name: getattr(args, name) for name in COUNT_FILTERS if getattr(args, name)}
+    if args.input == STDIN:
+        total = sum(1 for _, headers in scan_pgn(sys.stdin.buffer) if headers_match(headers, filters))
+    else:
+        with open(args.input, "rb") as pgn_file:
+            total = sum(1 for _, headers in scan_pgn(pgn_file) if headers_match(headers, filters))
+    print(total)
+    return 0
+
+
+def archive(args: argparse.Namespace) -> int:
+    from chess_core.game_archive import convert_pgn_to_archive
+
+    def progress(done: int, total: int):
+        print(f"{done // 1_000_000} of {total // 1_000_000} MB read", file=sys.stderr)
+
+    games = convert_pgn_to_archive(args.input, args.output, keys=args.with_keys,
+                                   notation=args.with_san, progress=progress)
+    print(f"{games} games written to {args.output}", file=sys.stderr)
+    return 0
+
+
+def perft_count(board, depth: int) -> int:
+    """Leaf nodes of the legal move tree below board, depth plies deep."""
+    if depth == 0:
+        return 1
+    if depth == 1:
+        return board.legal_moves.count()
+    nodes = 0
+    for move in list(board.generate_legal_moves()):
+        board.push(move)
+        nodes += perft_count(board, depth - 1)
+        board.pop()
+    return nodes
+
+
+def perft(args: argparse.Namespace) -> int:
+    import time
+    import chess
+    for fen in _read_lines(args.fens or [chess.STARTING_FEN]):
+        board = chess.Board(fen)
+        started = time.perf_counter()
+        if args.divide:
+            nodes = 0
+            for move in list(board.generate_legal_moves()):
+                board.push(move)
+                move_nodes = perft_count(board, args.depth - 1)
+                board.pop()
+                nodes += move_nodes
+                print(f"{move.uci()}: {move_nodes}")
+        else:
+            nodes = perft_count(board, args.depth)
+        elapsed = time.perf_counter() - started
+        print(f"{fen}\tdepth {args.depth}\t{nodes} nodes")
+        print(f"{nodes / elapsed if elapsed else 0:.0f} nodes/s", file=sys.stderr)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="jetson-chess", description="Headless PGN and FEN tools.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    validate = commands.add_parser("validate", help="check FENs or PGN files")
+    validate_kinds = validate.add_subparsers(dest="kind", required=True)
+    fen = validate_kinds.add_parser("fen", help="check FEN strings, one per line on stdin by default")
+    fen.add_argument("inputs", nargs="*", help='FEN strings, or "-" for stdin')
+    fen.add_argument("-q", "--quiet", action="store_true", help="only print invalid FENs")
+    fen.set_defaults(handler=validate_fen)
+    pgn = validate_kinds.add_parser("pgn", help="check that every move of every game is legal")
+    pgn.add_argument("inputs", nargs="*", help='PGN files, or "-" for stdin')
+    pgn.set_defaults(handler=validate_pgn)
+
+    converter = commands.add_parser("convert", help="convert games or positions between formats")
+    converter.add_argument("input", nargs="?", default=STDIN, help='input file, or "-" for stdin')
+    converter.add_argument("--from", dest="source", choices=("pgn", "fen"), default="pgn", help="input format")
+    converter.add_argument("--to", choices=("pgn", "fen", "epd", "uci", "san"), required=True,
+                           help="output format; fen and epd give each game's final position")
+    converter.set_defaults(handler=convert)
+
+    counter = commands.add_parser("count", help="count the games of a PGN file, optionally filtered")
+    counter.add_argument("input", nargs="?", default=STDIN, help='PGN file, or "-" for stdin')
+    for name in COUNT_FILTERS:
+        counter.add_argument(f"--{name}", help=f"GLOB pattern the {name} must match")
+    counter.set_defaults(handler=count)
+
+    archiver = commands.add_parser("archive", help="convert a PGN file to a compact game archive the app loads quickly")
+    archiver.add_argument("input", help="PGN file")
+    archiver.add_argument("output", help="archive to write, conventionally with a .jca extension")
+    archiver.add_argument("--with-keys", action="store_true", help="also store position keys (larger, faster to load)")
+    archiver.add_argument("--with-san", action="store_true", help="also store SAN (larger, faster to load)")
+    archiver.set_defaults(handler=archive)
+
+    perft_parser = commands.add_parser("perft", help="count the leaf nodes of the move tree")
+    perft_parser.add_argument("fens", nargs="*", help='positions (default: the starting position), or "-" for stdin')
+    perft_parser.add_argument("-d", "--depth", type=int, default=3, help="plies to search")
+    perft_parser.add_argument("--divide", action="store_true", help="print the node count after each first move")
+    perft_parser.set_defaults(handler=perft)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        return args.handler(args)
+    except FileNotFoundError as error:
+        print(f"jetson-chess: file not found: {error.filename}", file=sys.stderr)
+        return 1
+    except ValueError as error:
+        print(f"jetson-chess: {error}", file=sys.stderr)
+        return 1
+    except BrokenPipeError:
+        # The reader went away (e.g. piped into head); stop quietly.
+        import os
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,33 +1,156 @@
 import logging
-from chess_widgets.file_modal import FileModal
-from chess_core.game_io import save_game_to_pgn, load_game_from_pgn
+import os
 from chess_core.game_state import game_state
-from chess_core.game_state import game_state, current_board
 from chess_core.chess_logic import _update_turn_label, _check_game_over_and_update_ui
 
+# The modals, chess_core.game_io (which pulls in chess.pgn),
+# chess_core.game_archive and sqlite3 are imported on first use to keep
+# them off the startup path.
+
+# Reading and writing files runs in thread workers of this group, one at a
+# time, so the board stays usable while a large file is indexed or parsed.
+FILE_WORKER_GROUP = "file_io"
+
+
+class LoadCancelled(Exception):
+    """Raised from a progress callback to abandon indexing a file."""
+
+
+def show_file_status(app, message: str, busy: bool = False, done: int | None = None, total: int | None = None) -> None:
+    """Report on the File tab; the progress bar and Cancel button show while busy, without a total the bar just pulses."""
+    if not app.query("#file_status"):
+        return  # The File tab has not been built yet.
+    app.query_one("#file_status").update(message)
+    progress_bar = app.query_one("#file_progress")
+    progress_bar.display = busy
+    progress_bar.update(total=total, progress=done or 0)
+    app.query_one("#cancel_file_button").disabled = not busy
+
+def report_file_error(app, message: str) -> None:
+    logging.error(message)
+    show_file_status(app, message)
+
 def handle_save_game_button(app):
+    from chess_widgets.file_modal import FileModal
     logging.debug("Save game button pressed, opening file modal.")
     app.push_screen(FileModal(), lambda path: handle_save_dialog(app, path))
 
 def handle_load_game_button(app):
+    from chess_widgets.file_modal import FileModal
     logging.debug("Load game button pressed, opening file modal.")
     app.push_screen(FileModal(), lambda path: handle_load_dialog(app, path))
 
+def handle_cancel_file_button(app):
+    logging.debug("Cancelling file operation.")
+    app.workers.cancel_group(app, FILE_WORKER_GROUP)
+    show_file_status(app, "Cancelled")
+
 def handle_save_dialog(app, file_path: str | None) -> None:
     """Called when the FileModal is dismissed for saving."""
     logging.debug(f"File modal returned file path for saving: {file_path}")
     if file_path:
-        logging.debug(f"Calling save_game_to_pgn with path: {file_path}")
-        save_game_to_pgn(file_path)
+        from chess_core.game_io import game_from_state
+        # Copied here, on the UI thread, so moves played while saving don't change what is written.
+        game = game_from_state(game_state)
+        show_file_status(app, f"Saving {os.path.basename(file_path)}...", busy=True)
+        app.run_worker(lambda: _write_game(app, game, file_path), thread=True,
+                       group=FILE_WORKER_GROUP, exclusive=True)
+
+def _write_game(app, game, file_path: str) -> None:
+    from textual.worker import get_current_worker
+    from chess_core.game_io import write_game
+    worker = get_current_worker()
+    try:
+        saved = write_game(game, file_path, cancelled=lambda: worker.is_cancelled)
+    except OSError as error:
+        app.call_from_thread(report_file_error, app, f"Cannot save {file_path}: {error.strerror}")
+        return
+    if saved:
+        app.call_from_thread(_finish_save, app, file_path)
+
+def _finish_save(app, file_path: str) -> None:
+    logging.info(f"Game saved to {file_path}")
+    show_file_status(app, f"Saved {os.path.basename(file_path)}")
 
 def handle_load_dialog(app, file_path: str | None) -> None:
     """Called when the FileModal is dismissed for loading."""
     logging.debug(f"File modal returned file path for loading: {file_path}")
     if file_path:
-        load_game_from_pgn(file_path)
-        _update_turn_label(app)
-        app.query_one("#board").refresh()
-        app.query_one("#move_list").update_moves()
-        app.query_one("#move_list").highlight_move(game_state.current_move_index)
-        with current_board() as board:
-            _check_game_over_and_update_ui(app, board)
+        show_file_status(app, f"Indexing {os.path.basename(file_path)}...", busy=True)
+        app.run_worker(lambda: _open_database(app, file_path), thread=True,
+                       group=FILE_WORKER_GROUP, exclusive=True)
+
+def _open_database(app, file_path: str) -> None:
+    """Index a PGN file, or map a game archive, off the UI thread, then offer its games."""
+    import sqlite3
+    from textual.worker import get_current_worker
+    from chess_core.game_io import open_game_database
+    worker = get_current_worker()
+    name = os.path.basename(file_path)
+
+    def progress(done: int, total: int):
+        if worker.is_cancelled:
+            raise LoadCancelled()
+        app.call_from_thread(show_file_status, app, f"Indexing {name}: {100 * done // total}%", True, done, total)
+
+    try:
+        database = open_game_database(file_path, progress)
+    except LoadCancelled:
+        return
+    except (OSError, ValueError, sqlite3.Error) as error:
+        app.call_from_thread(report_file_error, app, f"Cannot read {file_path}: {error}")
+        return
+    if database is None:
+        app.call_from_thread(report_file_error, app, f"File not found: {file_path}")
+    elif not worker.is_cancelled:
+        app.call_from_thread(_choose_game, app, file_path, database)
+
+def _choose_game(app, file_path: str, database) -> None:
+    if len(database) == 0:
+        report_file_error(app, f"No games in {file_path}")
+    elif len(database) > 1:
+        from chess_widgets.game_picker_modal import GamePickerModal
+        show_file_status(app, f"{len(database)} games in {os.path.basename(file_path)}")
+        app.push_screen(GamePickerModal(database),
+                        lambda game_index: handle_game_picked(app, file_path, database, game_index))
+    else:
+        handle_game_picked(app, file_path, database, 0)
+
+def handle_game_picked(app, file_path: str, database, game_index: int | None, ply: int | None = None) -> None:
+    """Called once the game to load from an open PGN file or archive is known; ply is where to show it from."""
+    logging.debug(f"Game picked from {file_path}: {game_index}")
+    if game_index is not None:
+        show_file_status(app, f"Loading game {game_index + 1} of {os.path.basename(file_path)}...", busy=True)
+        app.run_worker(lambda: _build_game(app, file_path, database, game_index, ply), thread=True,
+                       group=FILE_WORKER_GROUP, exclusive=True)
+
+def _build_game(app, file_path: str, database, game_index: int, ply: int | None = None) -> None:
+    """Parse the game into a fresh GameState off the UI thread; the shared one switches over in one step."""
+    import sqlite3
+    from textual.worker import get_current_worker
+    from chess_core.game_io import build_game_from_database
+    worker = get_current_worker()
+    try:
+        state = build_game_from_database(database, game_index)
+    except (OSError, ValueError, sqlite3.Error) as error:
+        app.call_from_thread(report_file_error, app, f"Cannot read {file_path}: {error}")
+        return
+    if state is None:
+        app.call_from_thread(report_file_error, app, f"Cannot read game {game_index + 1} of {file_path}")
+    elif not worker.is_cancelled:
+        app.call_from_thread(_finish_load, app, file_path, game_index, state, database, ply)
+
+def _finish_load(app, file_path: str, game_index: int, state, database, ply: int | None = None) -> None:
+    game_state.adopt(state)
+    if ply is not None:
+        game_state.goto_ply(ply)
+    logging.info(f"Loaded game {game_index + 1} of {len(database)} from {file_path}")
+    show_file_status(app, f"Loaded game {game_index + 1} of {os.path.basename(file_path)}")
+    from chess_core.pgn_database import PgnDatabase
+    if isinstance(database, PgnDatabase):
+        # Position search runs on a PGN file's index; archives have none.
+        app.query_one("#position_search").set_database(database)
+    _update_turn_label(app)
+    app.query_one("#board").refresh()
+    app.query_one("#move_list").highlight_move(game_state.current_move_index)
+    _check_game_over_and_update_ui(app)
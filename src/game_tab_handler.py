@@ -1,19 +1,46 @@
 import logging
 import chess
 from chess_core.game_state import game_state
-from chess_core.chess_logic import _update_turn_label
+from chess_core.chess_logic import _update_turn_label, _check_game_over_and_update_ui
+
+def _update_after_navigation(app):
+    _update_turn_label(app)
+    app.query_one("#board").refresh()
+    app.query_one("#move_list").highlight_move(game_state.current_move_index)
 
 def handle_forward_button(app):
     if game_state.forward_move():
-        _update_turn_label(app)
-        app.query_one("#board").refresh()
-        app.query_one("#move_list").highlight_move(game_state.current_move_index)
+        _update_after_navigation(app)
 
 def handle_backward_button(app):
     if game_state.backward_move():
-        _update_turn_label(app)
-        app.query_one("#board").refresh()
-        app.query_one("#move_list").highlight_move(game_state.current_move_index)
+        _update_after_navigation(app)
+
+def handle_goto_ply(app, ply: int):
+    """Jump to the position after ply moves, repainting once."""
+    if game_state.goto_ply(ply):
+        _update_after_navigation(app)
+
+def handle_switch_variation(app, direction: int):
+    """Replace the current move with its next or previous alternative."""
+    if game_state.switch_variation(direction):
+        _update_after_navigation(app)
+
+def handle_promote_variation(app):
+    if game_state.promote_to_mainline():
+        logging.info(f"Promoted {game_state.current_record()} to the mainline.")
+
+def handle_delete_variation(app):
+    """Remove the current move and its continuations from the game."""
+    record = game_state.current_record()
+    if game_state.delete_variation():
+        logging.info(f"Deleted variation starting with {record}.")
+        _update_after_navigation(app)
+
+def handle_session_restored(app):
+    """Show the game replayed from the session journal at startup."""
+    _update_after_navigation(app)
+    _check_game_over_and_update_ui(app)
 
 def handle_new_game_button(app):
     logging.info("New game started from button.")
@@ -23,7 +50,6 @@ def handle_new_game_button(app):
         game_state.clear()
     _update_turn_label(app)
     app.query_one("#board").refresh()
-    app.query_one("#move_list").update_moves()
     app.query_one("#game_state_label").update("")
 
 def handle_set_fen_button(app):
@@ -37,7 +63,6 @@ def handle_set_fen_button(app):
         game_state.set_board_from_fen(fen_string)
         _update_turn_label(app)
         app.query_one("#board").refresh()
-        app.query_one("#move_list").update_moves()
         app.query_one("#game_state_label").update("")
         error_label.update("")
         fen_input.remove_class("invalid")
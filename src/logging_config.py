@@ -1,30 +1,79 @@
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
 import sys
+from collections import deque
 from datetime import datetime
-from textual.widgets import RichLog
+from typing import TYPE_CHECKING, Optional
 
+if TYPE_CHECKING:
+    from textual.widgets import RichLog
 
-def setup_logging():
-    log_file = f"logs/{datetime.now().strftime('%Y-%m-%d')}-log.txt"
+
+# Size at which the log file is rotated, and how many old files are kept.
+LOG_FILE_BYTES = 10 * 1024 * 1024
+LOG_FILE_BACKUPS = 3
+
+# Formatted lines waiting for the Debug tab, and lines its RichLog keeps.
+PENDING_LINES = 1000
+DEBUG_LOG_LINES = 5000
+
+# Seconds between writes of pending lines to the Debug tab: one frame.
+FRAME_INTERVAL = 1 / 60
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def log_file_path() -> str:
+    return f"logs/{datetime.now().strftime('%Y-%m-%d')}-log.txt"
+
+
+def start_log_session(log_file: str):
+    """Mark a new session in an existing log file."""
     if os.path.exists(log_file):
         with open(log_file, "a") as f:
             f.write(f"\n--- NEW SESSION: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} ---\n")
-        if os.path.getsize(log_file) > 10 * 1024 * 1024:  # 10MB
-            with open(log_file, "r") as f:
-                lines = f.readlines()
-            with open(log_file, "w") as f:
-                f.writelines(lines[-10000:])  # Keep last 10000 lines
-    return log_file
 
 
 class RichLogHandler(logging.Handler):
-    def __init__(self, rich_log: RichLog):
+    """Collects formatted records for the Debug tab's RichLog in a bounded buffer.
+
+    emit() runs on the logging thread and only appends to the buffer; once a
+    RichLog is attached, everything that arrived during a frame is written
+    to it in one call from the UI thread. When the buffer is full the
+    oldest lines are dropped and a count of them is shown instead.
+    """
+
+    def __init__(self):
         super().__init__()
+        self.pending: deque[str] = deque(maxlen=PENDING_LINES)
+        self.dropped = 0
+        self.rich_log: "RichLog | None" = None
+
+    def attach(self, rich_log: "RichLog"):
         self.rich_log = rich_log
+        rich_log.set_interval(FRAME_INTERVAL, self.flush_pending, name="flush_log")
+        self.flush_pending()
 
     def emit(self, record):
-        self.rich_log.write(self.format(record))
+        line = self.format(record)
+        with self.lock:
+            if len(self.pending) == self.pending.maxlen:
+                self.dropped += 1
+            self.pending.append(line)
+
+    def flush_pending(self):
+        if not self.pending:
+            return
+        with self.lock:
+            lines = list(self.pending)
+            self.pending.clear()
+            dropped, self.dropped = self.dropped, 0
+        if dropped:
+            lines.insert(0, f"[WARNING]: {dropped} earlier log records were dropped")
+        self.rich_log.write("\n".join(lines))
 
 
 class StreamToLogger:
@@ -41,13 +90,46 @@ class StreamToLogger:
         pass
 
 
-def configure_logging(log_widget: RichLog):
-    log_file = setup_logging()
-    logging.basicConfig(level=logging.DEBUG, filename=log_file, filemode="a",
-                        format="%(asctime)s - %(levelname)s - %(message)s")
-    handler = RichLogHandler(log_widget)
+def configure_logging(level: int = logging.DEBUG) -> RichLogHandler:
+    """Log to today's file and to the Debug tab; attach the RichLog to the returned handler once it exists.
+
+    Loggers only put records on a queue; a listener thread writes them to
+    the size-rotated log file and the Debug tab's buffer, so logging never
+    waits on the disk or the UI.
+    """
+    global _listener
+    stop_logging()
+    os.makedirs("logs", exist_ok=True)
+    log_file = log_file_path()
+    start_log_session(log_file)
+    file_handler = logging.handlers.RotatingFileHandler(log_file, maxBytes=LOG_FILE_BYTES,
+                                                        backupCount=LOG_FILE_BACKUPS)
+    file_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+    handler = RichLogHandler()
     handler.setFormatter(logging.Formatter("[%(levelname)s]: %(message)s"))
-    logging.getLogger().addHandler(handler)
+
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(records, file_handler, handler)
+    _listener.start()
+    root = logging.getLogger()
+    for old_handler in root.handlers[:]:
+        root.removeHandler(old_handler)
+    root.addHandler(logging.handlers.QueueHandler(records))
+    root.setLevel(level)
 
     sys.stdout = StreamToLogger(logging.getLogger('STDOUT'), logging.INFO)
     sys.stderr = StreamToLogger(logging.getLogger('STDERR'), logging.ERROR)
+    return handler
+
+
+def stop_logging():
+    """Write out queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(stop_logging)
@@ -1,57 +1,35 @@
 import logging
 import sys
 from textual.app import App, ComposeResult
-from textual.widgets import Footer, RichLog, TabbedContent, TabPane, Button, Label, Input
+from textual.binding import Binding
+from textual.widgets import Footer, TabbedContent, TabPane, Button, Label, Input
 from textual.containers import Horizontal, Vertical, Container
 
 from chess_widgets.chess_board import ChessBoard
 from chess_widgets.move_list import MoveList
-from chess_core.game_state import set_board_from_fen
-from game_tab_handler import handle_forward_button, handle_backward_button, handle_new_game_button, handle_set_fen_button
-from file_tab_handler import handle_save_game_button, handle_load_game_button
-from logging_config import configure_logging
-
-
-
-def setup_logging():
-    log_file = f"logs/{datetime.now().strftime('%Y-%m-%d')}-log.txt"
-    if os.path.exists(log_file):
-        with open(log_file, "a") as f:
-            f.write(f"\n--- NEW SESSION: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} ---\n")
-        if os.path.getsize(log_file) > 10 * 1024 * 1024: # 10MB
-            with open(log_file, "r") as f:
-                lines = f.readlines()
-            with open(log_file, "w") as f:
-                f.writelines(lines[-10000:]) # Keep last 10000 lines
-    return log_file
-
-
-class RichLogHandler(logging.Handler):
-    def __init__(self, rich_log: RichLog):
-        super().__init__()
-        self.rich_log = rich_log
-
-    def emit(self, record):
-        self.rich_log.write(self.format(record))
-
-
-class StreamToLogger:
-    def __init__(self, logger, level):
-        self.logger = logger
-        self.level = level
-        self.linebuf = ''
-
-    def write(self, buf):
-        for line in buf.rstrip().splitlines():
-            self.logger.log(self.level, line.rstrip())
-
-    def flush(self):
-        pass
+from chess_core.game_state import game_state, set_board_from_fen
+from game_tab_handler import handle_forward_button, handle_backward_button, handle_new_game_button, handle_set_fen_button, handle_goto_ply, handle_switch_variation, handle_promote_variation, handle_delete_variation, handle_session_restored
+from file_tab_handler import handle_save_game_button, handle_load_game_button, handle_cancel_file_button, handle_game_picked
+from logging_config import DEBUG_LOG_LINES, configure_logging
 
 
 class MyApp(App):
     CSS_PATH = 'styles/app.css'
 
+    BINDINGS = [
+        Binding("home", "goto_first_move", "First move"),
+        Binding("end", "goto_last_move", "Last move"),
+        Binding("pageup", "page_moves(-1)", "Back 10 moves"),
+        Binding("pagedown", "page_moves(1)", "Forward 10 moves"),
+        Binding("left_square_bracket", "switch_variation(-1)", "Previous variation"),
+        Binding("right_square_bracket", "switch_variation(1)", "Next variation"),
+        Binding("ctrl+u", "promote_variation", "Promote variation"),
+        Binding("delete", "delete_variation", "Delete variation"),
+    ]
+
+    # Plies jumped by PageUp/PageDown.
+    PAGE_PLIES = 20
+
     def __init__(self, initial_fen: str = None, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.initial_fen = initial_fen
@@ -67,7 +45,10 @@ class MyApp(App):
                                 yield Label("", id="game_state_label")
                                 yield ChessBoard(id="board")
                             with Vertical(classes="column", id="right_column"):
-                                yield MoveList(id="move_list")
+                                # The book, position search and analysis panels are
+                                # mounted after the first frame (see mount_side_panels).
+                                with Horizontal(id="move_panels"):
+                                    yield MoveList(id="move_list")
                                 with Horizontal():
                                     yield Button("Forward", id="forward_button")
                                     yield Button("Backward", id="backward_button")
@@ -76,27 +57,82 @@ class MyApp(App):
                                     yield Input(placeholder="Enter FEN string", id="fen_input")
                                     yield Button("Set FEN", id="set_fen_button")
                                     yield Label("", id="fen_error_label")
-                with TabPane("Debug", id="debug_tab"):
-                    yield RichLog(id="log")
-                with TabPane("File", id="file_tab"):
-                    with Vertical():
-                        yield Button("Save Game", id="save_game_button")
-                        yield Button("Load Game", id="load_game_button")
+                # Filled in when first shown (see on_tabbed_content_tab_activated).
+                yield TabPane("Debug", id="debug_tab")
+                yield TabPane("File", id="file_tab")
             yield Footer()
 
     def on_mount(self) -> None:
-        log_widget = self.query_one("#log")
-        configure_logging(log_widget)
+        # The Debug tab's RichLog is attached when the tab is first opened.
+        self.log_handler = configure_logging()
 
+        from chess_core.journal import SessionJournal
+        self.journal = SessionJournal(game_state)
         if self.initial_fen:
             logging.info(f"INTITAL FEN: {self.initial_fen}")
             set_board_from_fen(self.initial_fen)
             self.query_one("#board").refresh()
+        elif self.journal.restore():
+            handle_session_restored(self)
+        self.journal.start()
+        self.call_after_refresh(self.mount_side_panels)
+
+    def mount_side_panels(self) -> None:
+        """Add the panels beside the move list once the board is on screen."""
+        from chess_widgets.analysis_panel import AnalysisPanel
+        from chess_widgets.book_panel import BookPanel
+        from chess_widgets.position_search_panel import PositionSearchPanel
+        self.query_one("#move_panels").mount_all([BookPanel(id="book_panel"), PositionSearchPanel(id="position_search")])
+        self.query_one("#right_column").mount(AnalysisPanel(id="analysis_panel"), after="#move_panels")
+
+    def on_unmount(self) -> None:
+        self.journal.close()
 
     def on_tabbed_content_tab_activated(self, event: TabbedContent.TabActivated) -> None:
         logging.debug(f"Tab changed to: {event.pane.id}")
-        if event.pane.id == "game_tab":
+        pane = event.pane
+        if pane.id == "game_tab":
             self.query_one("#board").focus()
+        elif pane.id == "debug_tab" and not pane.children:
+            from textual.widgets import RichLog
+            from chess_widgets.timing_panel import TimingPanel
+            rich_log = RichLog(id="log", max_lines=DEBUG_LOG_LINES)
+            pane.mount_all([TimingPanel(id="timing_panel"), rich_log])
+            self.log_handler.attach(rich_log)
+        elif pane.id == "file_tab" and not pane.children:
+            from textual.widgets import ProgressBar
+            progress_bar = ProgressBar(id="file_progress", show_eta=False)
+            progress_bar.display = False
+            pane.mount(Vertical(Button("Save Game", id="save_game_button"),
+                                Button("Load Game", id="load_game_button"),
+                                Label("", id="file_status"),
+                                progress_bar,
+                                Button("Cancel", id="cancel_file_button", disabled=True)))
+
+    def on_move_list_ply_selected(self, event: MoveList.PlySelected) -> None:
+        handle_goto_ply(self, event.ply)
+
+    def on_position_search_panel_game_selected(self, event) -> None:
+        # The panel is imported after the first frame, so the event isn't annotated with its class.
+        handle_game_picked(self, event.database.file_path, event.database, event.game_id, event.ply)
+
+    def action_goto_first_move(self) -> None:
+        handle_goto_ply(self, 0)
+
+    def action_goto_last_move(self) -> None:
+        handle_goto_ply(self, len(game_state.move_stack))
+
+    def action_page_moves(self, direction: int) -> None:
+        handle_goto_ply(self, game_state.current_move_index + 1 + direction * self.PAGE_PLIES)
+
+    def action_switch_variation(self, direction: int) -> None:
+        handle_switch_variation(self, direction)
+
+    def action_promote_variation(self) -> None:
+        handle_promote_variation(self)
+
+    def action_delete_variation(self) -> None:
+        handle_delete_variation(self)
 
     def on_button_pressed(self, event: Button.Pressed) -> None:
         if event.button.id == "forward_button":
@@ -111,6 +147,8 @@ class MyApp(App):
             handle_save_game_button(self)
         elif event.button.id == "load_game_button":
             handle_load_game_button(self)
+        elif event.button.id == "cancel_file_button":
+            handle_cancel_file_button(self)
 
 
 if __name__ == "__main__":
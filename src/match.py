@@ -0,0 +1,98 @@
+"""Play two UCI engines against each other, several games at once.
+
+    python src/match.py --first stockfish --second ./my_engine --openings openings.pgn --concurrency 8 --time 0.1
+
+Finished games are appended to the output PGN as they come in and the
+running score is logged after each one. --watch follows the games on the
+chess board instead of the log.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import shlex
+import sys
+from typing import List, Optional
+import chess.engine
+
+from chess_core.engine import engine_command
+from chess_core.match import Adjudication, MatchGame, MatchRunner, load_openings
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Play an engine-versus-engine match.")
+    parser.add_argument("--first", help="UCI command of the first engine (default: $JETSON_CHESS_ENGINE or Stockfish)")
+    parser.add_argument("--second", help="UCI command of the second engine (default: the first engine)")
+    parser.add_argument("--openings", nargs="*", default=[],
+                        help="starting positions: FEN strings, files with one FEN per line or PGN files")
+    parser.add_argument("--rounds", type=int, default=1, help="times each opening is played with each colour")
+    parser.add_argument("--concurrency", type=int, default=os.cpu_count() or 1, help="games played at once")
+    parser.add_argument("-o", "--output", default="match.pgn", help="PGN file the games are appended to")
+    parser.add_argument("--depth", type=int, help="search depth per move")
+    parser.add_argument("--time", type=float, help="search time per move in seconds")
+    parser.add_argument("--nodes", type=int, help="nodes searched per move")
+    parser.add_argument("--resign-score", type=int, default=700, help="centipawns both engines must agree on to end a game")
+    parser.add_argument("--resign-plies", type=int, default=6, help="plies the resign score must hold for")
+    parser.add_argument("--draw-score", type=int, default=10, help="centipawns within which a game is drawn")
+    parser.add_argument("--draw-plies", type=int, default=12, help="plies the draw score must hold for")
+    parser.add_argument("--draw-from-ply", type=int, default=80, help="first ply a game may be adjudicated drawn")
+    parser.add_argument("--max-plies", type=int, default=500, help="plies after which a game is drawn")
+    parser.add_argument("--watch", action="store_true", help="show the running games on the chess board")
+    args = parser.parse_args(argv)
+    if args.depth is None and args.time is None and args.nodes is None:
+        args.time = 0.1
+    return args
+
+
+def build_runner(args: argparse.Namespace) -> MatchRunner:
+    first = shlex.split(args.first) if args.first else engine_command()
+    second = shlex.split(args.second) if args.second else first
+    adjudication = Adjudication(args.resign_score, args.resign_plies, args.draw_score,
+                                args.draw_plies, args.draw_from_ply, args.max_plies)
+    return MatchRunner(first, second, load_openings(args.openings),
+                       chess.engine.Limit(depth=args.depth, time=args.time, nodes=args.nodes),
+                       concurrency=max(1, args.concurrency), rounds=args.rounds, adjudication=adjudication)
+
+
+async def run_match(runner: MatchRunner, output_path: str):
+    def log_result(game: MatchGame):
+        logging.info(f"Game {game.number}: {game.white} - {game.black} {game.result} ({game.reason}); "
+                     f"{runner.names[0]} vs {runner.names[1]}: {runner.tally}")
+
+    runner.finish_listeners.append(log_result)
+    with open(output_path, "a", encoding="utf-8") as output:
+        await runner.run(output)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    try:
+        runner = build_runner(args)
+    except (OSError, ValueError) as error:
+        print(f"Cannot read openings: {error}", file=sys.stderr)
+        return 1
+
+    if args.watch:
+        from chess_widgets.match_viewer import MatchViewer
+        from logging_config import configure_logging
+        # The viewer has no Debug tab; its log goes to the log file only.
+        configure_logging(logging.INFO)
+        MatchViewer(runner, args.output).run()
+        return 0
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr, format="%(asctime)s - %(levelname)s - %(message)s")
+    try:
+        asyncio.run(run_match(runner, args.output))
+    except KeyboardInterrupt:
+        logging.info(f"Interrupted after {runner.tally.games} games")
+        return 130
+    except FileNotFoundError as error:
+        logging.error(f"Engine not found: {error.filename}")
+        return 1
+    logging.info(f"Final score {runner.names[0]} vs {runner.names[1]}: {runner.tally}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())